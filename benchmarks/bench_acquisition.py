@@ -0,0 +1,73 @@
+"""
+Acquisition throughput against the simulated roaster.
+
+    python benchmarks/bench_acquisition.py --transport tcp --devices 8 --rate 10
+    python benchmarks/bench_acquisition.py --transport pty --baud 9600 --rate 10
+    python benchmarks/bench_acquisition.py --transport rtu+tcp --crc 0.02 --short 0.02
+
+Runs a BusManager with N slaves polling HR100..HR110 for --seconds and
+prints achieved rate, jitter and errors per device plus process CPU time.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.acquisition import BusManager  # noqa: E402
+from services.modbus_client import client_from_url  # noqa: E402
+from services.simulator import Faults, RoastModel, SimulatedRoaster  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--transport", choices=("tcp", "rtu+tcp", "pty"), default="tcp")
+    ap.add_argument("--devices", type=int, default=1)
+    ap.add_argument("--rate", type=float, default=10.0, help="target Hz per device")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--baud", type=int, default=None, help="simulator wire pacing")
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--crc", type=float, default=0.0)
+    ap.add_argument("--short", type=float, default=0.0)
+    ap.add_argument("--exc", type=float, default=0.0)
+    args = ap.parse_args()
+
+    faults = Faults(latency=args.latency, crc_rate=args.crc, short_rate=args.short,
+                    exception_rate=args.exc, seed=1)
+    # slave=None: simülatör her slave id'ye cevap verir -> N cihaz tek hatta
+    sim = SimulatedRoaster(RoastModel(speed=10, autostart=True), faults, slave=None,
+                           rtu=args.transport != "tcp", baud=args.baud)
+    if args.transport == "pty":
+        url = sim.serve_pty()
+    else:
+        host, port = sim.start()
+        url = f"{args.transport}://{host}:{port}"
+
+    client = client_from_url(url, timeout=0.3)
+    bus = BusManager(client)
+    streams = [bus.add_device(slave, 100, 11, rate_hz=args.rate) for slave in range(1, args.devices + 1)]
+
+    cpu0 = time.process_time()
+    bus.start()
+    t_end = time.monotonic() + args.seconds
+    samples = 0
+    while time.monotonic() < t_end:
+        time.sleep(0.05)
+        for s in streams:
+            samples += len(s.drain())
+    bus.stop()
+    cpu = time.process_time() - cpu0
+    sim.stop()
+
+    print(f"transport={args.transport} url={url} devices={args.devices} target={args.rate} Hz")
+    print(f"{'slave':>5} {'rate Hz':>8} {'jitter ms':>10} {'ok':>6} {'errors':>6} {'backoff':>7}")
+    for slave, st in bus.stats().items():
+        print(f"{slave:>5} {st['rate_hz']:>8.2f} {st['jitter_ms']:>10.2f} {st['ok']:>6} "
+              f"{st['errors']:>6} {st['backoff']:>7.0f}")
+    print(f"samples={samples} ({samples / args.seconds:.1f}/s)  cpu={cpu:.2f}s "
+          f"({100 * cpu / args.seconds:.1f}% of one core, simulator included)")
+
+
+if __name__ == "__main__":
+    main()
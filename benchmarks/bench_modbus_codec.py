@@ -0,0 +1,144 @@
+"""
+Micro-benchmark: Modbus RTU CRC + FC03 register decoding, old vs new.
+
+    python benchmarks/bench_modbus_codec.py
+
+Frames are representative FC03 responses for 11 registers (HR100..HR110,
+our poll block) and 125 registers (max block per request). The last
+section decodes a register map block (u16 / i16 / u32 / f32, both word
+orders): per-value loop vs the precompiled block struct.
+"""
+import os
+import sys
+import struct
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.modbus_frames import append_crc, crc16_modbus, decode_u16, read_holding_pdu, rtu_frame  # noqa: E402
+from services.register_map import ReadPlan, register, width  # noqa: E402
+
+
+# ---------- old implementations (baseline) ----------
+def crc16_bitwise(data: bytes) -> int:
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+    return crc & 0xFFFF
+
+
+def decode_loop(resp: bytes, qty: int) -> list:
+    data = resp[3:3 + 2 * qty]
+    values = []
+    for i in range(qty):
+        hi = data[2 * i]
+        lo = data[2 * i + 1]
+        values.append((hi << 8) | lo)
+    return values
+
+
+def build_request_old(slave, start_reg, qty):
+    req = bytes([
+        slave, 0x03,
+        (start_reg >> 8) & 0xFF, start_reg & 0xFF,
+        (qty >> 8) & 0xFF, qty & 0xFF
+    ])
+    c = crc16_bitwise(req)
+    return req + bytes([c & 0xFF, (c >> 8) & 0xFF])
+
+
+def decode_map_loop(regs, words, word_order):
+    # register başına: u16 kelimeler -> işaret / 32 bit birleştirme / float / ölçek
+    out = {}
+    for off, r in regs:
+        if width(r) == 1:
+            v = words[off]
+            if r.type == "i16" and v & 0x8000:
+                v -= 0x10000
+        else:
+            hi, lo = words[off], words[off + 1]
+            if word_order == "little":
+                hi, lo = lo, hi
+            v = (hi << 16) | lo
+            if r.type == "i32" and v & 0x80000000:
+                v -= 0x100000000
+            elif r.type == "f32":
+                v = struct.unpack(">f", struct.pack(">I", v))[0]
+        out[r.name] = v if r.scale in (None, 1) else v * r.scale
+    return out
+
+
+# ---------- alternative ----------
+def decode_array(resp: bytes, qty: int) -> list:
+    a = array("H")
+    a.frombytes(memoryview(resp)[3:3 + 2 * qty])
+    if sys.byteorder == "little":
+        a.byteswap()
+    return a.tolist()
+
+
+def response_frame(qty: int) -> bytes:
+    body = bytes([2, 0x03, 2 * qty])
+    for i in range(qty):
+        v = (i * 337 + 1200) & 0xFFFF
+        body += bytes([v >> 8, v & 0xFF])
+    return append_crc(body)
+
+
+def bench(label, fn, number):
+    t = min(timeit.repeat(fn, number=number, repeat=5))
+    us = t / number * 1e6
+    print(f"  {label:<34} {us:9.2f} us")
+    return us
+
+
+def main():
+    number = 20000
+    for qty in (11, 125):
+        resp = response_frame(qty)
+        body = memoryview(resp)[:-2]
+
+        assert crc16_bitwise(resp[:-2]) == crc16_modbus(body)
+        assert decode_loop(resp, qty) == decode_u16(resp, 3, qty) == decode_array(resp, qty)
+        assert build_request_old(2, 100, qty) == rtu_frame(2, read_holding_pdu(100, qty))
+
+        print(f"\n{qty} registers ({len(resp)}-byte response)")
+        old = bench("crc bitwise (old)", lambda: crc16_bitwise(resp[:-2]), number)
+        new = bench("crc table + memoryview (new)", lambda: crc16_modbus(body), number)
+        print(f"  {'-> speedup':<34} {old / new:9.1f} x")
+
+        old = bench("decode python loop (old)", lambda: decode_loop(resp, qty), number)
+        new = bench("decode struct.unpack_from (new)", lambda: decode_u16(resp, 3, qty), number)
+        bench("decode array('H') + byteswap", lambda: decode_array(resp, qty), number)
+        print(f"  {'-> speedup':<34} {old / new:9.1f} x")
+
+        old = bench("request build + crc (old)", lambda: build_request_old(2, 100, qty), number)
+        new = bench("rtu_frame cached (new)", lambda: rtu_frame(2, read_holding_pdu(100, qty)), number)
+        print(f"  {'-> speedup':<34} {old / new:9.1f} x")
+
+    # 20 u16 (x0.1) + 10 i16 + 10 u32 + 20 f32 = 90 register
+    regs = [register(f"u{i}", i, scale=0.1) for i in range(20)]
+    regs += [register(f"s{i}", 20 + i, "i16") for i in range(10)]
+    regs += [register(f"l{i}", 30 + 2 * i, "u32") for i in range(10)]
+    regs += [register(f"f{i}", 50 + 2 * i, "f32") for i in range(20)]
+    for order in ("big", "little"):
+        plan = ReadPlan(regs, word_order=order)
+        block = plan.full.blocks[0]
+        data = response_frame(block.qty)[3:-2]
+        words = decode_u16(data, 0, block.qty)
+        assert repr(decode_map_loop(block.regs, words, order)) == repr(plan.decode(block, data))
+
+        print(f"\nregister map block, {len(regs)} values / {block.qty} registers, word order {order}")
+        old = bench("u16 words + per-value loop", lambda: decode_map_loop(block.regs, decode_u16(data, 0, block.qty), order), number)
+        new = bench("block struct (ReadPlan.decode)", lambda: plan.decode(block, data), number)
+        print(f"  {'-> speedup':<34} {old / new:9.1f} x")
+
+
+if __name__ == "__main__":
+    main()
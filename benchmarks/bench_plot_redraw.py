@@ -0,0 +1,92 @@
+"""
+RoastPlot data redraw (resize / zoom / bulk load) for 1k / 10k / 100k points.
+
+    python benchmarks/bench_plot_redraw.py
+
+old:     per-vertex xf/yf + pts.extend over every point (pre-decimation _redraw)
+python:  per-column decimation, pure-Python fold
+numpy:   per-column decimation, vectorized fold (clip + affine + interleave)
+
+Only the data layer is timed (grid/labels are not rebuilt); Line
+instructions are created but no window is opened.
+"""
+import os
+import sys
+import math
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.graphics import Line  # noqa: E402
+
+import widgets.roast_plot as roast_plot  # noqa: E402
+from widgets.roast_plot import RoastPlot  # noqa: E402
+
+
+# ---------- old implementation (baseline) ----------
+def redraw_old(plot):
+    xf = plot._xf
+    yf = plot._yf
+    lines = []
+    for ys, scale in ((plot._set, 1.0), (plot._bt, 1.0), (plot._ror, plot.ROR_SCALE)):
+        pts = []
+        for sx, sy in zip(plot._xs, ys):
+            pts.extend([xf(sx), yf(sy * scale)])
+        lines.append(Line(points=pts, width=1.2))
+    return lines
+
+
+def redraw_new(plot):
+    plot._full = True
+    plot._update_data()
+
+
+def make_plot(n):
+    plot = RoastPlot(size=(1200, 600))
+    plot._draw_static()
+    # n noktayı 20 dakikalık kavurmaya yay (W=1200 s)
+    dt = 1200.0 / n
+    xs = array("d", (i * dt for i in range(n)))
+    bts = array("d", (25 + 180 * (1 - math.exp(-i * dt / 300)) + math.sin(i) for i in range(n)))
+    sets = array("d", (230.0 for _ in range(n)))
+    rors = array("d", (max(0.0, 18 - i * dt / 80) for i in range(n)))
+    plot.set_series_bulk(xs, bts, sets, rors)
+    return plot
+
+
+def bench(label, fn, number):
+    t = min(timeit.repeat(fn, number=number, repeat=3))
+    ms = t / number * 1e3
+    print(f"  {label:<34} {ms:9.2f} ms")
+    return ms
+
+
+def main():
+    has_numpy = roast_plot._numpy() is not None
+    if not has_numpy:
+        print("numpy not installed: numpy rows skipped")
+
+    for n in (1000, 10000, 100000):
+        plot = make_plot(n)
+        number = max(1, 20000 // n)
+
+        print(f"\n{n} points")
+        old = bench("per-vertex transform (old)", lambda: redraw_old(plot), number)
+
+        np_mod = roast_plot.np
+        roast_plot.np = None
+        py = bench("decimated, pure python", lambda: redraw_new(plot), number)
+        roast_plot.np = np_mod
+        print(f"  {'-> speedup':<34} {old / py:9.1f} x")
+
+        if has_numpy:
+            new = bench("decimated, numpy (new)", lambda: redraw_new(plot), number)
+            print(f"  {'-> speedup':<34} {old / new:9.1f} x")
+
+        verts = sum(len(c.points) // 2 for c in plot._bt_line.group.children if isinstance(c, Line))
+        print(f"  BT vertices drawn: {verts} of {n}")
+
+
+if __name__ == "__main__":
+    main()
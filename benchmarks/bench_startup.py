@@ -0,0 +1,106 @@
+"""
+Startup time: process start -> first frame -> I/O running.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 1 --importtime 25
+
+Runs main.py in a fresh process per run, with ROASTER_STARTUP_TRACE /
+ROASTER_STARTUP_EXIT, and prints the median time of each phase (see
+main.py): import (interpreter, Kivy, window, dashboard modules), kv
+(live_roast.kv parse), build (LiveRoastScreen), first_frame, io
+(link / log writer / history / polling started). --importtime also lists
+the slowest imports of one run (python -X importtime, self time).
+
+ROASTER_MODBUS points at a closed local port: the link supervisor keeps
+retrying in the background, which is what a kiosk without its roaster
+sees; startup must not depend on it.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ("import", "kv", "build", "first_frame", "io")
+
+
+def closed_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def run_once(log_dir, importtime=False):
+    env = dict(os.environ)
+    env.update({
+        "ROASTER_STARTUP_TRACE": "1",
+        "ROASTER_STARTUP_EXIT": "1",
+        "ROASTER_MODBUS": f"tcp://127.0.0.1:{closed_port()}",
+        "ROASTER_LOG_DIR": log_dir,
+        "KIVY_NO_CONSOLELOG": "1",
+    })
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd.append("main.py")
+
+    env["ROASTER_STARTUP_T0"] = repr(time.time())
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    total = (time.perf_counter() - t0) * 1000.0
+
+    marks = {}
+    imports = []
+    for line in proc.stderr.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == "startup":
+            marks[parts[1]] = float(parts[2])
+        elif line.startswith("import time:") and "|" in line:
+            self_us, _cum, name = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                imports.append((int(self_us), name.rstrip()))
+    if "io" not in marks:
+        sys.exit(f"main.py did not reach the io phase (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+    marks["exit"] = total
+    return marks, imports
+
+
+def median(xs):
+    xs = sorted(xs)
+    return xs[len(xs) // 2]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--importtime", type=int, default=0, metavar="N", help="show the N slowest imports")
+    args = ap.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as log_dir:
+        run_once(log_dir)                   # ısınma: .pyc'ler, disk cache
+        for _ in range(args.runs):
+            runs.append(run_once(log_dir)[0])
+        imports = run_once(log_dir, importtime=True)[1] if args.importtime else []
+
+    print(f"{args.runs} runs, median ms")
+    print(f"  {'phase':<12} {'at':>9} {'took':>9}")
+    prev = 0.0
+    for phase in PHASES + ("exit",):
+        at = median([r[phase] for r in runs])
+        print(f"  {phase:<12} {at:9.1f} {at - prev:9.1f}")
+        prev = at
+
+    if imports:
+        print("\nslowest imports (self time, one run)")
+        for us, name in sorted(imports, reverse=True)[:args.importtime]:
+            print(f"  {us / 1000.0:8.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+UI frame time while the dashboard polls the simulated roaster.
+
+    python benchmarks/bench_ui_frame.py --seconds 30 --speed 20 --rate 10
+
+Starts a SimulatedRoaster on Modbus TCP (roast accelerated by --speed so
+the plot grows quickly), points the app at it via ROASTER_MODBUS and
+records Kivy frame intervals. Prints p50/p95/p99/max frame time.
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.simulator import Faults, RoastModel, SimulatedRoaster  # noqa: E402
+
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100.0 * len(xs)))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--speed", type=float, default=20.0, help="roast speed-up")
+    ap.add_argument("--rate", type=float, default=10.0, help="poll Hz")
+    ap.add_argument("--latency", type=float, default=0.0)
+    args = ap.parse_args()
+
+    sim = SimulatedRoaster(RoastModel(speed=args.speed, autostart=True), Faults(latency=args.latency))
+    host, port = sim.start()
+    os.environ["ROASTER_MODBUS"] = f"tcp://{host}:{port}"
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from kivy.clock import Clock
+    from main import RoastDashboardApp
+
+    frames = []
+    app = RoastDashboardApp()
+
+    def on_start(*_):
+        app.root.poll_hz = args.rate
+        Clock.schedule_interval(lambda dt: frames.append(dt), 0)
+        Clock.schedule_once(lambda *_: app.stop(), args.seconds)
+
+    Clock.schedule_once(on_start, 0)
+    app.run()
+    sim.stop()
+
+    frames = frames[5:]                 # ilk karelerde pencere açılışı var
+    if not frames:
+        print("no frames recorded")
+        return
+    ms = [f * 1000.0 for f in frames]
+    print(f"frames={len(ms)} mean={sum(ms) / len(ms):.2f} ms p50={pct(ms, 50):.2f} "
+          f"p95={pct(ms, 95):.2f} p99={pct(ms, 99):.2f} max={max(ms):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,47 @@
-from kivy.app import App
-from kivy.lang import Builder
-from kivy.core.window import Window
-from kivy.factory import Factory
+"""
+Kiosk entry point. Startup order, so the dashboard is on screen as early
+as possible after a reboot:
 
-from screens.live_roast import LiveRoastScreen
+    import      Kivy + the dashboard screen (widgets register lazily)
+    kv          ui/live_roast.kv
+    build       LiveRoastScreen() (no I/O)
+    first_frame first window flip
+    io          serial / TCP link, log writer, history db, polling
+                (LiveRoastScreen.start_io, right after the first frame)
 
-# widget importları
-from widgets.roast_plot import RoastPlot
-from widgets.airflow_gauge import AirflowGauge
-from widgets.bar_gauge import BarGauge
+History / Profile popups and numpy load on first use; the popups are
+preloaded once the app is idle.
 
-# Kivy Factory'ye kaydet (KV artık import istemez)
-Factory.register("RoastPlot", cls=RoastPlot)
-Factory.register("AirflowGauge", cls=AirflowGauge)
-Factory.register("BarGauge", cls=BarGauge)
+ROASTER_STARTUP_TRACE=1 prints "startup <phase> <ms since start>" lines,
+ROASTER_STARTUP_EXIT=1 quits after the io phase (benchmarks/bench_startup.py).
+"""
+import os
+import sys
+import time
+
+_TRACE = bool(os.environ.get("ROASTER_STARTUP_TRACE"))
+# bench_startup.py süreci başlatırken zamanı verir: yorumlayıcı açılışı da sayılır
+_T0 = float(os.environ.get("ROASTER_STARTUP_T0") or time.time())
+
+
+def _mark(phase):
+    if _TRACE:
+        # sys.stderr'i Kivy logger'ı sarar (KIVY_NO_CONSOLELOG ile yutar): asıl stderr
+        print(f"startup {phase} {(time.time() - _T0) * 1000.0:.1f}", file=sys.__stderr__, flush=True)
+
+
+from kivy.app import App                    # noqa: E402
+from kivy.clock import Clock                # noqa: E402
+from kivy.lang import Builder               # noqa: E402
+from kivy.core.window import Window         # noqa: E402
+from kivy.factory import Factory            # noqa: E402
+
+from screens.live_roast import LiveRoastScreen  # noqa: E402
+
+# Kivy Factory'ye kaydet (KV artık import istemez); modül ilk kullanımda yüklenir
+Factory.register("RoastPlot", module="widgets.roast_plot")
+Factory.register("AirflowGauge", module="widgets.airflow_gauge")
+Factory.register("BarGauge", module="widgets.bar_gauge")
 
 Window.size = (1280, 800)
 Window.borderless = True
@@ -24,10 +52,32 @@ Window.left = 0
 Window.minimum_width, Window.minimum_height = (1280, 800)
 Window.clearcolor = (0.07, 0.08, 0.10, 1)
 
+_mark("import")
+
+
 class RoastDashboardApp(App):
     def build(self):
         Builder.load_file("ui/live_roast.kv")
-        return LiveRoastScreen()
+        _mark("kv")
+        root = LiveRoastScreen()
+        _mark("build")
+        Window.bind(on_flip=self._first_frame)
+        return root
+
+    def _first_frame(self, *_):
+        Window.unbind(on_flip=self._first_frame)
+        _mark("first_frame")
+        # bir sonraki tick: ilk kare ekranda, I/O thread'leri şimdi başlar
+        Clock.schedule_once(self._start_io, 0)
+
+    def _start_io(self, _dt):
+        self.root.start_io()
+        _mark("io")
+        if os.environ.get("ROASTER_STARTUP_EXIT"):
+            Clock.schedule_once(lambda _dt: self.stop(), 0)
+            return
+        # kullanıcı dokunmadan önce, boşta
+        Clock.schedule_once(self.root.preload, 1.0)
 
     def on_stop(self):
         try:
@@ -35,14 +85,6 @@ class RoastDashboardApp(App):
         except Exception:
             pass
 
+
 if __name__ == "__main__":
     RoastDashboardApp().run()
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,192 @@
+import os
+import time
+import threading
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.properties import ObjectProperty, StringProperty
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.popup import Popup
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.textinput import TextInput
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+
+from services.export import ExportJob
+
+
+class HistoryRow(ButtonBehavior, Label):
+    path = StringProperty("")
+    select = ObjectProperty(None, allownone=True)     # select(path), data'dan gelir
+
+    def on_release(self):
+        if self.select is not None:
+            self.select(self.path)
+
+
+class HistoryList(RecycleView):
+    """Only the visible rows exist as widgets; `data` holds plain dicts."""
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.viewclass = HistoryRow
+        lm = RecycleBoxLayout(orientation="vertical", size_hint_y=None,
+                              default_size=(None, dp(40)), default_size_hint=(1, None))
+        lm.bind(minimum_height=lm.setter("height"))
+        self.add_widget(lm)
+
+
+class HistoryPopup(Popup):
+    """
+    History tab: roasts newest first, PAGE rows per query, next page
+    fetched when the list is scrolled near the bottom. The search box
+    filters by day ("2026-10", "2026-10-17") or profile name prefix.
+    Tapping a row calls on_select(log_path) and closes the popup.
+    XLSX / CSV export the roasts matching the search in a child process
+    (services.export) into <log_dir>/exports.
+    """
+
+    PAGE = 50
+
+    def __init__(self, history, log_dir, on_select=None, **kw):
+        self.history = history
+        self.log_dir = log_dir
+        self.on_select = on_select
+        self._after = None              # son satırın (started, id) -> keyset sayfalama
+        self._exhausted = False
+        self._search = ""
+        self._export = None
+        self._export_ev = None
+
+        root = BoxLayout(orientation="vertical", spacing=dp(10), padding=dp(12))
+
+        top = BoxLayout(orientation="horizontal", spacing=dp(12),
+                        size_hint_y=None, height=dp(44))
+        self.search_input = TextInput(hint_text="Tarih (2026-10-17) / profil",
+                                      multiline=False, font_size="18sp")
+        self.count_label = Label(text="", size_hint_x=None, width=dp(160), font_size="16sp")
+        btn_xlsx = Button(text="XLSX", size_hint_x=None, width=dp(90))
+        btn_csv = Button(text="CSV", size_hint_x=None, width=dp(90))
+        top.add_widget(self.search_input)
+        top.add_widget(self.count_label)
+        top.add_widget(btn_xlsx)
+        top.add_widget(btn_csv)
+
+        self.list = HistoryList()
+
+        btn_close = Button(text="KAPAT", size_hint_y=None, height=dp(48))
+
+        root.add_widget(top)
+        root.add_widget(self.list)
+        root.add_widget(btn_close)
+
+        kw.setdefault("title", "HISTORY")
+        kw.setdefault("size_hint", (0.92, 0.92))
+        super().__init__(content=root, **kw)
+
+        # yazarken her tuşta sorgu atma
+        self._trigger_search = Clock.create_trigger(self._apply_search, 0.3)
+        self.search_input.bind(text=lambda *_: self._trigger_search())
+        self.list.bind(scroll_y=self._on_scroll)
+        btn_close.bind(on_press=lambda *_: self.dismiss())
+        btn_xlsx.bind(on_press=lambda *_: self.start_export("xlsx"))
+        btn_csv.bind(on_press=lambda *_: self.start_export("csv"))
+
+        self.reload()
+        # diskte olup store'da olmayan kayıtlar (çökme / ilk kurulum): arka planda
+        threading.Thread(target=self._sync, name="history-sync", daemon=True).start()
+
+    # ---------- loading ----------
+    def reload(self, *_):
+        self._after = None
+        self._exhausted = False
+        self.list.data = []
+        self._load_more()
+        self.count_label.text = f"{self.history.count(search=self._search)} kavurma"
+
+    def _load_more(self):
+        if self._exhausted:
+            return
+        rows = self.history.page(self.PAGE, after=self._after, search=self._search)
+        if len(rows) < self.PAGE:
+            self._exhausted = True
+        if rows:
+            self._after = (rows[-1]["started"], rows[-1]["id"])
+            self.list.data.extend(
+                {"text": self._format(r), "path": r["path"], "select": self._select}
+                for r in rows)
+
+    def _on_scroll(self, _rv, scroll_y):
+        # scroll_y: 1 üst, 0 alt
+        if scroll_y < 0.1:
+            self._load_more()
+
+    def _apply_search(self, *_):
+        self._search = self.search_input.text.strip()
+        self.reload()
+
+    def _select(self, path):
+        self.dismiss()
+        if self.on_select is not None:
+            self.on_select(path)
+
+    def _sync(self):
+        # sadece kapanmış (.closed) segmentler: kayıt süreni recorder ekler
+        if self.history.sync_dir(self.log_dir):
+            Clock.schedule_once(self.reload)
+
+    # ---------- export ----------
+    def start_export(self, fmt):
+        if self._export is not None and self._export.running:
+            return
+        paths = self.history.paths(search=self._search)
+        if not paths:
+            self.count_label.text = "export: kayıt yok"
+            return
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(self.log_dir, "exports", f"roasts-{stamp}")
+        if fmt == "xlsx":
+            out += ".xlsx"
+        self._export = ExportJob(paths, out, fmt)
+        self._export.start()
+        self._export_ev = Clock.schedule_interval(self._export_tick, 0.25)
+
+    def _export_tick(self, _dt):
+        job = self._export
+        if job.running:
+            self.count_label.text = f"export %{job.fraction * 100:.0f}"
+            return
+        self._export_ev.cancel()
+        self._export_ev = None
+        if job.error:
+            self.count_label.text = "export FAIL"
+            self.title = f"HISTORY - export: {job.error}"
+        else:
+            # okunamayan / yarım segmentler export'u durdurmaz, sadece sayılır
+            self.count_label.text = f"export OK, {len(job.skipped)} atlandı" if job.skipped else "export OK"
+            self.title = f"HISTORY - {job.result}"
+
+    def on_dismiss(self):
+        # popup kapansa da export arka planda biter; sadece ilerleme takibi durur
+        if self._export_ev is not None:
+            self._export_ev.cancel()
+            self._export_ev = None
+
+    # ---------- format ----------
+    @staticmethod
+    def _mmss(tsec) -> str:
+        tsec = max(0, int(tsec or 0))
+        return f"{tsec // 60:02d}:{tsec % 60:02d}"
+
+    def _format(self, r) -> str:
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["started"]))
+        profile = r["profile"] or f"SET {r['set_c']:.0f}°C"
+        return (
+            f"{started}   {profile}   {self._mmss(r['duration_s'])}   "
+            f"charge {r['charge_bt']:.1f}°C  drop {r['drop_bt']:.1f}°C   "
+            f"dry {self._mmss(r['dry_s'])}  mill {self._mmss(r['maillard_s'])}  "
+            f"dev {self._mmss(r['dev_s'])}   RoR max {r['peak_ror']:.1f}"
+        ).replace(".", ",")
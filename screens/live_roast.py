@@ -1,6 +1,8 @@
+import os
+
 from kivy.uix.screenmanager import Screen
 from kivy.clock import Clock
-from kivy.properties import NumericProperty, StringProperty
+from kivy.properties import NumericProperty, OptionProperty, StringProperty
 
 from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
@@ -8,7 +10,17 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.metrics import dp
 
-from services.modbus_client import ModbusClient
+from services import metrics
+from services.modbus_client import client_from_url
+from services.acquisition import AcquisitionWorker
+from services.link import CONNECTING as LINK_CONNECTING, STATES as LINK_STATES, LinkSupervisor
+from services.register_map import FLOAT_BT_MAP, LOG_SPAN, ROASTER_MAP, by_name
+from services.roast_log import RoastRecorder
+from services.roast_history import RoastHistory
+from services.roast_columns import RoastColumns, columns_path, convert_log
+from services.profiles import DRY_END_C, Profile, ProfileStore, ProfileTrack
+from services.events import LABELS as EVENT_LABELS, EventDetector
+from services.ror import METHODS as ROR_METHODS, RorCalculator, decode_bt
 from widgets.numeric_keypad import NumericKeypadPopup
 
 
@@ -32,33 +44,63 @@ class LiveRoastScreen(Screen):
     drytime_text = StringProperty("00:02")
     miltime_text = StringProperty("00:03")
     devtime_text = StringProperty("00:04")
-    ror_text = StringProperty("0,0 °C/sn")
+    ror_text = StringProperty("0,0 °C/dk")        # HR110 ×10 °C/dk, host RoR aynı birimde
 
     last_read = StringProperty("—")              # debug
+    link_state = OptionProperty(LINK_CONNECTING, options=LINK_STATES)   # üst bardaki bağlantı göstergesi
+    link_text = StringProperty("LINK …")
+    poll_hz = NumericProperty(5.0)               # HR100..HR110 okuma hızı (0.1..10 Hz, hat limitiyle kırpılır)
+    rate_text = StringProperty("")               # üst bar: ölçülen hız / jitter
+    profile_text = StringProperty("")            # seçili profil: ΔBT / ΔRoR / faz tahminleri
+
+    # RoR: kontrolcü (HR110), host (BT'den hesaplanan) veya ikisi birden
+    ror_mode = OptionProperty("controller", options=("controller", "host", "both"))
+    ror_method = OptionProperty("lsq", options=ROR_METHODS)
+    ror_window_s = NumericProperty(30.0)
 
     def __init__(self, **kw):
-        # super() öncesi
+        # super() öncesi: Kivy KV kurallarını ve on_kv_post'u Screen.__init__
+        # içinde çalıştırır, handler'lar (on_poll_hz, ...) bunları görebilmeli
         self._poll_ev = None
         self._profile_popup = None
 
-        super().__init__(**kw)
-
         # ---- Modbus mapping ----
-        self.START_REG = 100
-        self.QTY = 11                     # HR100..HR110
-
-        self.REG_SET = 100                # HR100
-        self.REG_BT = 104                 # HR104
-        self.REG_TIME = 105               # HR105
-        self.REG_PROFILE = 106            # HR106
-        self.REG_DRYTIME = 107            # HR107
-        self.REG_MILTIME = 108            # HR108
-        self.REG_DEVTIME = 109            # HR109
-        self.REG_ROR = 110                # HR110
+        # adres / ölçek / poll hızı services.register_map'te; HR100..HR110 ham
+        # olarak roast log'a da yazılır
+        self.START_REG, self.QTY = LOG_SPAN     # HR100..HR110
+        registers = ROASTER_MAP
+        if os.environ.get("ROASTER_FLOAT_BT"):
+            registers += FLOAT_BT_MAP     # HR111..HR112 float BT (yeni firmware)
+        self.regs = by_name(registers)
+
+        # ROASTER_METRICS_PORT=9108 -> http://127.0.0.1:9108/metrics (Prometheus) ve /metrics.json
+        self._metrics_port = int(os.environ.get("ROASTER_METRICS_PORT", "0") or 0)
+        self._metrics_http = None
 
         # ---- client ----
-        self.client = ModbusClient(port="COM5", baud=9600, slave=2, timeout=1.5)
-        self.client.connect()
+        # port worker thread'de açılır (ilk okumada), UI thread seri I/O beklemez
+        # ROASTER_MODBUS: simülatör / TCP gateway için (örn. tcp://127.0.0.1:5020)
+        self.client = client_from_url(os.environ.get("ROASTER_MODBUS", "COM5"), slave=2, timeout=1.5)
+        # portu link supervisor açar / yeniden açar (backoff); hat yokken okumalar anında döner
+        self.link = LinkSupervisor(self.client)
+        self.acq = AcquisitionWorker(self.client, self.START_REG, self.QTY, rate_hz=self.poll_hz,
+                                     registers=registers, link=self.link)
+
+        super().__init__(**kw)
+
+        # ---- roast log + history ----
+        # her kavurma ayrı dosya (HR106 start/stop, tsec geri sarma);
+        # kapanan segmentin özeti writer thread'de history'ye yazılır
+        self.log_dir = os.environ.get("ROASTER_LOG_DIR", "roast_logs")
+        self.history = None               # RoastHistory, start_io() açar (sqlite + şema)
+        self.recorder = RoastRecorder(self.log_dir, self.START_REG, self.QTY,
+                                      on_close=self._segment_closed)
+        self._reference = None            # RoastColumns, plot'ta arka plan eğrisi
+        self._segment_meta = {}           # log path -> (profil adı, olay listesi) (history için)
+
+        # ---- profiles ----
+        self.profiles = ProfileStore(os.environ.get("ROASTER_PROFILE_DIR", "profiles"))
+        self.profile_track = None         # ProfileTrack, seçili hedef eğri
 
         # ---- plot buffers ----
         self.xs = []
@@ -67,55 +109,187 @@ class LiveRoastScreen(Screen):
         self.rors = []
 
         self.last_t = None  # son okunan tsec
+        self.last_bt = None  # HR104 <=300 belirsizliği için
+
+        self.ror_calc = RorCalculator(self.ror_method, self.ror_window_s)
+        self.host_ror = None
 
-        # placeholders
+        # charge / TP / dry end / FC / drop, örnek başına O(1)
+        self.event_detector = EventDetector(dry_end_c=DRY_END_C)
+
+        # yavaş register'lar (her poll'da gelmeyebilir): son okunan değer
         self._airflow_pa = 168
         self._burner_pct = 48
+        self._drum_hz = 50.0
 
     # ---------- lifecycle ----------
     def on_kv_post(self, *_):
-        self._resume_poll()
+        self.on_ror_mode(self, self.ror_mode)
+
+    def start_io(self, *_):
+        """
+        Open the history db, start the log writer, link supervisor and
+        acquisition threads and the poll clock. main.py calls this after the
+        first frame is on screen, so none of it delays the dashboard.
+        Idempotent.
+        """
+        if self.history is not None:
+            return
+        self.history = RoastHistory(os.path.join(self.log_dir, "history.sqlite"))
+        self.recorder.start()
+        self.link.start()
+        self.acq.start()
+        if self._metrics_port:
+            try:
+                self._metrics_http = metrics.serve(self._metrics_port)
+            except OSError as e:
+                self.last_read = f"metrics port {self._metrics_port}: {e}"
+        self._poll_ev = Clock.schedule_interval(self.poll, 1 / 20.0)
+
+    @staticmethod
+    def preload(*_):
+        """Import the History / Profile popups ahead of the first tap (after startup)."""
+        import screens.history  # noqa: F401
+        import screens.profile  # noqa: F401
 
     def close_serial(self):
-        self._pause_poll()
         try:
-            self.client.close()
+            if self._poll_ev is not None:
+                self._poll_ev.cancel()
         except Exception:
             pass
+        self._poll_ev = None
 
-    # ---------- poll control ----------
-    def _pause_poll(self):
+        # worker kendi thread'inde client.close() yapar
+        self.link.stop()
+        self.acq.stop()
         try:
-            if self._poll_ev is not None:
-                self._poll_ev.cancel()
+            self.client.close()
         except Exception:
             pass
-        self._poll_ev = None
 
-    def _resume_poll(self):
-        if self._poll_ev is None:
-            Clock.schedule_once(self.poll, 0)
-            self._poll_ev = Clock.schedule_interval(self.poll, 5.0)
+        if self._metrics_http is not None:
+            self._metrics_http.stop()
+            self._metrics_http = None
+
+        # açık segmenti kapatır, bekleyenleri yazıp fsync eder
+        self.recorder.stop()
+        if self.history is not None:
+            self.history.close()
+
+    # ---------- RoR ----------
+    def on_ror_method(self, *_):
+        self._rebuild_ror()
+
+    def on_ror_window_s(self, *_):
+        self._rebuild_ror()
+
+    def _rebuild_ror(self):
+        if getattr(self, "ror_calc", None) is not None:
+            self.ror_calc = RorCalculator(self.ror_method, self.ror_window_s)
+
+    def on_ror_mode(self, _inst, mode):
+        plot = self.ids.get("plot")
+        if plot is not None:
+            plot.show_ror = mode != "host"
+            plot.show_host_ror = mode != "controller"
+
+    def cycle_ror_mode(self):
+        modes = ("controller", "host", "both")
+        self.ror_mode = modes[(modes.index(self.ror_mode) + 1) % len(modes)]
+
+    # ---------- poll control ----------
+    def on_poll_hz(self, _inst, hz):
+        self.acq.set_rate(hz)
+
+    # ---------- history ----------
+    def _segment_closed(self, path):
+        # recorder writer thread'inde: kolon dosyası (overlay için) + history özeti
+        convert_log(path)
+        profile, events = self._segment_meta.pop(path, (None, ()))
+        self.history.ingest(path, profile=profile, events=events)
+
+    def open_history(self):
+        # sadece popup, poll devam eder
+        from screens.history import HistoryPopup
+
+        self.start_io()
+        HistoryPopup(self.history, self.log_dir, on_select=self.load_reference).open()
+
+    def load_reference(self, log_path):
+        """Overlay a past roast's BT on the plot (columns are mmap'ed, not parsed)."""
+        path = columns_path(log_path)
+        try:
+            if not os.path.exists(path) and convert_log(log_path) is None:
+                self.last_read = f"reference: no data in {os.path.basename(log_path)}"
+                return
+            ref = RoastColumns(path)
+        except (OSError, ValueError) as e:
+            self.last_read = f"reference: {e}"
+            return
+
+        plot = self.ids.get("plot")
+        if plot is not None:
+            plot.set_reference(ref.column("t"), ref.column("bt"))
+        if self._reference is not None:
+            self._reference.close()
+        self._reference = ref
+
+    # ---------- profile ----------
+    def open_profile(self):
+        from screens.profile import ProfilePopup
+
+        name = self.profile_track.profile.name if self.profile_track is not None else None
+        ProfilePopup(self.profiles, name, on_select=self.select_profile,
+                     on_save=self._save_reference_profile if self._reference is not None else None).open()
+
+    def select_profile(self, name):
+        plot = self.ids.get("plot")
+        if name is None:
+            self.profile_track = None
+            self.profile_text = ""
+            if plot is not None:
+                plot.clear_target()
+            return
+        try:
+            profile = self.profiles.load(name)
+        except (OSError, ValueError, KeyError) as e:
+            self.last_read = f"profile: {e}"
+            return
+
+        # hedef eğri bir kez plot zaman ızgarasına örneklenir
+        length = plot.W if plot is not None else 1200.0
+        self.profile_track = ProfileTrack(profile, grid_s=1.0, length_s=length)
+        self.profile_text = profile.name
+        if plot is not None:
+            plot.clear_target()
+            plot.set_target(self.profile_track.xs, self.profile_track.bt)
+
+    def _save_reference_profile(self, name):
+        try:
+            self.profiles.save(Profile.from_columns(name, self._reference))
+        except OSError as e:
+            return f"kaydedilemedi: {e}"
+        return None
 
     # ---------- keypad ----------
     def open_set_value_keypad(self):
-        self._pause_poll()
-
+        # poll devam eder: yazma kuyruğa girer, bir sonraki poll ile tek round trip
         current = (self.set_text or "").replace("°C", "").strip()
 
-        def _cancel():
-            self._resume_poll()
-
         def _ok(val_float, _text):
-            reg_value = int(round(val_float * 10.0))  # HR100 x10
+            reg = self.regs["set"]
+            reg_value = int(round(val_float / reg.scale))  # HR100 x10
 
-            ok, err = self.client.write_single_register(self.REG_SET, reg_value)
-            if ok:
-                self.last_read = f"HR100 <= {reg_value} yazıldı"
-            else:
-                self.last_read = f"HR100 write FAIL: {err}"
+            def _done(result):
+                ok, err = result
+                if ok:
+                    self.last_read = f"HR100 <= {reg_value} yazıldı"
+                else:
+                    self.last_read = f"HR100 write FAIL: {err}"
 
-            self._resume_poll()
+            # art arda girilen setpoint'ler birleşir, sadece sonuncusu yazılır
+            self.acq.write(reg.addr, reg_value, _done)
 
         NumericKeypadPopup(
             title="Set Value (°C)",
@@ -124,13 +298,10 @@ class LiveRoastScreen(Screen):
             min_value=0,
             max_value=400,
             on_ok=_ok,
-            on_cancel=_cancel
         ).open()
 
     # ---------- popup ----------
     def open_profile_confirm(self):
-        self._pause_poll()
-
         root = BoxLayout(orientation="vertical", spacing=dp(12), padding=dp(14))
 
         if int(self.profile_state) == 1:
@@ -174,7 +345,6 @@ class LiveRoastScreen(Screen):
                 self._profile_popup.dismiss()
         except Exception:
             pass
-        self._resume_poll()
 
     def _profile_yes(self):
         try:
@@ -185,25 +355,17 @@ class LiveRoastScreen(Screen):
 
         value = 0 if int(self.profile_state) == 1 else 1
         self._write_profile(value)
-        self._resume_poll()
 
     def _write_profile(self, value: int):
-        try:
-            ok, err = self.client.write_single_register(self.REG_PROFILE, int(value))
-            if not ok:
-                self.last_read = f"HR106 write FAIL: {err}"
-                return
+        reg = self.regs["profile"].addr
 
-            vals, rerr = self.client.read_holding_n(self.REG_PROFILE, 1)
-            if vals is None:
-                self.last_read = f"HR106 write OK, readback FAIL: {rerr}"
-                return
+        # FC23: yazma + poll okuması tek işlem; HR106'nın yeni değeri aynı
+        # örnekle gelir (_apply_sample profile_state'i günceller), ayrı readback yok
+        def _done(result):
+            ok, err = result
+            self.last_read = f"HR106 <= {value}" if ok else f"HR106 write FAIL: {err}"
 
-            self.profile_state = 1 if int(vals[0]) == 1 else 0
-            self.last_read = f"HR106={int(vals[0])}"
-
-        except Exception as e:
-            self.last_read = f"HR106 exception: {e}"
+        self.acq.write(reg, int(value), _done)
 
     # ---------- utils ----------
     @staticmethod
@@ -225,47 +387,109 @@ class LiveRoastScreen(Screen):
         self.bts.clear()
         self.sets.clear()
         self.rors.clear()
+        plot = self.ids.get("plot")
+        if plot is not None:
+            plot.clear_series()
 
     def _upsert_point(self, tsec: int, bt: float, setv: float, ror: float):
         """
         Aynı saniye tekrar geldiyse son noktayı overwrite et,
         yeni saniyeyse append et.
         BT/SET/ROR aynı hızda, aynı indekslerle gider.
+        Plot'a sadece değişen nokta gider (geçmiş kopyalanmaz).
         """
+        plot = self.ids.get("plot")
         if self.xs and int(self.xs[-1]) == int(tsec):
             self.bts[-1] = bt
             self.sets[-1] = setv
             self.rors[-1] = ror
+            if plot is not None:
+                plot.replace_last(float(tsec), bt, setv, ror)
         else:
             self.xs.append(float(tsec))
             self.bts.append(bt)
             self.sets.append(setv)
             self.rors.append(ror)
+            if plot is not None:
+                plot.append_samples(float(tsec), bt, setv, ror)
+
+    def _add_event(self, ev):
+        if ev is None:
+            return
+        plot = self.ids.get("plot")
+        if plot is not None:
+            plot.add_event(ev.t, EVENT_LABELS[ev.kind])
+
+    def _update_deviation(self, tsec, bt, ror):
+        dev = self.profile_track.update(tsec, bt, ror)
+        plot = self.ids.get("plot")
+        if plot is not None:
+            plot.upsert_deviation(tsec, dev.dbt)
+
+        def eta(t):
+            return self._mmss(t) if t is not None else "--:--"
+
+        self.profile_text = (
+            f"{self.profile_track.profile.name}   "
+            f"ΔBT {dev.dbt:+.1f}°C   ΔRoR {dev.dror:+.1f}   "
+            f"DRY {eta(dev.dry_eta)}   FC {eta(dev.fc_eta)}   DROP {eta(dev.drop_eta)}"
+        ).replace(".", ",")
 
     # ---------- main poll ----------
     def poll(self, _dt):
-        vals, err = self.client.read_holding_n(self.START_REG, self.QTY)
-        if vals is None:
-            self.last_read = f"Read fail: {err}"
+        """Kivy clock: drain samples published by the acquisition worker."""
+        for ev in self.link.events():
+            self._on_link_event(ev)
+
+        samples = self.acq.drain()
+        if not samples:
             return
 
-        # --- unpack ---
-        setv_raw = int(vals[0])            # HR100 x10
-        bt_raw = int(vals[4])              # HR104
-        tsec = int(vals[5])                # HR105
-        profile = int(vals[6])             # HR106
-        drysec = int(vals[7])              # HR107
-        millsec = int(vals[8])             # HR108
-        devsec = int(vals[9])              # HR109
-        ror_raw = int(vals[10])            # HR110 x10
-
-        setv = setv_raw / 10.0
-        ror = ror_raw / 10.0
-
-        # BT format (senin eski mantığın)
-        bt = bt_raw / 10.0 if bt_raw > 300 else float(bt_raw)
+        for s in samples:
+            if s.values is None:
+                self.last_read = f"Read fail: {s.err}"
+            else:
+                # segment sınırı burada belirlenir, örnek yeni segmente yazılır
+                self._apply_sample(s.regs, s.ts)
+            self.recorder.append(s)
+
+        st = self.acq.stats()
+        self.rate_text = (
+            f"{st['rate_hz']:.2f}/{st['target_hz']:.2f} Hz "
+            f"jitter={st['jitter_ms']:.0f} ms err={st['errors']}"
+            + (f" backoff x{st['backoff']:.0f}" if st["backoff"] > 1 else "")
+        )
+
+    def _on_link_event(self, ev):
+        self.link_state = ev.state
+        self.link_text = {"connecting": "LINK …", "connected": "LINK OK",
+                          "degraded": "LINK DEGRADED", "down": "LINK DOWN"}[ev.state]
+        self.last_read = f"link {ev.state}: {ev.detail}"
+
+    def _apply_sample(self, regs, ts):
+        # --- unpack (ölçekler register map'te) ---
+        setv = regs["set"]
+        tsec = int(regs["time"])
+        profile = int(regs["profile"])
+        drysec = int(regs["dry_s"])
+        millsec = int(regs["maillard_s"])
+        devsec = int(regs["dev_s"])
+        ror = regs["ror"]
+
+        self._airflow_pa = regs.get("airflow", self._airflow_pa)
+        self._burner_pct = regs.get("burner", self._burner_pct)
+        self._drum_hz = regs.get("drum", self._drum_hz)
+
+        # float BT varsa doğrudan; yoksa HR104 (>300 x10; <=300 belirsiz -> önceki BT'ye yakın olan)
+        bt = regs.get("bt_c")
+        if bt is None:
+            bt = decode_bt(regs["bt"], self.last_bt)
+        self.last_bt = bt
         env = bt + 4.6
 
+        # host RoR: okuma zamanlarıyla (düzensiz aralıklar), pencere içinde O(1)
+        self.host_ror = self.ror_calc.update(ts, bt)
+
         # --- KV bindings ---
         self.profile_state = 1 if profile == 1 else 0
         self.roasttime_text = self._mmss(tsec)
@@ -287,8 +511,12 @@ class LiveRoastScreen(Screen):
         self.bean_text = self._fmt_tr_temp(bt)
         self.env_text = self._fmt_tr_temp(env)
 
-        self.ror_text = f"{self._fmt_tr_num(ror)} °C/sn"
+        if self.ror_mode == "controller" or self.host_ror is None:
+            self.ror_text = f"{self._fmt_tr_num(ror)} °C/dk"
+        else:
+            self.ror_text = f"{self._fmt_tr_num(self.host_ror)} °C/dk"
 
+        self.speed_text = f"{self._fmt_tr_num(self._drum_hz)} Hz"
         self.airflow_text = f"{self._airflow_pa} Pa"
         self.airflow_subtext = "normal airflow"
         self.airflow_ratio = max(0.0, min(1.0, self._airflow_pa / 300.0))
@@ -296,24 +524,43 @@ class LiveRoastScreen(Screen):
         self.burner_text = f"{self._burner_pct}%"
         self.burner_ratio = max(0.0, min(1.0, self._burner_pct / 100.0))
 
+        rewind = self.last_t is not None and tsec < self.last_t
+
+        # --- roast log: profil başladı / bitti / zaman geri sardı ---
+        if profile == 1 and (rewind or not self.recorder.active):
+            if self.recorder.active:
+                self._add_event(self.event_detector.stop())
+            path = self.recorder.begin_segment()
+            self.event_detector.reset()
+            # liste referansı: segment kapanınca writer thread o anki olayları yazar
+            name = self.profile_track.profile.name if self.profile_track is not None else None
+            self._segment_meta[path] = (name, self.event_detector.events)
+        elif profile != 1 and self.recorder.active:
+            self._add_event(self.event_detector.stop())
+            self.recorder.end_segment()
+
         # --- plot reset (zaman geri sardıysa) ---
-        if self.last_t is not None and tsec < self.last_t:
+        if rewind:
             self._reset_series()
+            self.ror_calc.reset()
 
         self.last_t = tsec
 
         # --- upsert point (BT/SET/ROR aynı hızda) ---
         self._upsert_point(tsec=tsec, bt=bt, setv=setv, ror=ror)
+        if self.host_ror is not None:
+            plot = self.ids.get("plot")
+            if plot is not None:
+                plot.upsert_host_ror(tsec, self.host_ror)
 
-        # --- push to plot widget ---
-        try:
-            plot = self.ids.plot
-            plot.x_series = self.xs[:]       # time
-            plot.bt_series = self.bts[:]      # BT
-            plot.set_series = self.sets[:]    # SET
-            plot.ror_series = self.rors[:]    # ROR
-        except Exception:
-            pass
+        # --- olaylar (sadece kavurma sürerken) ---
+        if self.recorder.active:
+            self._add_event(self.event_detector.update(tsec, bt, self.host_ror))
+
+        # --- profil sapması (O(1): önceden örneklenmiş hedef) ---
+        # ΔRoR host RorCalculator değeriyle, HR110 register'ıyla değil
+        if self.profile_track is not None and self.host_ror is not None:
+            self._update_deviation(tsec, bt, self.host_ror)
 
         self.last_read = (
             f"HR100={setv:.1f} "
@@ -322,9 +569,3 @@ class LiveRoastScreen(Screen):
             f"HR106={profile} "
             f"ROR={ror:.1f}"
         ).replace(".", ",")
-
-
-
-
-
-
@@ -0,0 +1,75 @@
+from kivy.metrics import dp
+from kivy.uix.popup import Popup
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.textinput import TextInput
+
+
+class ProfilePopup(Popup):
+    """
+    Profile tab: pick the target profile for the live roast (or none),
+    or save the roast currently overlaid as reference as a new profile.
+
+    on_select(name | None), on_save(name) -> error text or None.
+    """
+
+    def __init__(self, store, current=None, on_select=None, on_save=None, **kw):
+        self.store = store
+        self.on_select = on_select
+        self.on_save = on_save
+
+        root = BoxLayout(orientation="vertical", spacing=dp(10), padding=dp(12))
+
+        grid = GridLayout(cols=1, spacing=dp(8), size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+        for name in [None] + store.names():
+            text = name if name is not None else "— Profil yok —"
+            btn = Button(text=text, size_hint_y=None, height=dp(48), font_size="18sp",
+                         bold=(name == current))
+            btn.bind(on_press=lambda _b, n=name: self._select(n))
+            grid.add_widget(btn)
+        scroll = ScrollView()
+        scroll.add_widget(grid)
+
+        save_row = BoxLayout(orientation="horizontal", spacing=dp(12),
+                             size_hint_y=None, height=dp(44))
+        self.name_input = TextInput(hint_text="Yeni profil adı (referans kavurmadan)",
+                                    multiline=False, font_size="18sp")
+        btn_save = Button(text="KAYDET", size_hint_x=None, width=dp(120),
+                          disabled=on_save is None)
+        save_row.add_widget(self.name_input)
+        save_row.add_widget(btn_save)
+
+        self.status = Label(text="", size_hint_y=None, height=dp(24), font_size="16sp")
+        btn_close = Button(text="KAPAT", size_hint_y=None, height=dp(48))
+
+        root.add_widget(scroll)
+        root.add_widget(save_row)
+        root.add_widget(self.status)
+        root.add_widget(btn_close)
+
+        kw.setdefault("title", "PROFILE")
+        kw.setdefault("size_hint", (0.6, 0.85))
+        super().__init__(content=root, **kw)
+
+        btn_save.bind(on_press=lambda *_: self._save())
+        btn_close.bind(on_press=lambda *_: self.dismiss())
+
+    def _select(self, name):
+        self.dismiss()
+        if self.on_select is not None:
+            self.on_select(name)
+
+    def _save(self):
+        name = self.name_input.text.strip()
+        if not name:
+            self.status.text = "Profil adı gerekli"
+            return
+        err = self.on_save(name)
+        if err:
+            self.status.text = err
+            return
+        self._select(name)
@@ -0,0 +1,531 @@
+import math
+import time
+import threading
+from collections import deque, namedtuple
+
+from services import metrics
+from services.modbus_frames import MAX_RW_WRITE_QTY
+from services.register_map import ReadPlan
+
+
+# ts: wall clock (time.time) at read completion
+# values: u16 words of the stream's start_reg/qty span (roast log record)
+# regs: {name: value} decoded from the register map (registers read this poll)
+Sample = namedtuple("Sample", "ts values err regs", defaults=(None,))
+
+MIN_RATE_HZ = 0.1
+MAX_RATE_HZ = 10.0
+
+# ardışık bu kadar "short read"/"crc error" sonrası interval ikiye katlanır
+BACKOFF_AFTER = 3
+MAX_BACKOFF_S = 5.0
+BACKOFF_ERRORS = ("short read", "crc error")
+
+# çalışan BusManager'lar scrape anında doldurur (BusManager._collect)
+POLL_RATE = metrics.registry.gauge("poll_rate_hz", "Achieved poll rate", ("slave",))
+POLL_TARGET = metrics.registry.gauge("poll_target_hz", "Configured poll rate", ("slave",))
+POLL_JITTER = metrics.registry.gauge("poll_jitter_seconds", "Std dev of the poll interval", ("slave",))
+POLL_BACKOFF = metrics.registry.gauge("poll_backoff", "Error backoff interval multiplier", ("slave",))
+QUEUE_DEPTH = metrics.registry.gauge(
+    "queue_depth", "Items waiting: undrained samples / callbacks, pending writes, bus jobs",
+    ("slave", "queue"))
+
+
+def bus_rate_limit(baud, qty, turnaround=0.005):
+    """
+    Upper bound for FC03 block reads per second on an RTU line.
+    11 bits/char (start + 8 data + stop + parity slot), 8-byte request,
+    5 + 2*qty byte response, a 3.5-char gap after each frame and the
+    slave turnaround time.
+    """
+    char_t = 11.0 / float(baud)
+    frame_chars = 8 + (5 + 2 * qty) + 2 * 3.5
+    return 1.0 / (frame_chars * char_t + turnaround)
+
+
+# ---------------- RATE STATS ----------------
+class RateStats:
+    """Achieved rate and jitter over the last `window` read intervals."""
+
+    def __init__(self, window=50):
+        self._iv = deque(maxlen=window)
+        self._last = None
+        self.ok = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+
+    def mark(self, t, ok):
+        if self._last is not None:
+            self._iv.append(t - self._last)
+        self._last = t
+        if ok:
+            self.ok += 1
+            self.consecutive_errors = 0
+        else:
+            self.errors += 1
+            self.consecutive_errors += 1
+
+    def snapshot(self):
+        n = len(self._iv)
+        if n == 0:
+            return {"rate_hz": 0.0, "jitter_ms": 0.0, "ok": self.ok, "errors": self.errors}
+        mean = sum(self._iv) / n
+        var = sum((x - mean) ** 2 for x in self._iv) / n
+        return {
+            "rate_hz": 1.0 / mean if mean > 0 else 0.0,
+            "jitter_ms": math.sqrt(var) * 1000.0,
+            "ok": self.ok,
+            "errors": self.errors,
+        }
+
+
+# ---------------- POLL SCHEDULE ----------------
+class PollSchedule:
+    """Target interval, error backoff and achieved-rate stats for one polled block."""
+
+    def __init__(self, rate_hz, baud, qty):
+        self.baud = baud
+        self.qty = qty
+        self.interval = 1.0
+        self.backoff = 1.0          # interval çarpanı
+        self._stats = RateStats()
+        self._lock = threading.Lock()
+        self.set_rate(rate_hz)
+
+    def set_rate(self, rate_hz):
+        limit = MAX_RATE_HZ
+        if self.baud:
+            limit = min(limit, bus_rate_limit(self.baud, self.qty))
+        rate_hz = max(MIN_RATE_HZ, min(limit, float(rate_hz)))
+        self.interval = 1.0 / rate_hz
+        return rate_hz
+
+    def effective_interval(self):
+        # backoff interval'i en fazla MAX_BACKOFF_S'ye kadar uzatır (hedef zaten daha yavaşsa dokunmaz)
+        return min(max(self.interval, MAX_BACKOFF_S), self.interval * self.backoff)
+
+    def account(self, err):
+        with self._lock:
+            self._stats.mark(time.monotonic(), err is None)
+            streak = self._stats.consecutive_errors
+
+        if err is None:
+            self.backoff = 1.0
+        elif streak >= BACKOFF_AFTER and str(err).startswith(BACKOFF_ERRORS):
+            if self.interval * self.backoff < MAX_BACKOFF_S:
+                self.backoff *= 2.0
+
+    def stats(self):
+        """Thread-safe snapshot: rate_hz, jitter_ms, ok, errors, target_hz, backoff."""
+        with self._lock:
+            snap = self._stats.snapshot()
+        snap["target_hz"] = 1.0 / self.interval
+        snap["backoff"] = self.backoff
+        return snap
+
+
+# ---------------- SLAVE VIEW ----------------
+class SlaveClient:
+    """ModbusClient facade pinned to one slave id (what jobs receive as `client`)."""
+
+    def __init__(self, client, slave):
+        self._client = client
+        self.slave = slave
+
+    def read_holding_n(self, start_reg, qty):
+        return self._client.read_holding_n(start_reg, qty, slave=self.slave)
+
+    def write_single_register(self, reg, value):
+        return self._client.write_single_register(reg, value, slave=self.slave)
+
+    def write_multiple_registers(self, start_reg, values):
+        return self._client.write_multiple_registers(start_reg, values, slave=self.slave)
+
+    def read_write_multiple(self, read_start, read_qty, write_start, values):
+        return self._client.read_write_multiple(read_start, read_qty, write_start, values,
+                                                slave=self.slave)
+
+
+# ---------------- DEVICE STREAM ----------------
+class DeviceStream:
+    """
+    Per-slave view of a BusManager.
+    UI side API: drain() / submit() / write() / pause() / resume() / set_rate() / stats().
+    """
+
+    def __init__(self, bus, slave, start_reg, qty, rate_hz, maxlen=512, registers=(),
+                 word_order="big"):
+        self.bus = bus
+        self.slave = slave
+        self.start_reg = start_reg
+        self.qty = qty
+        self.client = SlaveClient(bus.client, slave)
+        # start_reg/qty her poll'da okunur; register map'in geri kalanı aynı blok(lar)a katılır
+        self.plan = ReadPlan(registers, span=(start_reg, qty), word_order=word_order)
+        self.schedule = PollSchedule(rate_hz, getattr(bus.client, "baud", None),
+                                     sum(b.qty for b in self.plan.fast.blocks))
+
+        self.paused = False
+        self.next_t = 0.0               # monotonic, bus thread tarafından yönetilir
+        self.fc23 = True                # cihaz FC23 bilmiyorsa (exception 0x01) FC06/FC16 + FC03
+
+        # reg -> (value, [callback]); UI thread ekler, bus thread topluca alır
+        self._writes = {}
+        self._wlock = threading.Lock()
+
+        # deque.append / popleft are atomic -> no extra lock needed
+        self._samples = deque(maxlen=maxlen)
+        self._done = deque()
+
+    # ---------- control ----------
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self.bus.wake()
+
+    def set_rate(self, rate_hz):
+        hz = self.schedule.set_rate(rate_hz)
+        self.bus.wake()
+        return hz
+
+    def stats(self):
+        return self.schedule.stats()
+
+    # ---------- consumer side (UI thread) ----------
+    def submit(self, fn, callback=None):
+        """
+        Run fn(client) on the bus thread ahead of any pending routine read;
+        `client` is pinned to this stream's slave id.
+        callback(result) is called from drain(), i.e. on the UI thread.
+        If fn raises, the exception object is passed as result.
+        """
+        self.bus._submit(self, fn, callback)
+
+    def write(self, reg, values, callback=None):
+        """
+        Queue a write of one value, or a list to consecutive registers from
+        `reg`. Pending writes to the same register are merged (the last value
+        wins; every callback gets the result of the write that went out).
+        The writes ride on the stream's next poll, brought forward to now:
+        one FC23 round trip writes and reads the first block back.
+        callback((ok, err)) is called from drain().
+        """
+        if not hasattr(values, "__len__"):
+            values = [values]
+        with self._wlock:
+            for i, v in enumerate(values):
+                old = self._writes.get(reg + i)
+                self._writes[reg + i] = (int(v) & 0xFFFF, old[1] if old is not None else [])
+            if callback is not None:
+                self._writes[reg][1].append(callback)
+        self.bus.wake()
+
+    def _take_writes(self):
+        """Bus thread: pending writes as runs of consecutive registers [(start, values, callbacks)]."""
+        with self._wlock:
+            pending, self._writes = self._writes, {}
+        runs = []
+        for reg in sorted(pending):
+            v, callbacks = pending[reg]
+            if runs and runs[-1][0] + len(runs[-1][1]) == reg and len(runs[-1][1]) < MAX_RW_WRITE_QTY:
+                runs[-1][1].append(v)
+                runs[-1][2].extend(callbacks)
+            else:
+                runs.append((reg, [v], list(callbacks)))
+        return runs
+
+    def _finish(self, callbacks, result):
+        for callback in callbacks:
+            self._done.append((callback, result))
+
+    def drain(self):
+        """Deliver finished job callbacks and return all pending samples (oldest first)."""
+        while self._done:
+            callback, result = self._done.popleft()
+            callback(result)
+
+        out = []
+        while self._samples:
+            out.append(self._samples.popleft())
+        return out
+
+
+# ---------------- BUS MANAGER ----------------
+class BusManager:
+    """
+    One port (serial line or gateway connection), many slaves, one thread.
+
+    - queued jobs always run before the next routine read
+    - queued register writes (DeviceStream.write) make their device due now and
+      go out with its poll read as one FC23 transaction
+    - routine reads: earliest-deadline-first over the devices' poll schedules,
+      so equal-rate devices are served round-robin; on pipelined transports
+      (Modbus TCP) every due device goes out in one batch
+    - only the bus thread touches the client -> ModbusClient.lock is never contended
+    - with a services.link.LinkSupervisor every transaction outcome is reported
+      to it; while the link is down reads fail at once ("link down")
+    - an exception in a poll does not stop the thread: its devices get an
+      error Sample ("bus error: ..."), pending write callbacks (False, err)
+    """
+
+    def __init__(self, client, link=None):
+        self.client = client
+        self.link = link
+        self._devices = []          # copy-on-write, bus thread sadece okur
+        self._jobs = deque()
+        self._inflight = ((), ())   # (cihazlar, [(cihaz, yazma run'ı)]) o anki poll, _fail için
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_device(self, slave, start_reg, qty, rate_hz=1.0, maxlen=512, registers=(),
+                   word_order="big"):
+        stream = DeviceStream(self, slave, start_reg, qty, rate_hz, maxlen, registers, word_order)
+        stream.next_t = time.monotonic()
+        self._devices = self._devices + [stream]
+        self.wake()
+        return stream
+
+    def remove_device(self, stream):
+        self._devices = [d for d in self._devices if d is not stream]
+
+    def streams(self):
+        return {d.slave: d for d in self._devices}
+
+    def stats(self):
+        return {d.slave: d.stats() for d in self._devices}
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="modbus-bus", daemon=True)
+        self._thread.start()
+        metrics.registry.add_collector(self._collect)
+
+    def stop(self, timeout=3.0):
+        metrics.registry.remove_collector(self._collect)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _collect(self):
+        # scrape anı (metrics thread'i): sadece okunur, sayılar anlık
+        QUEUE_DEPTH.set(len(self._jobs), "*", "jobs")
+        for d in self._devices:
+            st = d.stats()
+            POLL_RATE.set(st["rate_hz"], d.slave)
+            POLL_TARGET.set(st["target_hz"], d.slave)
+            POLL_JITTER.set(st["jitter_ms"] / 1000.0, d.slave)
+            POLL_BACKOFF.set(st["backoff"], d.slave)
+            QUEUE_DEPTH.set(len(d._samples), d.slave, "samples")
+            QUEUE_DEPTH.set(len(d._done), d.slave, "callbacks")
+            QUEUE_DEPTH.set(len(d._writes), d.slave, "writes")
+
+    def wake(self):
+        self._wake.set()
+
+    def _submit(self, stream, fn, callback):
+        self._jobs.append((stream, fn, callback))
+        self._wake.set()
+
+    # ---------- bus thread ----------
+    def _run(self):
+        while not self._stop.is_set():
+            self._inflight = ((), ())
+            try:
+                self._step()
+            except Exception as e:
+                # transport / codec hatası thread'i öldürmesin: örnek hatası olarak yayınla
+                self._fail(e)
+
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+    def _step(self):
+        self._run_jobs()
+
+        now = time.monotonic()
+        due = []
+        wait = None
+        for d in self._devices:
+            if d._writes:
+                due = [d]
+                break
+            if d.paused:
+                continue
+            if d.next_t <= now:
+                due.append(d)
+            else:
+                w = d.next_t - now
+                wait = w if wait is None else min(wait, w)
+
+        if not due:
+            self._sleep(wait)
+            return
+
+        if due[0]._writes:
+            self._write_poll(due[0], now)
+            return
+
+        due.sort(key=lambda d: d.next_t)
+        if not self.client.pipelined:
+            due = due[:1]
+        self._inflight = (due, ())
+        passes = [d.plan.next_pass() for d in due]
+        reads = [(b.start, b.qty, d.slave) for d, p in zip(due, passes) for b in p.blocks]
+        if len(reads) > 1:
+            # Modbus TCP: vadesi gelen tüm cihazların blokları üst üste; seri hatta sırayla
+            results = self.client.read_holding_batch(reads, raw=True)
+        else:
+            start, qty, slave = reads[0]
+            results = [self.client.read_holding_n(start, qty, slave=slave, raw=True)]
+
+        k = 0
+        for d, p in zip(due, passes):
+            n = len(p.blocks)
+            self._publish(d, p, results[k:k + n], now)
+            k += n
+
+    def _fail(self, exc):
+        """Bus thread: a poll raised -> error sample for its devices, unfinished write callbacks fail."""
+        err = f"bus error: {type(exc).__name__}: {exc}"
+        due, runs = self._inflight
+        for d, (_start, _values, callbacks) in runs:
+            d._finish(callbacks, (False, err))
+        now = time.monotonic()
+        for d in due:
+            d._samples.append(Sample(time.time(), None, err, {}))
+            d.schedule.account(err)
+            d.next_t = now + d.schedule.effective_interval()
+        if not due:
+            self._sleep(0.1)        # cihaz dışı hata: dönüp durmasın
+
+    def _publish(self, d, p, results, now, realign=False):
+        datas = []
+        regs = {}
+        err = None
+        for b, (data, e) in zip(p.blocks, results):
+            self._report(e)
+            datas.append(data)
+            if data is None:
+                err = err or e
+            elif b.codec is not None:
+                regs.update(d.plan.decode(b, data))
+        values = d.plan.values(p, datas)
+        d._samples.append(Sample(time.time(), values, err if values is None else None, regs))
+        d.schedule.account(err)
+
+        step = d.schedule.effective_interval()
+        d.next_t += step
+        if realign or d.next_t < now:
+            # geride kaldıysak (timeout vb.) yakalamaya çalışma, yeniden hizala
+            d.next_t = now + step
+
+    def _write_poll(self, d, now):
+        """Pending writes of `d` + its poll: FC23 (write, then read the first block) when supported."""
+        client = self.client
+        runs = d._take_writes()
+        self._inflight = ([d], [(d, run) for run in runs])
+        p = d.plan.next_pass()
+        first = p.blocks[0]
+        results = []
+
+        def write(run):
+            start, values, callbacks = run
+            if len(values) == 1:
+                result = client.write_single_register(start, values[0], slave=d.slave)
+            else:
+                result = client.write_multiple_registers(start, values, slave=d.slave)
+            self._report(result[1])
+            d._finish(callbacks, result)
+            callbacks.clear()           # _fail tekrar çağırmasın
+
+        # bitişik olmayan register'lar: önce diğerleri, FC23 en son -> okuma hepsini görür
+        for run in runs[:-1]:
+            write(run)
+        if d.fc23:
+            start, values, callbacks = runs[-1]
+            data, err = client.read_write_multiple(first.start, first.qty, start, values,
+                                                   slave=d.slave, raw=True)
+            if err == "exception 0x01":
+                d.fc23 = False          # illegal function: bu cihazda FC23 yok
+            else:
+                d._finish(callbacks, (err is None, err))
+                callbacks.clear()
+                results.append((data, err))
+        if not results:
+            write(runs[-1])
+
+        rest = [(b.start, b.qty, d.slave) for b in p.blocks[len(results):]]
+        if rest:
+            results += client.read_holding_batch(rest, raw=True)
+        self._publish(d, p, results, now, realign=True)
+
+    def _report(self, err):
+        if self.link is not None:
+            self.link.report(err)
+
+    def _sleep(self, timeout):
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+    def _run_jobs(self):
+        while self._jobs:
+            stream, fn, callback = self._jobs.popleft()
+            try:
+                result = fn(stream.client)
+            except Exception as e:
+                result = e
+            if callback is not None:
+                stream._done.append((callback, result))
+
+
+# ---------------- SINGLE DEVICE ----------------
+class AcquisitionWorker:
+    """
+    One port, one slave: a BusManager with a single DeviceStream.
+    Same drain()/submit() contract as DeviceStream.
+    """
+
+    def __init__(self, client, start_reg, qty, rate_hz=1.0, maxlen=512, registers=(),
+                 word_order="big", link=None):
+        self.client = client
+        self.bus = BusManager(client, link)
+        self.stream = self.bus.add_device(client.slave, start_reg, qty, rate_hz, maxlen,
+                                          registers, word_order)
+
+    def start(self):
+        self.bus.start()
+
+    def stop(self, timeout=3.0):
+        self.bus.stop(timeout)
+
+    def pause(self):
+        self.stream.pause()
+
+    def resume(self):
+        self.stream.resume()
+
+    def set_rate(self, rate_hz):
+        return self.stream.set_rate(rate_hz)
+
+    def stats(self):
+        return self.stream.stats()
+
+    def submit(self, fn, callback=None):
+        self.stream.submit(fn, callback)
+
+    def write(self, reg, values, callback=None):
+        self.stream.write(reg, values, callback)
+
+    def drain(self):
+        return self.stream.drain()
@@ -0,0 +1,132 @@
+"""
+Streaming roast event detector: charge, turning point, dry end, first
+crack, drop. update() keeps a handful of scalars, O(1) per sample.
+
+  charge       BT falls CHARGE_DROP_C below its running peak within the
+               first CHARGE_WINDOW_S (cold beans into the hot drum);
+               the event is placed at the peak
+  tp           BT has risen TP_RISE_C above its post-charge minimum with
+               RoR > 0 for TP_CONFIRM samples; placed at the minimum
+  dry_end      BT crosses dry_end_c upwards after TP
+  first_crack  above fc_min_c the RoR dips (slope < -FC_DIP) and turns back
+               up: the RoR inflection at crack onset. Confirmed at the
+               upturn, placed where the dip began. BT reaching fc_max_c
+               counts as crack if no dip was seen
+  drop         after dry end, BT falls DROP_FALL_C below its running peak
+               (beans leave the drum, the probe cools); placed at the peak.
+               stop() when the profile ends without it
+
+t is roast time (HR105 s), ror °C/min (host RoR preferred, smoother).
+"""
+
+from collections import namedtuple
+
+
+Event = namedtuple("Event", "kind t bt")
+
+KINDS = ("charge", "tp", "dry_end", "first_crack", "drop")
+LABELS = {"charge": "CHARGE", "tp": "TP", "dry_end": "DRY", "first_crack": "FC", "drop": "DROP"}
+
+
+class EventDetector:
+    CHARGE_DROP_C = 5.0
+    CHARGE_WINDOW_S = 60.0
+    TP_RISE_C = 1.0
+    TP_CONFIRM = 3
+    FC_DIP = 4.0            # °C/min/min
+    FC_SMOOTH = 0.3         # RoR eğimi için EMA katsayısı
+    DROP_FALL_C = 5.0
+
+    def __init__(self, dry_end_c=150.0, fc_min_c=185.0, fc_max_c=200.0):
+        self.dry_end_c = dry_end_c
+        self.fc_min_c = fc_min_c
+        self.fc_max_c = fc_max_c
+        self.reset()
+
+    def reset(self):
+        self.events = []
+        self.stage = "charge"           # beklenen sıradaki olay
+        self._t0 = None
+        self._peak = None               # (t, bt)
+        self._min = None                # (t, bt)
+        self._tp_ok = 0
+        self._last = None               # (t, bt, ror) son örnek
+        self._sec = None                # (t, ror) saniyenin ilk örneği: eğim saniyeden saniyeye
+        self._slope = 0.0               # yumuşatılmış d(RoR)/dt
+        self._dip = None                # (t, bt) RoR düşüşünün başladığı an
+
+    def _emit(self, kind, t, bt, next_stage):
+        ev = Event(kind, t, bt)
+        self.events.append(ev)
+        self.stage = next_stage
+        return ev
+
+    def update(self, t, bt, ror):
+        """Feed one sample; returns the event it completed, or None."""
+        ev = None
+        if self._t0 is None:
+            self._t0 = t
+        sec = self._sec
+        if ror is not None and (sec is None or t > sec[0]):
+            if sec is not None:
+                inst = (ror - sec[1]) / (t - sec[0]) * 60.0
+                self._slope += self.FC_SMOOTH * (inst - self._slope)
+            self._sec = (t, ror)
+        self._last = (t, bt, ror)
+
+        stage = self.stage
+        if stage == "charge":
+            if self._peak is None or bt >= self._peak[1]:
+                self._peak = (t, bt)
+            if bt <= self._peak[1] - self.CHARGE_DROP_C:
+                ev = self._emit("charge", *self._peak, "tp")
+                self._min = (t, bt)
+            elif t - self._t0 > self.CHARGE_WINDOW_S:
+                # düşüş görülmedi (ör. roast ortasında açıldı): ilk örnek charge sayılır
+                ev = self._emit("charge", self._t0, self._peak[1], "tp")
+                self._min = (t, bt)
+
+        elif stage == "tp":
+            if bt < self._min[1]:
+                self._min = (t, bt)
+                self._tp_ok = 0
+            elif bt >= self._min[1] + self.TP_RISE_C and (ror is None or ror > 0):
+                self._tp_ok += 1
+                if self._tp_ok >= self.TP_CONFIRM:
+                    ev = self._emit("tp", *self._min, "dry_end")
+
+        elif stage == "dry_end":
+            if bt >= self.dry_end_c:
+                ev = self._emit("dry_end", t, bt, "first_crack")
+                self._peak = (t, bt)
+
+        elif stage == "first_crack":
+            if self._drop(t, bt):
+                ev = self._emit("drop", *self._peak, "done")
+            elif bt >= self.fc_min_c:
+                if self._slope < -self.FC_DIP:
+                    if self._dip is None:
+                        self._dip = (t, bt)
+                elif self._dip is not None and self._slope > 0:
+                    ev = self._emit("first_crack", *self._dip, "drop")
+                if ev is None and bt >= self.fc_max_c:
+                    ev = self._emit("first_crack", t, bt, "drop")
+
+        elif stage == "drop":
+            if self._drop(t, bt):
+                ev = self._emit("drop", *self._peak, "done")
+
+        return ev
+
+    def _drop(self, t, bt):
+        if bt >= self._peak[1]:
+            self._peak = (t, bt)
+            return False
+        return bt <= self._peak[1] - self.DROP_FALL_C
+
+    def stop(self):
+        """Profile stopped (HR106 -> 0): drop at the last sample if not seen yet."""
+        if self._last is None or self.stage in ("charge", "done"):
+            return None
+        t, bt, _ror = self._last
+        return self._emit("drop", t, bt, "done")
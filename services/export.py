@@ -0,0 +1,270 @@
+"""
+Roast log export to .xlsx (openpyxl write-only) or CSV.
+
+    python -m services.export --format xlsx --out month.xlsx roast_logs/*.rlog
+    python -m services.export --format csv --out exports/ - < paths.txt
+
+xlsx: one workbook, one sheet per roast. csv: one file per roast in --out.
+Rows are streamed from the roast logs (iter_segment) straight into the
+writer, so memory use does not grow with the number of roasts. By default
+there is one row per roast second (the last read of that second, as on the
+plot); --all-samples keeps every poll and failed reads.
+
+A segment that cannot be read (missing file, bad header) is left out, one
+that fails part way keeps the rows before the error; both are reported
+as skipped instead of aborting the export.
+
+Progress goes to stdout, one line each:
+    progress <samples done> <samples total>
+    file <written path>
+    skipped <roast log path>
+    done <out>
+
+From the UI use ExportJob, which runs this module in a separate process
+(a multiprocessing spawn child would re-import main.py and open a window).
+"""
+
+import os
+import csv
+import sys
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+
+from services.register_map import decode_log_row
+from services.roast_log import iter_segment, read_header, segment_rows
+from services.ror import decode_bt
+
+
+HEADER = ("time_s", "timestamp", "set_c", "bt_c", "ror", "dry_s", "maillard_s", "dev_s", "error")
+PROGRESS_EVERY = 4096       # örnek
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rows(path, all_samples, count, failed):
+    """
+    Export rows of one roast; count(n) is called as input samples are
+    consumed. A read error ends the roast at its last good record and
+    calls failed(path).
+    """
+    pending = None
+    bt = None
+    n = 0
+    samples = iter_segment(path)
+    while True:
+        try:
+            s = next(samples)
+        except StopIteration:
+            break
+        except (OSError, ValueError):
+            failed(path)
+            break
+        n += 1
+        if n == PROGRESS_EVERY:
+            count(n)
+            n = 0
+
+        ts = datetime.fromtimestamp(s.ts)
+        if s.values is None:
+            if all_samples:
+                yield (None, ts, None, None, None, None, None, None, s.err)
+            continue
+
+        v = decode_log_row(s.values)
+        bt = decode_bt(v["bt"], bt)
+        row = (
+            int(v["time"]), ts,
+            v["set"],
+            bt,
+            v["ror"],
+            int(v["dry_s"]), int(v["maillard_s"]), int(v["dev_s"]),
+            None,
+        )
+        if all_samples:
+            yield row
+            continue
+        if pending is not None and pending[0] != row[0]:
+            yield pending
+        pending = row
+
+    if pending is not None:
+        yield pending
+    count(n)
+
+
+def _name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def export(paths, out, fmt="xlsx", all_samples=False, progress=None):
+    """
+    Export roast log segments (chronological order is kept).
+    progress(event, *args): ("progress", done, total) / ("file", path) /
+    ("skipped", path). Returns `out`.
+    """
+    total = 0
+    for p in paths:
+        try:
+            total += segment_rows(p)
+        except (OSError, ValueError):
+            pass
+
+    state = {"done": 0}
+
+    def count(n):
+        state["done"] += n
+        if progress is not None:
+            progress("progress", state["done"], total)
+
+    def failed(path):
+        if progress is not None:
+            progress("skipped", path)
+
+    def readable(path):
+        try:
+            read_header(path)
+            return True
+        except (OSError, ValueError):
+            failed(path)
+            return False
+
+    if fmt == "csv":
+        os.makedirs(out, exist_ok=True)
+        for p in paths:
+            if not readable(p):
+                continue
+            dst = os.path.join(out, _name(p) + ".csv")
+            with open(dst, "w", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(HEADER)
+                w.writerows(_rows(p, all_samples, count, failed))
+            if progress is not None:
+                progress("file", dst)
+        return out
+
+    if fmt != "xlsx":
+        raise ValueError(f"unknown format: {fmt}")
+
+    from openpyxl import Workbook     # sadece xlsx için gerekli
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    wb = Workbook(write_only=True)
+    titles = set()
+    for p in paths:
+        if not readable(p):
+            continue
+        # sheet adı en fazla 31 karakter ve tekil olmalı
+        title = base = _name(p)[:28]
+        k = 2
+        while title in titles:
+            title = f"{base}_{k}"
+            k += 1
+        titles.add(title)
+
+        ws = wb.create_sheet(title=title)
+        ws.append(HEADER)
+        for row in _rows(p, all_samples, count, failed):
+            ws.append(row)
+    wb.save(out)
+    if progress is not None:
+        progress("file", out)
+    return out
+
+
+# ---------------- UI SIDE ----------------
+class ExportJob:
+    """
+    Runs an export in a child process. Poll `fraction`, `running`,
+    `result` (output path when finished), `skipped` (roast logs that could
+    not be read completely) and `error` from the UI clock; cancel()
+    terminates the child.
+    """
+
+    def __init__(self, paths, out, fmt="xlsx", all_samples=False):
+        self.paths = list(paths)
+        self.out = out
+        self.fmt = fmt
+        self.all_samples = all_samples
+
+        self.fraction = 0.0
+        self.result = None
+        self.skipped = []
+        self.error = None
+        self.proc = None
+        self._output = []
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        cmd = [sys.executable, "-m", "services.export", "--format", self.fmt, "--out", self.out]
+        if self.all_samples:
+            cmd.append("--all-samples")
+        cmd.append("-")
+        self.proc = subprocess.Popen(
+            cmd, cwd=_ROOT, text=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self._thread = threading.Thread(target=self._run, name="export", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+
+    def _run(self):
+        proc = self.proc
+        try:
+            proc.stdin.write("".join(p + "\n" for p in self.paths))
+            proc.stdin.close()
+        except OSError:
+            pass
+
+        for line in proc.stdout:
+            kind, _, rest = line.rstrip("\n").partition(" ")
+            if kind == "progress":
+                done, total = (int(x) for x in rest.split())
+                self.fraction = done / total if total else 1.0
+            elif kind == "skipped":
+                self.skipped.append(rest)
+            elif kind == "done":
+                self.result = rest
+            elif kind != "file":
+                self._output.append(line.rstrip("\n"))
+
+        if proc.wait() != 0 and self.result is None:
+            self.error = self._output[-1] if self._output else f"exit code {proc.returncode}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export roast logs to xlsx / csv")
+    ap.add_argument("paths", nargs="+", help="roast log files, or - to read paths from stdin")
+    ap.add_argument("--format", choices=("xlsx", "csv"), default="xlsx")
+    ap.add_argument("--out", required=True, help="xlsx file, or directory for csv")
+    ap.add_argument("--all-samples", action="store_true", help="every poll instead of one row per second")
+    args = ap.parse_args()
+
+    paths = []
+    for p in args.paths:
+        if p == "-":
+            paths += [line.strip() for line in sys.stdin if line.strip()]
+        else:
+            paths.append(p)
+
+    if hasattr(os, "nice"):
+        os.nice(10)                 # panel PC: UI önce gelsin
+
+    def progress(event, *a):
+        print(event, *a, flush=True)
+
+    out = export(paths, args.out, args.format, args.all_samples, progress)
+    print("done", out, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Link supervisor: health of one Modbus port, and who reopens it after a
+failure.
+
+    connecting  start-up, before the first open attempt has finished
+    connected   transactions succeeding
+    degraded    DEGRADED_AFTER link errors in a row (timeouts,
+                CRC, wrong slave); back to connected after RECOVER_AFTER
+                good transactions
+    down        the port could not be (re)opened, or DOWN_AFTER link errors
+                in a row (port is closed and reopened)
+
+While the link is up the client reopens the port inline as before (the
+TCP transports drop the socket after a bad reply to resync). While it
+is connecting or down ModbusClient fails every request at once with "link
+down", without touching the port. A background thread reopens it
+with exponential backoff and jitter: base_s * 2^attempt capped at max_s,
+times a random factor in [0.5, 1), so several panels on one gateway do
+not retry in step. An unplugged USB-RS485 adapter then costs the bus
+thread nothing.
+
+Modbus exception replies ("exception 0x02") prove the line works and do
+not count as link errors.
+
+State changes are queued as LinkEvent(ts, state, detail); the UI thread
+drains them with events(), like DeviceStream.drain().
+"""
+
+import time
+import random
+import threading
+from collections import deque, namedtuple
+
+
+CONNECTING = "connecting"
+CONNECTED = "connected"
+DEGRADED = "degraded"
+DOWN = "down"
+STATES = (CONNECTING, CONNECTED, DEGRADED, DOWN)
+
+LinkEvent = namedtuple("LinkEvent", "ts state detail")
+
+# bunlar hattın değil cihazın / isteğin hatası
+_NOT_LINK = ("exception", "qty out of range", "link down")
+
+
+class LinkSupervisor:
+    DEGRADED_AFTER = 2
+    DOWN_AFTER = 5
+    RECOVER_AFTER = 3
+
+    def __init__(self, client, base_s=0.25, max_s=10.0, seed=None):
+        self.client = client
+        self.base_s = base_s
+        self.max_s = max_s
+
+        # ilk açma denemesi bitene kadar down değil: gerçek bir hata yok henüz
+        self.state = CONNECTING
+        self.detail = "connecting"
+        self.attempts = 0
+        self.retry_at = 0.0             # monotonic, sonraki açma denemesi
+
+        self._fails = 0
+        self._oks = 0
+        self._events = deque(maxlen=64)
+        self._rng = random.Random(seed)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        client.supervisor = self        # client artık kendisi bağlanmaz, down'da hemen döner
+
+    @property
+    def up(self) -> bool:
+        return self.state in (CONNECTED, DEGRADED)
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="modbus-link", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=3.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- consumer side (UI thread) ----------
+    def events(self):
+        """LinkEvents since the last call, oldest first."""
+        out = []
+        while self._events:
+            out.append(self._events.popleft())
+        return out
+
+    # ---------- bus thread ----------
+    def report(self, err):
+        """Outcome of one transaction (err None = ok)."""
+        if err is None:
+            self._fails = 0
+            self._oks += 1
+            if self._oks >= self.RECOVER_AFTER:
+                # backoff ancak cihaz gerçekten cevap verince sıfırlanır (port açılınca değil)
+                self.attempts = 0
+                if self.state == DEGRADED:
+                    self._set(CONNECTED, "ok")
+            return
+
+        err = str(err)
+        if err.startswith(_NOT_LINK):
+            return
+        self._oks = 0
+        self._fails += 1
+        if err.startswith("connect failed") or self._fails >= self.DOWN_AFTER:
+            # port açılamıyor (ör. adaptör çekildi) ya da cihaz hiç cevap vermiyor
+            self.client.close()
+            self._schedule_retry()
+            self._set(DOWN, err)
+            self._wake.set()
+        elif self.state == CONNECTED and self._fails >= self.DEGRADED_AFTER:
+            self._set(DEGRADED, err)
+
+    # ---------- supervisor thread ----------
+    def _run(self):
+        while not self._stop.is_set():
+            if self.up:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            wait = self.retry_at - time.monotonic()
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+
+            # bus thread down'dayken porta dokunmaz: açma kilitsiz yapılabilir
+            if self.client.connect():
+                self._fails = 0
+                self._oks = 0
+                self._set(CONNECTED, "port open")
+            else:
+                self._schedule_retry()
+                self._set(DOWN, f"connect failed, retry in {self.retry_at - time.monotonic():.1f} s")
+
+    def _schedule_retry(self):
+        delay = min(self.max_s, self.base_s * (2 ** min(self.attempts, 16)))
+        delay *= self._rng.uniform(0.5, 1.0)
+        self.attempts += 1
+        self.retry_at = time.monotonic() + delay
+
+    def _set(self, state, detail):
+        changed = state != self.state or detail != self.detail
+        self.state = state
+        self.detail = detail
+        if changed:
+            self._events.append(LinkEvent(time.time(), state, detail))
@@ -0,0 +1,321 @@
+"""
+In-process metrics: latency histograms, labelled counters and gauges.
+
+    from services import metrics
+    metrics.registry.snapshot()     -> {name: {labels: value / histogram summary}}
+    metrics.registry.render()       -> Prometheus text format (0.0.4)
+    server = metrics.serve(9108)    -> optional HTTP endpoint, 127.0.0.1 only
+                                       GET /metrics (text), /metrics.json
+
+What is recorded (names without the "roaster_" prefix):
+
+    modbus_transaction_seconds{op}      ModbusClient call latency, failed ones too
+    modbus_errors_total{op,class}       "short read", "crc error", "exception 0x02", ...
+    poll_rate_hz / poll_target_hz{slave}, poll_jitter_seconds{slave}, poll_backoff{slave}
+    queue_depth{slave,queue}            samples not drained yet, pending writes, jobs
+    plot_redraw_seconds{part}           RoastPlot static (resize) / data (per frame)
+
+Gauges that are cheaper to read than to keep current (poll rate, queue
+depth) are filled by collectors right before snapshot() / render().
+Hot path cost: observe() / inc() ~1 µs (bisect + lock), nothing is
+allocated per call once a label set has been seen.
+"""
+
+import re
+import json
+import math
+import threading
+from bisect import bisect_left
+
+
+PREFIX = "roaster_"
+
+# RTU 9600 baud'da 11 register ~30 ms, timeout 1.5 s
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+# bir kare 16.7 ms
+FRAME_BUCKETS = (0.0005, 0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.1)
+
+_ERR_WORDS = re.compile(r"[a-z ]+")
+
+
+def err_class(err) -> str:
+    """Error string -> label: "short read 0/24" -> "short read", "exception 0x02" kept whole."""
+    err = str(err)
+    if err.startswith("exception"):
+        return err[:14]
+    m = _ERR_WORDS.match(err)
+    return m.group().strip() if m else "error"
+
+
+def _labels_text(names, values):
+    if not names:
+        return ""
+    parts = []
+    for n, v in zip(names, values):
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{n}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _num(v):
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v))
+
+
+# ---------------- METRICS ----------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}           # labels tuple -> değer / _HistogramChild
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}")
+        return tuple(str(v) for v in labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, n=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, k, v) for k, v in items]
+
+    def _snapshot(self):
+        with self._lock:
+            return {",".join(k): v for k, v in self._values.items()}
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def remove(self, *labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, k, v) for k, v in items]
+
+    def _snapshot(self):
+        with self._lock:
+            return {",".join(k): v for k, v in self._values.items()}
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "max", "_lock")
+
+    def __init__(self, bounds, lock):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # son kova +Inf
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = lock
+
+    def observe(self, v):
+        i = bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += v
+            if v > self.max:
+                self.max = v
+
+    def _quantile(self, counts, n, q):
+        # kovanın üst sınırı (üst kovada max): tahmin yukarı yuvarlanır
+        rank = q * n
+        acc = 0
+        for bound, c in zip(self.bounds, counts):
+            acc += c
+            if acc >= rank:
+                return bound
+        return self.max
+
+    def summary(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, vmax = self.sum, self.max
+        n = sum(counts)
+        if n == 0:
+            return {"count": 0, "sum": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "count": n,
+            "sum": total,
+            "mean": total / n,
+            "p50": min(vmax, self._quantile(counts, n, 0.50)),
+            "p95": min(vmax, self._quantile(counts, n, 0.95)),
+            "p99": min(vmax, self._quantile(counts, n, 0.99)),
+            "max": vmax,
+        }
+
+
+class Histogram(_Metric):
+    """Fixed buckets (seconds). Hot paths keep the child: h = HIST.labels("x"); h.observe(dt)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def labels(self, *labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                child = self._values[key] = _HistogramChild(self.buckets, threading.Lock())
+            return child
+
+    def observe(self, value, *labels):
+        self.labels(*labels).observe(value)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        out = []
+        for key, child in items:
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            acc = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                acc += c
+                out.append((self.name + "_bucket", key + (_num(bound),), acc))
+            out.append((self.name + "_sum", key, total))
+            out.append((self.name + "_count", key, acc))
+        return out
+
+    def _snapshot(self):
+        with self._lock:
+            items = list(self._values.items())
+        return {",".join(k): child.summary() for k, child in items}
+
+
+# ---------------- REGISTRY ----------------
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            old = self._metrics.get(metric.name)
+            if old is not None:
+                # modül yeniden import edilirse aynı metrik döner
+                if type(old) is not type(metric) or old.labelnames != metric.labelnames:
+                    raise ValueError(f"metric {metric.name} already registered")
+                return old
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, fn):
+        """fn() is called before every snapshot() / render() (sets gauges)."""
+        with self._lock:
+            self._collectors = self._collectors + [fn]
+
+    def remove_collector(self, fn):
+        with self._lock:
+            self._collectors = [c for c in self._collectors if c is not fn]
+
+    def _collect(self):
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception:
+                pass
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: m.name)
+
+    def snapshot(self):
+        """{metric name: {"label,values": value}}; histograms give count/sum/mean/p50/p95/p99/max."""
+        return {m.name: m._snapshot() for m in self._collect()}
+
+    def render(self) -> str:
+        lines = []
+        for m in self._collect():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            names = m.labelnames + ("le",) if m.kind == "histogram" else m.labelnames
+            for sample, key, value in m._samples():
+                lines.append(f"{sample}{_labels_text(names[:len(key)], key)} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# uygulama genelinde tek registry (text_cache gibi)
+registry = Registry()
+
+
+# ---------------- HTTP ----------------
+def _body(path):
+    if path in ("/", "/metrics"):
+        return registry.render().encode(), "text/plain; version=0.0.4; charset=utf-8"
+    if path == "/metrics.json":
+        return json.dumps(registry.snapshot(), indent=1).encode(), "application/json"
+    return None, None
+
+
+class MetricsServer:
+    def __init__(self, port=9108, host="127.0.0.1"):
+        # http.server ~40 ms import (email, html, ...): sadece endpoint açılırsa
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, ctype = _body(self.path.split("?", 1)[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._srv = ThreadingHTTPServer((host, port), _Handler)
+        self._srv.daemon_threads = True
+        self.address = self._srv.server_address
+        self._thread = threading.Thread(target=self._srv.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._srv.shutdown()
+        self._srv.server_close()
+
+
+def serve(port=9108, host="127.0.0.1"):
+    """Start the HTTP endpoint on a daemon thread; returns the server (stop())."""
+    return MetricsServer(port, host)
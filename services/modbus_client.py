@@ -1,170 +1,252 @@
 import time
 import threading
-import serial
-from serial.serialutil import SerialException
-
-
-# ---------------- MODBUS CRC ----------------
-def crc16_modbus(data: bytes) -> int:
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            if crc & 1:
-                crc = (crc >> 1) ^ 0xA001
+from functools import wraps
+
+from services import metrics
+from services.modbus_frames import (  # noqa: F401  (re-export: eski importlar çalışsın)
+    MAX_RW_WRITE_QTY,
+    MAX_WRITE_QTY,
+    append_crc,
+    crc16_modbus,
+    decode_u16,
+    echo_check,
+    pdu_check,
+    read_holding_pdu,
+    read_write_multiple_pdu,
+    rtu_frame,
+    write_multiple_pdu,
+    write_single_pdu,
+)
+from services.transports import RtuOverTcpTransport, SerialTransport, TcpTransport
+
+
+# ---------------- METRICS ----------------
+TX_SECONDS = metrics.registry.histogram(
+    "modbus_transaction_seconds", "Modbus request/response round trip, failed ones included", ("op",))
+ERRORS = metrics.registry.counter(
+    "modbus_errors_total", "Failed Modbus calls by error class", ("op", "class"))
+
+# hatta hiç istek gitmeden dönen hatalar: süreleri histogramı bozmasın
+_NO_TX = ("qty out of range", "link down", "connect failed")
+
+
+def _timed(op):
+    """(value, err) returning client call -> latency + error class metrics."""
+    hist = TX_SECONDS.labels(op)
+
+    def deco(fn):
+        @wraps(fn)
+        def call(self, *args, **kwargs):
+            t0 = time.perf_counter()
+            res = fn(self, *args, **kwargs)
+            err = res[1]
+            if err is None:
+                hist.observe(time.perf_counter() - t0)
             else:
-                crc >>= 1
-    return crc & 0xFFFF
-
-
-def append_crc(frame: bytes) -> bytes:
-    c = crc16_modbus(frame)
-    return frame + bytes([c & 0xFF, (c >> 8) & 0xFF])
+                ERRORS.inc(op, metrics.err_class(err))
+                if not str(err).startswith(_NO_TX):
+                    hist.observe(time.perf_counter() - t0)
+            return res
+        return call
+    return deco
 
 
 # ---------------- MODBUS CLIENT ----------------
 class ModbusClient:
-    def __init__(self, port="COM5", baud=9600, slave=2, timeout=1.5):
+    """
+    Modbus master over a pluggable transport.
+
+    Default is RTU on a serial port (port/baud/timeout/rx_margin as before);
+    pass transport=TcpTransport(...) or RtuOverTcpTransport(...) for
+    Ethernet gateways. read_holding_n / write_single_register return the
+    same (value, err) tuples on every transport; so do
+    write_multiple_registers (FC16) and read_write_multiple (FC23, write +
+    read in one round trip). raw=True on the reads
+    returns the register bytes (2 per register, big-endian) instead of
+    u16 words, for block codecs (services.register_map).
+    """
+
+    def __init__(self, port="COM5", baud=9600, slave=2, timeout=1.5, rx_margin=0.02,
+                 transport=None):
+        if transport is None:
+            transport = SerialTransport(port, baud, timeout, rx_margin)
+        self.transport = transport
         self.port = port
-        self.baud = baud
         self.slave = slave
         self.timeout = timeout
-        self.ser = None
         self.lock = threading.Lock()
+        self.supervisor = None          # services.link.LinkSupervisor bağlanınca set eder
+
+    @property
+    def baud(self):
+        # TCP transportlarda None (hat hızı sınırı yok)
+        return getattr(self.transport, "baud", None)
+
+    @property
+    def pipelined(self) -> bool:
+        return bool(getattr(self.transport, "pipelined", False))
 
     def connect(self) -> bool:
-        try:
-            self.ser = serial.Serial(
-                self.port, self.baud,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE,
-                bytesize=serial.EIGHTBITS,
-                timeout=self.timeout
-            )
-            time.sleep(0.08)
-            return True
-        except SerialException:
-            self.ser = None
-            return False
+        return self.transport.open()
 
     def close(self):
         try:
-            if self.ser:
-                self.ser.close()
+            self.transport.close()
         except Exception:
             pass
-        self.ser = None
 
     def _ensure(self) -> bool:
-        return (self.ser is not None and self.ser.is_open) or self.connect()
-
-    def _read_exact(self, n: int) -> bytes:
-        """Read until n bytes or until timeout budget is consumed."""
-        if not self.ser:
-            return b""
-        buf = bytearray()
-        t0 = time.time()
-        while len(buf) < n and (time.time() - t0) < self.timeout:
-            chunk = self.ser.read(n - len(buf))
-            if chunk:
-                buf += chunk
-            else:
-                time.sleep(0.01)
-        return bytes(buf)
+        if self.supervisor is not None and not self.supervisor.up:
+            # hat down: portu supervisor açar (arka planda, backoff ile); burada beklenmez
+            return False
+        return self.transport.is_open or self.connect()
 
-    def read_holding_n(self, start_reg: int, qty: int):
+    def _no_link(self) -> str:
+        return "link down" if self.supervisor is not None and not self.supervisor.up else "connect failed"
+
+    # ---------- function codes ----------
+    # slave=None -> self.slave; multi-drop hatta BusManager slave id'yi her çağrıda verir
+    @_timed("read_holding_n")
+    def read_holding_n(self, start_reg: int, qty: int, slave=None, raw=False):
         if qty <= 0 or qty > 125:
             return None, "qty out of range"
+        if slave is None:
+            slave = self.slave
 
         with self.lock:
             if not self._ensure():
-                return None, "connect failed"
-
-            req = bytes([
-                self.slave, 0x03,
-                (start_reg >> 8) & 0xFF, start_reg & 0xFF,
-                (qty >> 8) & 0xFF, qty & 0xFF
-            ])
-            req = append_crc(req)
-
-            expected_len = 5 + 2 * qty  # addr,fc,bytecount,data...,crc
-
-            try:
-                self.ser.reset_input_buffer()
-                self.ser.write(req)
-                time.sleep(0.01)
-                resp = self._read_exact(expected_len)
-            except SerialException as e:
-                self.close()
-                return None, f"serial: {e}"
+                return None, self._no_link()
+
+            resp, err = self.transport.exchange(slave, read_holding_pdu(start_reg, qty), 2 + 2 * qty)
+            return self._decode_holding(resp, err, qty, raw)
+
+    def read_holding_batch(self, reads, raw=False):
+        """
+        reads: [(start_reg, qty, slave), ...] -> [(values, err), ...]
+        Pipelined on transports that support it (Modbus TCP), sequential otherwise.
+        """
+        out = [None] * len(reads)
+        items = []
+        index = []
+        for i, (start_reg, qty, slave) in enumerate(reads):
+            if qty <= 0 or qty > 125:
+                out[i] = (None, "qty out of range")
+                continue
+            if slave is None:
+                slave = self.slave
+            items.append((slave, read_holding_pdu(start_reg, qty), 2 + 2 * qty))
+            index.append((i, qty))
+
+        if not items:
+            return out
 
-            if len(resp) != expected_len:
-                return None, f"short read {len(resp)}/{expected_len}"
-
-            recv_crc = resp[-2] | (resp[-1] << 8)
-            calc_crc = crc16_modbus(resp[:-2])
-            if recv_crc != calc_crc:
-                return None, "crc error"
-
-            if resp[0] != self.slave:
-                return None, "slave mismatch"
+        with self.lock:
+            if not self._ensure():
+                err = self._no_link()
+                for i, _qty in index:
+                    out[i] = (None, err)
+                ERRORS.inc("read_holding_batch", metrics.err_class(err), n=len(index))
+                return out
+
+            t0 = time.perf_counter()
+            results = self.transport.exchange_many(items)
+            # pipeline'da tek tek süre yok: bütün batch bir gözlem
+            TX_SECONDS.observe(time.perf_counter() - t0, "read_holding_batch")
+
+        for (i, qty), (resp, err) in zip(index, results):
+            out[i] = self._decode_holding(resp, err, qty, raw)
+        for _values, err in out:
+            if err is not None:
+                ERRORS.inc("read_holding_batch", metrics.err_class(err))
+        return out
+
+    @staticmethod
+    def _decode_holding(resp, err, qty, raw=False, fc=0x03):
+        if err:
+            return None, err
+
+        err = pdu_check(resp, fc)
+        if err:
+            return None, err
+
+        bytecount = resp[1]
+        if bytecount != 2 * qty:
+            return None, "bytecount mismatch"
+
+        if raw:
+            return bytes(resp[2:2 + 2 * qty]), None
+        return decode_u16(resp, 2, qty), None
+
+    @_timed("write_single_register")
+    def write_single_register(self, reg: int, value: int, slave=None):
+        value &= 0xFFFF
+        if slave is None:
+            slave = self.slave
 
-            if resp[1] & 0x80:
-                return None, f"exception 0x{resp[2]:02X}"
+        with self.lock:
+            if not self._ensure():
+                return False, self._no_link()
 
-            if resp[1] != 0x03:
-                return None, "bad response"
+            resp, err = self.transport.exchange(slave, write_single_pdu(reg, value), 5)
+            if err:
+                return False, err
 
-            bytecount = resp[2]
-            if bytecount != 2 * qty:
-                return None, "bytecount mismatch"
+            err = pdu_check(resp, 0x06) or echo_check(resp, reg, value)
+            if err:
+                return False, err
 
-            data = resp[3:3 + bytecount]
-            values = []
-            for i in range(qty):
-                hi = data[2 * i]
-                lo = data[2 * i + 1]
-                values.append((hi << 8) | lo)
+            return True, None
 
-            return values, None
+    @_timed("write_multiple_registers")
+    def write_multiple_registers(self, start_reg: int, values, slave=None):
+        if not 1 <= len(values) <= MAX_WRITE_QTY:
+            return False, "qty out of range"
+        if slave is None:
+            slave = self.slave
 
-    def write_single_register(self, reg: int, value: int):
-        value &= 0xFFFF
         with self.lock:
             if not self._ensure():
-                return False, "connect failed"
-
-            req = bytes([
-                self.slave, 0x06,
-                (reg >> 8) & 0xFF, reg & 0xFF,
-                (value >> 8) & 0xFF, value & 0xFF
-            ])
-            req = append_crc(req)
+                return False, self._no_link()
 
-            try:
-                self.ser.reset_input_buffer()
-                self.ser.write(req)
-                time.sleep(0.01)
-                resp = self._read_exact(8)
-            except SerialException as e:
-                self.close()
-                return False, f"serial: {e}"
+            resp, err = self.transport.exchange(slave, write_multiple_pdu(start_reg, values), 5)
+            if err:
+                return False, err
 
-            if len(resp) != 8:
-                return False, f"short read {len(resp)}/8"
+            # cevap başlangıç adresi + adedi geri yollar: başka bir yazmanın cevabı olmasın
+            err = pdu_check(resp, 0x10) or echo_check(resp, start_reg, len(values))
+            if err:
+                return False, err
 
-            recv_crc = resp[-2] | (resp[-1] << 8)
-            calc_crc = crc16_modbus(resp[:-2])
-            if recv_crc != calc_crc:
-                return False, "crc error"
-
-            if resp[0] != self.slave:
-                return False, "slave mismatch"
-
-            if resp[1] & 0x80:
-                return False, f"exception 0x{resp[2]:02X}"
+            return True, None
 
-            if resp[1] != 0x06:
-                return False, "bad response"
+    @_timed("read_write_multiple")
+    def read_write_multiple(self, read_start: int, read_qty: int, write_start: int, values,
+                            slave=None, raw=False):
+        """FC23 -> (values read after the write, err), like read_holding_n."""
+        if not 1 <= read_qty <= 125 or not 1 <= len(values) <= MAX_RW_WRITE_QTY:
+            return None, "qty out of range"
+        if slave is None:
+            slave = self.slave
 
-            return True, None
+        with self.lock:
+            if not self._ensure():
+                return None, self._no_link()
+
+            pdu = read_write_multiple_pdu(read_start, read_qty, write_start, values)
+            resp, err = self.transport.exchange(slave, pdu, 2 + 2 * read_qty)
+            return self._decode_holding(resp, err, read_qty, raw, fc=0x17)
+
+
+def client_from_url(url, slave=2, timeout=1.5):
+    """
+    "tcp://host:502"       Modbus TCP
+    "rtu+tcp://host:4001"  RTU over a transparent TCP gateway
+    anything else          serial port name (COM5, /dev/ttyUSB0, simulator pty), 9600 8N1
+    """
+    for scheme, cls, default_port in (("tcp://", TcpTransport, 502),
+                                      ("rtu+tcp://", RtuOverTcpTransport, 4001)):
+        if url.startswith(scheme):
+            host, _, port = url[len(scheme):].partition(":")
+            transport = cls(host, int(port or default_port), timeout=timeout)
+            return ModbusClient(port=url, slave=slave, timeout=timeout, transport=transport)
+    return ModbusClient(port=url, baud=9600, slave=slave, timeout=timeout)
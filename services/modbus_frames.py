@@ -0,0 +1,118 @@
+import struct
+from functools import lru_cache
+
+
+# ---------------- MODBUS CRC ----------------
+def _make_crc_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16_modbus(data: bytes) -> int:
+    """CRC-16/MODBUS, one table lookup per byte. Accepts bytes/bytearray/memoryview."""
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def append_crc(frame: bytes) -> bytes:
+    c = crc16_modbus(frame)
+    return frame + bytes([c & 0xFF, (c >> 8) & 0xFF])
+
+
+# ---------------- PDU ----------------
+# PDU = function code + data (transport-independent part of a Modbus frame)
+
+MAX_WRITE_QTY = 123         # FC16
+MAX_RW_WRITE_QTY = 121      # FC23 yazma kısmı
+
+@lru_cache(maxsize=256)
+def read_holding_pdu(start_reg: int, qty: int) -> bytes:
+    return struct.pack(">BHH", 0x03, start_reg & 0xFFFF, qty)
+
+
+def write_single_pdu(reg: int, value: int) -> bytes:
+    return struct.pack(">BHH", 0x06, reg & 0xFFFF, value & 0xFFFF)
+
+
+def write_multiple_pdu(start_reg: int, values) -> bytes:
+    n = len(values)
+    return struct.pack(f">BHHB{n}H", 0x10, start_reg & 0xFFFF, n, 2 * n, *(v & 0xFFFF for v in values))
+
+
+def read_write_multiple_pdu(read_start: int, read_qty: int, write_start: int, values) -> bytes:
+    """FC23: the slave writes first, then reads (the reply shows the new values)."""
+    n = len(values)
+    return struct.pack(f">BHHHHB{n}H", 0x17, read_start & 0xFFFF, read_qty,
+                       write_start & 0xFFFF, n, 2 * n, *(v & 0xFFFF for v in values))
+
+
+@lru_cache(maxsize=None)
+def _u16_block(qty: int) -> struct.Struct:
+    return struct.Struct(f">{qty}H")
+
+
+def decode_u16(resp, offset: int, qty: int) -> list:
+    """Big-endian register words from resp[offset:], decoded in one struct call."""
+    return list(_u16_block(qty).unpack_from(resp, offset))
+
+
+# ---------------- RTU FRAMING ----------------
+# en kısa RTU cevabı: exception frame (addr, fc|0x80, code, crc_lo, crc_hi)
+EXC_FRAME_LEN = 5
+
+
+@lru_cache(maxsize=256)
+def rtu_frame(slave: int, pdu: bytes) -> bytes:
+    """
+    slave + pdu + crc. Keyed on the PDU bytes: the poll loop sends the same
+    few read frames over and over, so their CRC is computed once.
+    """
+    return append_crc(bytes((slave,)) + pdu)
+
+
+def rtu_check(resp: bytes, slave: int, expected_len: int):
+    """Validate an RTU reply -> (pdu, None) or (None, err). Exception replies pass through."""
+    n = len(resp)
+    is_exc = n == EXC_FRAME_LEN and bool(resp[1] & 0x80)
+    if n != expected_len and not is_exc:
+        return None, f"short read {n}/{expected_len}"
+
+    recv_crc = resp[-2] | (resp[-1] << 8)
+    calc_crc = crc16_modbus(memoryview(resp)[:-2])
+    if recv_crc != calc_crc:
+        return None, "crc error"
+
+    if resp[0] != slave:
+        return None, "slave mismatch"
+
+    return resp[1:-2], None
+
+
+def pdu_check(pdu, fc: int):
+    """Exception / function-code check on a reply PDU -> err or None."""
+    if pdu[0] & 0x80:
+        return f"exception 0x{pdu[1]:02X}"
+    if pdu[0] != fc:
+        return "bad response"
+    return None
+
+
+def echo_check(pdu, first: int, second: int):
+    """FC06 / FC16 reply echoes (register, value) / (start, quantity) -> err or None."""
+    if len(pdu) < 5 or struct.unpack_from(">HH", pdu, 1) != (first & 0xFFFF, second & 0xFFFF):
+        return "bad response: echo mismatch"
+    return None
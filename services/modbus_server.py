@@ -0,0 +1,212 @@
+"""
+In-process Modbus slave on a local TCP socket, for exercising ModbusClient
+without hardware. Speaks Modbus TCP (MBAP) or, with rtu=True, RTU frames
+over TCP like a transparent serial gateway. FC03 / FC06 / FC16 / FC23.
+"""
+
+import socket
+import struct
+import threading
+import socketserver
+
+from services.modbus_frames import crc16_modbus, append_crc
+
+
+_MBAP = struct.Struct(">HHHB")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+# ---------------- REGISTER BANK ----------------
+class RegisterBank:
+    """Thread-safe holding registers; unknown addresses answer exception 0x02."""
+
+    def __init__(self, values=None):
+        self._regs = {int(k): int(v) & 0xFFFF for k, v in (values or {}).items()}
+        self.lock = threading.Lock()
+
+    def read(self, start_reg, qty):
+        with self.lock:
+            try:
+                return [self._regs[start_reg + i] for i in range(qty)]
+            except KeyError:
+                return None
+
+    def write(self, reg, value) -> bool:
+        with self.lock:
+            if reg not in self._regs:
+                return False
+            self._regs[reg] = int(value) & 0xFFFF
+            return True
+
+    def write_many(self, start_reg, values) -> bool:
+        """All or nothing: one unknown address rejects the whole write."""
+        regs = range(start_reg, start_reg + len(values))
+        with self.lock:
+            if not all(r in self._regs for r in regs):
+                return False
+            for reg, value in zip(regs, values):
+                self._regs[reg] = int(value) & 0xFFFF
+            return True
+
+    def set(self, reg, value):
+        with self.lock:
+            self._regs[int(reg)] = int(value) & 0xFFFF
+
+
+# ---------------- SERVER ----------------
+class ModbusTcpServer:
+    """
+    server = ModbusTcpServer(RegisterBank({100: 0, ...}), slave=2)
+    host, port = server.start()
+    ...
+    server.stop()
+
+    slave=None answers every unit id. handle_pdu() is the override point
+    for simulators (dynamic registers, fault injection).
+    """
+
+    def __init__(self, bank=None, host="127.0.0.1", port=0, slave=None, rtu=False):
+        self.bank = bank if bank is not None else RegisterBank()
+        self.slave = slave
+        self.rtu = rtu
+        self._addr = (host, port)
+        self._srv = None
+        self._thread = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        owner = self
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                sock = self.request
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                serve = owner._serve_rtu if owner.rtu else owner._serve_tcp
+                try:
+                    serve(lambda n: _recv_exact(sock, n), sock.sendall)
+                except OSError:
+                    pass
+
+        self._srv = _Server(self._addr, _Handler)
+        self._thread = threading.Thread(target=self._srv.serve_forever, name="modbus-server", daemon=True)
+        self._thread.start()
+        return self._srv.server_address
+
+    def stop(self):
+        if self._srv is not None:
+            self._srv.shutdown()
+            self._srv.server_close()
+        self._srv = None
+        self._thread = None
+
+    # ---------- protocol ----------
+    def handle_pdu(self, slave, pdu):
+        """Request PDU -> reply PDU (None = stay silent)."""
+        if self.slave is not None and slave != self.slave:
+            return None
+
+        fc = pdu[0]
+        if fc == 0x03 and len(pdu) == 5:
+            start_reg, qty = struct.unpack_from(">HH", pdu, 1)
+            if not 1 <= qty <= 125:
+                return bytes((0x83, 0x03))
+            vals = self.bank.read(start_reg, qty)
+            if vals is None:
+                return bytes((0x83, 0x02))
+            return struct.pack(f">BB{qty}H", 0x03, 2 * qty, *vals)
+
+        if fc == 0x06 and len(pdu) == 5:
+            reg, value = struct.unpack_from(">HH", pdu, 1)
+            if not self.bank.write(reg, value):
+                return bytes((0x86, 0x02))
+            return bytes(pdu)
+
+        if fc == 0x10 and len(pdu) >= 6:
+            start_reg, qty, nbytes = struct.unpack_from(">HHB", pdu, 1)
+            if not 1 <= qty <= 123 or nbytes != 2 * qty or len(pdu) != 6 + nbytes:
+                return bytes((0x90, 0x03))
+            if not self._write_many(start_reg, struct.unpack_from(f">{qty}H", pdu, 6)):
+                return bytes((0x90, 0x02))
+            return struct.pack(">BHH", 0x10, start_reg, qty)
+
+        if fc == 0x17 and len(pdu) >= 10:
+            r_start, r_qty, w_start, w_qty, nbytes = struct.unpack_from(">HHHHB", pdu, 1)
+            if (not 1 <= r_qty <= 125 or not 1 <= w_qty <= 121
+                    or nbytes != 2 * w_qty or len(pdu) != 10 + nbytes):
+                return bytes((0x97, 0x03))
+            # önce yazma, sonra okuma (spec sırası)
+            if not self._write_many(w_start, struct.unpack_from(f">{w_qty}H", pdu, 10)):
+                return bytes((0x97, 0x02))
+            vals = self.bank.read(r_start, r_qty)
+            if vals is None:
+                return bytes((0x97, 0x02))
+            return struct.pack(f">BB{r_qty}H", 0x17, 2 * r_qty, *vals)
+
+        return bytes((fc | 0x80, 0x01))
+
+    def _write_many(self, start_reg, values) -> bool:
+        # FC16/FC23: aralık önce doğrulanır, reddedilen yazma hiçbir register'ı değiştirmez
+        return self.bank.write_many(start_reg, values)
+
+    def reply_frame(self, frame: bytes, rtu: bool):
+        """Last hook before a framed reply goes out (None = drop it). Fault injection goes here."""
+        return frame
+
+    # recv(n) -> bytes | None (bağlantı kapandı), send(bytes)
+    def _serve_tcp(self, recv, send):
+        while True:
+            head = recv(_MBAP.size)
+            if head is None:
+                return
+            tid, proto, length, unit = _MBAP.unpack(head)
+            pdu = recv(length - 1)
+            if pdu is None:
+                return
+            if proto != 0:
+                continue
+            resp = self.handle_pdu(unit, pdu)
+            if resp is not None:
+                out = self.reply_frame(_MBAP.pack(tid, 0, len(resp) + 1, unit) + resp, False)
+                if out:
+                    send(out)
+
+    def _serve_rtu(self, recv, send):
+        # FC03/FC06 istekleri sabit 8 byte: addr + 5 byte pdu + crc;
+        # FC16/FC23'te bytecount alanından sonra veri + crc gelir
+        while True:
+            frame = recv(8)
+            if frame is None:
+                return
+            head = {0x10: 7, 0x17: 11}.get(frame[1])     # bytecount dahil başlık
+            if head is not None:
+                if head > len(frame):
+                    more = recv(head - len(frame))
+                    if more is None:
+                        return
+                    frame += more
+                more = recv(head + frame[head - 1] + 2 - len(frame))
+                if more is None:
+                    return
+                frame += more
+            recv_crc = frame[-2] | (frame[-1] << 8)
+            if recv_crc != crc16_modbus(frame[:-2]):
+                continue
+            resp = self.handle_pdu(frame[0], frame[1:-2])
+            if resp is not None:
+                out = self.reply_frame(append_crc(bytes((frame[0],)) + resp), True)
+                if out:
+                    send(out)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
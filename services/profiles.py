@@ -0,0 +1,189 @@
+"""
+Reference roast profiles: target BT / RoR curves and live deviation.
+
+Profiles are JSON files in one directory:
+
+    {"name": "Ethiopia light",
+     "bt":  [[t_s, °C], ...],
+     "ror": [[t_s, °C/min], ...]}          (optional, derived from bt if missing)
+
+ProfileTrack resamples a profile once onto the plot's 1 s grid and builds
+a target-BT -> target-time table, so every live update (ΔBT, ΔRoR,
+projected dry end / first crack / drop times) is a couple of array
+lookups.
+"""
+
+import os
+import json
+from array import array
+from collections import namedtuple
+
+
+# RoastModel (simülatör) ile aynı faz eşikleri
+DRY_END_C = 150.0
+FIRST_CRACK_C = 196.0
+
+# eta'lar roast saniyesi (HR105 ölçeği); None -> eşik geçildi / tahmin yok
+Deviation = namedtuple("Deviation", "dbt dror target_bt target_ror dry_eta fc_eta drop_eta")
+
+
+def resample(points, grid_s, n):
+    """Piecewise-linear [(t, v), ...] (t ascending) sampled at k*grid_s, k < n. One pass."""
+    out = array("d", bytes(8 * n))
+    if not points:
+        return out
+    j = 0
+    last = len(points) - 1
+    for k in range(n):
+        t = k * grid_s
+        while j < last and points[j + 1][0] <= t:
+            j += 1
+        t0, v0 = points[j]
+        if t <= t0 or j == last:
+            out[k] = v0
+        else:
+            t1, v1 = points[j + 1]
+            out[k] = v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+    return out
+
+
+class Profile:
+    def __init__(self, name, bt, ror=None):
+        self.name = name
+        self.bt = [(float(t), float(v)) for t, v in bt]
+        self.ror = [(float(t), float(v)) for t, v in ror] if ror else None
+
+    @property
+    def duration(self) -> float:
+        return self.bt[-1][0] if self.bt else 0.0
+
+    def to_dict(self):
+        d = {"name": self.name, "bt": [list(p) for p in self.bt]}
+        if self.ror:
+            d["ror"] = [list(p) for p in self.ror]
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["name"], d["bt"], d.get("ror"))
+
+    @classmethod
+    def from_columns(cls, name, cols):
+        """From a recorded roast (RoastColumns): last reading of every roast second."""
+        t, bt, ror = cols.column("t"), cols.column("bt"), cols.column("ror")
+        bt_pts = []
+        ror_pts = []
+        for i in range(cols.rows):
+            ti = float(t[i])
+            if bt_pts and bt_pts[-1][0] == ti:
+                bt_pts[-1] = (ti, float(bt[i]))
+                ror_pts[-1] = (ti, float(ror[i]))
+            elif not bt_pts or ti > bt_pts[-1][0]:
+                bt_pts.append((ti, float(bt[i])))
+                ror_pts.append((ti, float(ror[i])))
+        return cls(name, bt_pts, ror_pts)
+
+
+class ProfileStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, name):
+        safe = "".join(c if c.isalnum() or c in "-_ " else "_" for c in name).strip() or "profile"
+        return os.path.join(self.directory, safe + ".json")
+
+    def names(self):
+        try:
+            files = sorted(f for f in os.listdir(self.directory) if f.endswith(".json"))
+        except FileNotFoundError:
+            return []
+        out = []
+        for f in files:
+            try:
+                with open(os.path.join(self.directory, f), encoding="utf-8") as fh:
+                    out.append(json.load(fh)["name"])
+            except (OSError, ValueError, KeyError):
+                continue
+        return out
+
+    def load(self, name):
+        with open(self._path(name), encoding="utf-8") as f:
+            return Profile.from_dict(json.load(f))
+
+    def save(self, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(profile.name)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(profile.to_dict(), f)
+        os.replace(path + ".tmp", path)
+        return path
+
+
+class ProfileTrack:
+    """
+    A profile resampled onto the plot time grid (grid_s, k = 0..n-1).
+    xs / bt / ror are array('d') ready for RoastPlot.set_target().
+    update() is O(1).
+    """
+
+    def __init__(self, profile, grid_s=1.0, length_s=1200.0):
+        self.profile = profile
+        self.grid_s = grid_s
+        n = int(max(length_s, profile.duration) / grid_s) + 1
+        self.n = n
+
+        self.xs = array("d", (k * grid_s for k in range(n)))
+        self.bt = resample(profile.bt, grid_s, n)
+        if profile.ror:
+            self.ror = resample(profile.ror, grid_s, n)
+        else:
+            # merkezi fark, °C/min
+            self.ror = array("d", bytes(8 * n))
+            for k in range(1, n - 1):
+                self.ror[k] = (self.bt[k + 1] - self.bt[k - 1]) * 30.0 / grid_s
+
+        # turning point sonrası: hedef BT (1 °C adım) -> hedefin o BT'ye vardığı an
+        tp = min(range(n), key=self.bt.__getitem__)
+        self._c0 = int(self.bt[tp])
+        self._t_at = array("d")
+        k = tp
+        for c in range(self._c0, int(max(self.bt[tp:])) + 1):
+            while k < n - 1 and self.bt[k] < c:
+                k += 1
+            self._t_at.append(k * grid_s)
+
+        self.t_dry = self.time_at(DRY_END_C)
+        self.t_fc = self.time_at(FIRST_CRACK_C)
+        self.drop_c = profile.bt[-1][1] if profile.bt else None
+        self.t_drop = profile.duration
+
+    def time_at(self, bt_c):
+        """Target roast time at which the profile reaches bt_c (after turning point), or None."""
+        i = int(bt_c) - self._c0
+        if i < 0:
+            return self._t_at[0] if self._t_at else None
+        if i >= len(self._t_at):
+            return None
+        return self._t_at[i]
+
+    def target(self, tsec):
+        k = min(self.n - 1, max(0, int(tsec / self.grid_s)))
+        return self.bt[k], self.ror[k]
+
+    def _eta(self, tsec, bt, ror, threshold, t_threshold):
+        # profil temposuyla: eşiğe kalan hedef süre
+        if t_threshold is None or bt >= threshold or ror <= 0:
+            return None
+        t_now = self.time_at(bt)
+        if t_now is None:
+            return None
+        return tsec + max(0.0, t_threshold - t_now)
+
+    def update(self, tsec, bt, ror) -> Deviation:
+        tbt, tror = self.target(tsec)
+        return Deviation(
+            bt - tbt, ror - tror, tbt, tror,
+            self._eta(tsec, bt, ror, DRY_END_C, self.t_dry),
+            self._eta(tsec, bt, ror, FIRST_CRACK_C, self.t_fc),
+            self._eta(tsec, bt, ror, self.drop_c, self.t_drop) if self.drop_c is not None else None,
+        )
@@ -0,0 +1,231 @@
+"""
+Declarative holding-register map and the read planner.
+
+A map is a tuple of Register(name, addr, type, scale, signed, rate):
+
+    type    "u16" / "i16" (one register), "u32" / "i32" / "f32" (two registers)
+    scale   engineering value = raw * scale (None: raw int, decoded by the caller)
+    signed  u16 / u32 read as two's complement (same as i16 / i32)
+    rate    "fast" (every poll) or "slow" (every slow_every-th poll)
+
+ReadPlan compiles a map into the fewest FC03 block reads: registers are
+sorted by address and merged while the hole between them is at most
+max_gap registers and the block stays within MAX_QTY. On RTU a skipped
+register costs 2 bytes on the wire, a new round trip ~20 ms at 9600 baud,
+so reading across small holes is cheaper; use max_gap=0 for devices that
+reject reads of unmapped addresses. Every register inside a block that was
+read is decoded, slow ones included (they come for free).
+
+Decoding works on the raw register bytes of a block: each block gets one
+precompiled struct (pad bytes over the holes), so a whole block decodes in
+a single unpack_from call. 32-bit values follow the plan's word_order:
+"big" = high word first (ABCD), "little" = low word first (CDAB, common on
+PLCs); for "little" the bytes of every word are swapped first (two slice
+copies) and the block is read little-endian, which puts both halves right.
+"""
+
+import struct
+from collections import namedtuple
+
+from services.modbus_frames import decode_u16
+
+
+MAX_QTY = 125           # FC03 frame limit
+RATES = ("fast", "slow")
+WORD_ORDERS = ("big", "little")
+
+# type -> (struct kodu, register sayısı)
+TYPES = {
+    "u16": ("H", 1),
+    "i16": ("h", 1),
+    "u32": ("I", 2),
+    "i32": ("i", 2),
+    "f32": ("f", 2),
+}
+_SIGNED = {"u16": "i16", "u32": "i32"}
+
+Register = namedtuple("Register", "name addr type scale signed rate")
+
+# Block.regs: ((offset in block, Register), ...); codec: _Codec or None
+Block = namedtuple("Block", "start qty regs codec")
+_Codec = namedtuple("_Codec", "struct swap names scaled")
+# one poll: the blocks to read + where the span lies in them ((block index, lo, hi), ...)
+Pass = namedtuple("Pass", "blocks span")
+
+
+def register(name, addr, type="u16", scale=1, signed=False, rate="fast"):
+    if type not in TYPES:
+        raise ValueError(f"{name}: unknown register type {type}")
+    if rate not in RATES:
+        raise ValueError(f"{name}: unknown poll rate {rate}")
+    if signed:
+        type = _SIGNED.get(type, type)
+    return Register(name, int(addr), type, scale, type in ("i16", "i32"), rate)
+
+
+def width(r):
+    return TYPES[r.type][1]
+
+
+# HR100..HR110 roaster controller. HR101..HR103 sit inside the block that
+# is read anyway, so the panel values cost no extra round trip.
+ROASTER_MAP = (
+    register("set", 100, scale=0.1),                        # °C x10, yazılabilir
+    register("airflow", 101, rate="slow"),                  # Pa
+    register("burner", 102, rate="slow"),                   # %
+    register("drum", 103, scale=0.1, rate="slow"),          # Hz x10
+    register("bt", 104, "i16", scale=None),                 # >300 x10, <=300 belirsiz: decode_bt
+    register("time", 105),                                  # roast s
+    register("profile", 106),                               # 1 start / 0 stop, yazılabilir
+    register("dry_s", 107),
+    register("maillard_s", 108),
+    register("dev_s", 109),
+    register("ror", 110, scale=0.1, signed=True),           # x10
+)
+
+# float BT'li firmware (ROASTER_FLOAT_BT=1): HR111..HR112 IEEE-754, °C.
+# HR110'a bitişik -> aynı blokta, ek round trip yok. Eski firmware HR111'i
+# okutmaz (exception 0x02), o yüzden opsiyonel.
+FLOAT_BT_MAP = (
+    register("bt_c", 111, "f32"),
+)
+
+
+def by_name(registers):
+    return {r.name: r for r in registers}
+
+
+def span_decoder(start, qty, registers):
+    """
+    Decoder for a logged span: u16 words of [start, start + qty) (a roast
+    log record) -> {name: value}, through the same block codec as a live
+    read. Registers not entirely inside the span are left out.
+    """
+    plan = ReadPlan([r for r in registers if start <= r.addr and r.addr + width(r) <= start + qty])
+    block = plan._compile([(start, qty)]).blocks[0]
+    pack = struct.Struct(f">{qty}H").pack
+
+    def decode(words):
+        return plan.decode(block, pack(*words))
+    return decode
+
+
+def plan_blocks(registers, max_qty=MAX_QTY, max_gap=8):
+    """Sorted, merged (start, qty) spans covering `registers` (greedy = fewest reads)."""
+    spans = []
+    for r in sorted(registers, key=lambda r: r.addr):
+        end_r = r.addr + width(r)
+        if spans:
+            start, end = spans[-1]
+            if end_r <= end:
+                continue
+            if r.addr - end <= max_gap and end_r - start <= max_qty:
+                spans[-1] = (start, end_r)
+                continue
+        spans.append((r.addr, end_r))
+    return [(start, end - start) for start, end in spans]
+
+
+class ReadPlan:
+    """
+    next_pass() -> the Pass for the next poll (fast set, or everything
+    every slow_every-th call). decode(block, data) -> {name: value}, data
+    being the block's raw register bytes (read_holding_n(..., raw=True)).
+
+    span=(start, qty): registers that must be read on every poll (the raw
+    HR100..HR110 record the roast log stores); values(pass, datas) returns
+    them as u16 words.
+    """
+
+    def __init__(self, registers=(), span=None, max_qty=MAX_QTY, max_gap=8, slow_every=5,
+                 word_order="big"):
+        if word_order not in WORD_ORDERS:
+            raise ValueError(f"unknown word order: {word_order}")
+        self.registers = tuple(sorted(registers, key=lambda r: r.addr))
+        for a, b in zip(self.registers, self.registers[1:]):
+            if a.addr + width(a) > b.addr:
+                raise ValueError(f"registers overlap: {a.name} / {b.name}")
+        self.span = span
+        self.slow_every = max(1, int(slow_every))
+        self.word_order = word_order
+        self._cycle = 0
+
+        must = [r for r in self.registers if r.rate == "fast"]
+        if span is not None:
+            must += [Register(None, span[0] + i, "u16", None, False, "fast") for i in range(span[1])]
+        self.fast = self._compile(plan_blocks(must, max_qty, max_gap))
+        self.full = self._compile(plan_blocks(must + list(self.registers), max_qty, max_gap))
+
+    def _compile(self, spans):
+        blocks = []
+        for start, qty in spans:
+            regs = tuple((r.addr - start, r) for r in self.registers
+                         if start <= r.addr and r.addr + width(r) <= start + qty)
+            blocks.append(Block(start, qty, regs, self._codec(regs)))
+        return Pass(tuple(blocks), self._slices(blocks))
+
+    def _codec(self, regs):
+        if not regs:
+            return None
+        # 16 bit'lik register'lar iki düzende de aynı çözülür: swap sadece 32 bit varsa
+        swap = self.word_order == "little" and any(width(r) == 2 for _off, r in regs)
+        fmt = ["<" if swap else ">"]
+        pos = 0
+        for off, r in regs:
+            if off > pos:
+                fmt.append(f"{2 * (off - pos)}x")
+            fmt.append(TYPES[r.type][0])
+            pos = off + width(r)
+        scaled = tuple((r.name, r.scale) for _off, r in regs if r.scale not in (None, 1))
+        return _Codec(struct.Struct("".join(fmt)), swap, tuple(r.name for _off, r in regs), scaled)
+
+    def _slices(self, blocks):
+        # span -> [(block index, lo, hi)]
+        if self.span is None:
+            return ()
+        lo, hi = self.span[0], self.span[0] + self.span[1]
+        parts = []
+        for i, b in enumerate(blocks):
+            a, z = max(lo, b.start), min(hi, b.start + b.qty)
+            if a < z:
+                parts.append((i, a - b.start, z - b.start))
+        return tuple(parts)
+
+    def next_pass(self):
+        self._cycle += 1
+        return self.full if (self._cycle - 1) % self.slow_every == 0 else self.fast
+
+    @staticmethod
+    def decode(block, data):
+        c = block.codec
+        if c is None:
+            return {}
+        if c.swap:
+            buf = bytearray(len(data))
+            buf[0::2] = data[1::2]
+            buf[1::2] = data[0::2]
+            data = buf
+        out = dict(zip(c.names, c.struct.unpack_from(data)))
+        for name, scale in c.scaled:
+            out[name] *= scale
+        return out
+
+    @staticmethod
+    def values(p, datas):
+        """Span as u16 words from this pass's block reads (datas[i] None = failed) or None."""
+        parts = p.span
+        if not parts:
+            return None
+        out = []
+        for i, lo, hi in parts:
+            if datas[i] is None:
+                return None
+            out += decode_u16(datas[i], 2 * lo, hi - lo)
+        return out
+
+
+# roast log / history / kolon dosyası / export: HR100..HR110 ham kaydı
+LOG_SPAN = (100, 11)
+LOG_FIELDS = tuple(r.name for r in sorted(ROASTER_MAP, key=lambda r: r.addr)
+                   if LOG_SPAN[0] <= r.addr < LOG_SPAN[0] + LOG_SPAN[1])
+decode_log_row = span_decoder(*LOG_SPAN, ROASTER_MAP)
@@ -0,0 +1,181 @@
+"""
+Columnar roast file (.rcol): one finished roast, read through mmap.
+
+    header   "RCOL" | version u8 | ncols u8 | pad u16 | rows u32 | preview_rows u32 | created f64
+    columns  ncols x (name 8s | type 1s | pad 7 | offset u64 | preview_offset u64)
+    data     each column contiguous, 8-byte aligned: rows values, then preview_rows values
+
+Columns: ts (f64 wall clock), t (roast s, HR105), bt / set / ror (f32 °C, °C/min).
+The preview block is every k-th row (plus the last), at most PREVIEW_ROWS.
+
+Opening a file reads only the header; column() returns a zero-copy view
+(numpy array over the mmap, or memoryview without numpy), so only the
+pages actually used are read from disk. Little-endian hosts only (x86, ARM).
+"""
+
+import os
+import mmap
+import time
+import struct
+from array import array
+
+from services.register_map import LOG_SPAN, decode_log_row
+from services.roast_log import read_segment
+from services.ror import decode_bt
+
+# numpy opsiyonel: memoryview ile çalışır. Import'u ağır (~100 ms), ilk
+# kolon okunurken yüklenir (_numpy)
+np = None
+_np_tried = False
+
+
+def _numpy():
+    global np, _np_tried
+    if not _np_tried:
+        _np_tried = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+
+MAGIC = b"RCOL"
+VERSION = 1
+SUFFIX = ".rcol"
+PREVIEW_ROWS = 256
+
+_HEADER = struct.Struct("<4sBBHIId")
+_COLUMN = struct.Struct("<8ss7xQQ")
+
+COLUMNS = (("ts", "d"), ("t", "f"), ("bt", "f"), ("set", "f"), ("ror", "f"))
+
+
+def _align8(n):
+    return (n + 7) & ~7
+
+
+def columns_path(log_path):
+    """Roast log segment path -> matching .rcol path."""
+    return os.path.splitext(log_path)[0] + SUFFIX
+
+
+def write_columns(path, cols, created=None):
+    """cols: {name: sequence} for every name in COLUMNS, equal lengths."""
+    rows = len(cols["t"])
+    step = max(1, -(-rows // PREVIEW_ROWS))
+    pick = list(range(0, rows, step))
+    if rows and pick[-1] != rows - 1:
+        pick.append(rows - 1)
+
+    table = []
+    blobs = []
+    offset = _align8(_HEADER.size + _COLUMN.size * len(COLUMNS))
+    for name, code in COLUMNS:
+        full = array(code, cols[name])
+        preview = array(code, (full[i] for i in pick))
+        data_off = offset
+        prev_off = _align8(data_off + len(full) * full.itemsize)
+        offset = _align8(prev_off + len(preview) * preview.itemsize)
+        table.append(_COLUMN.pack(name.encode(), code.encode(), data_off, prev_off))
+        blobs.append((data_off, full))
+        blobs.append((prev_off, preview))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(COLUMNS), 0, rows, len(pick),
+                             created if created is not None else time.time()))
+        f.write(b"".join(table))
+        for off, arr in blobs:
+            f.write(b"\0" * (off - f.tell()))
+            f.write(arr.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)           # yarım dosya asla görünmesin
+    return path
+
+
+def convert_log(log_path):
+    """Write the .rcol for a closed roast log segment. Returns its path or None."""
+    try:
+        header, samples = read_segment(log_path)
+    except (OSError, ValueError):
+        return None
+    if header["start_reg"] != LOG_SPAN[0]:
+        return None
+
+    cols = {name: [] for name, _code in COLUMNS}
+    for s in samples:
+        if s.values is None:
+            continue
+        row = decode_log_row(s.values)
+        cols["ts"].append(s.ts)
+        cols["t"].append(float(row["time"]))
+        cols["bt"].append(decode_bt(row["bt"], cols["bt"][-1] if cols["bt"] else None))
+        cols["set"].append(row["set"])
+        cols["ror"].append(row["ror"])
+    if not cols["t"]:
+        return None
+    return write_columns(columns_path(log_path), cols, header["created"])
+
+
+class RoastColumns:
+    """
+    Read-only view of a .rcol file. Constant-time open (header only);
+    column(name) / preview(name) return views into the mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path}: empty file")
+
+        magic, version, ncols, _pad, rows, preview_rows, created = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a columnar roast file")
+        self.rows = rows
+        self.preview_rows = preview_rows
+        self.created = created
+
+        self._cols = {}
+        for i in range(ncols):
+            name, code, off, prev_off = _COLUMN.unpack_from(self._mm, _HEADER.size + i * _COLUMN.size)
+            self._cols[name.rstrip(b"\0").decode()] = (code.decode(), off, prev_off)
+
+    @property
+    def names(self):
+        return tuple(self._cols)
+
+    def _view(self, code, off, count):
+        if _numpy() is not None:
+            return np.frombuffer(self._mm, dtype="<f8" if code == "d" else "<f4", count=count, offset=off)
+        size = 8 if code == "d" else 4
+        return memoryview(self._mm)[off:off + count * size].cast(code)
+
+    def column(self, name):
+        code, off, _prev_off = self._cols[name]
+        return self._view(code, off, self.rows)
+
+    def preview(self, name):
+        code, _off, prev_off = self._cols[name]
+        return self._view(code, prev_off, self.preview_rows)
+
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            # dışarıda hâlâ view var (ör. plot referansı): mapping GC ile kapanır
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,221 @@
+"""
+Roast history: one SQLite row per recorded roast (summary + path of the
+roast log segment holding the samples), plus the roast events detected
+live (services.events) in `events`.
+
+Listing is keyset-paginated on (started, id), newest first, so every page
+is an index range scan no matter how many roasts are stored. Search
+filters (day / profile prefix, drop temperature range, date range) all
+hit an index.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from services.register_map import LOG_SPAN, decode_log_row
+from services.roast_log import is_closed, list_segments, read_segment
+from services.ror import decode_bt
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roasts (
+    id          INTEGER PRIMARY KEY,
+    path        TEXT NOT NULL UNIQUE,
+    started     REAL NOT NULL,
+    ended       REAL NOT NULL,
+    day         TEXT NOT NULL,
+    profile     TEXT,
+    set_c       REAL,
+    charge_bt   REAL,
+    drop_bt     REAL,
+    duration_s  INTEGER,
+    dry_s       INTEGER,
+    maillard_s  INTEGER,
+    dev_s       INTEGER,
+    peak_ror    REAL,
+    samples     INTEGER,
+    errors      INTEGER
+);
+CREATE INDEX IF NOT EXISTS roasts_started ON roasts (started, id);
+CREATE INDEX IF NOT EXISTS roasts_day ON roasts (day, started);
+CREATE INDEX IF NOT EXISTS roasts_profile ON roasts (profile, started);
+CREATE INDEX IF NOT EXISTS roasts_drop ON roasts (drop_bt, started);
+CREATE TABLE IF NOT EXISTS events (
+    roast_id    INTEGER NOT NULL,
+    kind        TEXT NOT NULL,
+    t           REAL NOT NULL,
+    bt          REAL,
+    PRIMARY KEY (roast_id, kind)
+);
+"""
+
+COLUMNS = ("id", "path", "started", "ended", "day", "profile", "set_c", "charge_bt",
+           "drop_bt", "duration_s", "dry_s", "maillard_s", "dev_s", "peak_ror",
+           "samples", "errors")
+
+
+def summarize(samples, start_reg=100, events=()):
+    """
+    Roast summary from a segment's samples (HR100..HR110 block).
+    Charge / drop BT come from the detected CHARGE / DROP events
+    (services.events) when there are any, otherwise from the first / last
+    good read; HR107..HR109 and duration are taken from the last read.
+    Returns None if no read succeeded.
+    """
+    if start_reg != LOG_SPAN[0]:
+        return None
+    rows = [decode_log_row(s.values) for s in samples if s.values is not None]
+    if not rows:
+        return None
+
+    first = rows[0]
+    last = rows[-1]
+    at = {kind: bt for kind, _t, bt in events if bt is not None}
+    return {
+        "started": samples[0].ts,
+        "ended": samples[-1].ts,
+        "set_c": first["set"],
+        "charge_bt": at.get("charge", decode_bt(first["bt"])),
+        "drop_bt": at.get("drop", decode_bt(last["bt"])),
+        "duration_s": int(last["time"]),
+        "dry_s": int(last["dry_s"]),
+        "maillard_s": int(last["maillard_s"]),
+        "dev_s": int(last["dev_s"]),
+        "peak_ror": max(r["ror"] for r in rows),
+        "samples": len(samples),
+        "errors": len(samples) - len(rows),
+    }
+
+
+class RoastHistory:
+    """
+    Thread-safe (one connection + lock): the roast log writer thread
+    ingests finished segments, the UI thread lists pages.
+    """
+
+    def __init__(self, path):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    # ---------- write ----------
+    def add(self, path, summary, profile=None, events=()):
+        """events: services.events.Event tuples (kind, t, bt)."""
+        row = dict(summary, path=path, profile=profile,
+                   day=time.strftime("%Y-%m-%d", time.localtime(summary["started"])))
+        cols = [c for c in COLUMNS if c != "id"]
+        sql = (f"INSERT OR REPLACE INTO roasts ({', '.join(cols)}) "
+               f"VALUES ({', '.join('?' * len(cols))})")
+        with self.lock, self.db:
+            # yeniden ingest: REPLACE yeni id verir, eski olaylar silinir
+            self.db.execute("DELETE FROM events WHERE roast_id IN (SELECT id FROM roasts WHERE path = ?)",
+                            (path,))
+            roast_id = self.db.execute(sql, [row.get(c) for c in cols]).lastrowid
+            self.db.executemany("INSERT OR REPLACE INTO events (roast_id, kind, t, bt) VALUES (?, ?, ?, ?)",
+                                [(roast_id, kind, t, bt) for kind, t, bt in events])
+            return roast_id
+
+    def ingest(self, log_path, profile=None, events=()):
+        """Summarize a closed roast log segment and store it. Returns row id or None."""
+        try:
+            header, samples = read_segment(log_path)
+        except (OSError, ValueError):
+            return None
+        summary = summarize(samples, header["start_reg"], events)
+        if summary is None:
+            return None
+        return self.add(log_path, summary, profile, events)
+
+    def sync_dir(self, directory):
+        """
+        Ingest sealed segments in `directory` not in the store yet (crash /
+        first run). Segments without the closed marker are still being
+        recorded and are left to the recorder's on_close.
+        """
+        with self.lock:
+            known = {r[0] for r in self.db.execute("SELECT path FROM roasts")}
+        n = 0
+        for path in list_segments(directory):
+            if path not in known and is_closed(path) and self.ingest(path) is not None:
+                n += 1
+        return n
+
+    # ---------- read ----------
+    @staticmethod
+    def _where(search=None, profile=None, drop_min=None, drop_max=None, since=None, until=None):
+        clauses = []
+        args = []
+        if search:
+            # gün ("2026-10", "2026-10-17") veya profil adı öneki; aralık sorgusu -> indeks
+            clauses.append("((day >= ? AND day < ?) OR (profile >= ? AND profile < ?))")
+            args += [search, search + "\uffff", search, search + "\uffff"]
+        if profile is not None:
+            clauses.append("profile = ?")
+            args.append(profile)
+        if drop_min is not None:
+            clauses.append("drop_bt >= ?")
+            args.append(drop_min)
+        if drop_max is not None:
+            clauses.append("drop_bt <= ?")
+            args.append(drop_max)
+        if since is not None:
+            clauses.append("started >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("started < ?")
+            args.append(until)
+        return clauses, args
+
+    def page(self, limit=50, after=None, **filters):
+        """
+        Newest first. after: (started, id) of the last row of the previous
+        page (None for the first page). Returns a list of dicts.
+        """
+        clauses, args = self._where(**filters)
+        if after is not None:
+            clauses.append("(started < ? OR (started = ? AND id < ?))")
+            args += [after[0], after[0], after[1]]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM roasts {where} ORDER BY started DESC, id DESC LIMIT ?"
+        with self.lock:
+            rows = self.db.execute(sql, args + [int(limit)]).fetchall()
+        return [dict(r) for r in rows]
+
+    def paths(self, **filters):
+        """Log paths of every matching roast, oldest first (export)."""
+        clauses, args = self._where(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.db.execute(f"SELECT path FROM roasts {where} ORDER BY started, id", args)
+            return [r[0] for r in rows]
+
+    def count(self, **filters):
+        clauses, args = self._where(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM roasts {where}", args).fetchone()[0]
+
+    def get(self, roast_id):
+        with self.lock:
+            row = self.db.execute("SELECT * FROM roasts WHERE id = ?", (roast_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def events(self, roast_id):
+        """Events of one roast in time order: [{"kind", "t", "bt"}]."""
+        with self.lock:
+            rows = self.db.execute("SELECT kind, t, bt FROM events WHERE roast_id = ? ORDER BY t",
+                                   (roast_id,)).fetchall()
+        return [dict(r) for r in rows]
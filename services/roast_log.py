@@ -0,0 +1,307 @@
+"""
+Append-only roast log: every polled HR100..HR110 block, one file per roast.
+
+File layout (little endian):
+
+    header  "RLOG" | version u8 | qty u8 | start_reg u16 | record_size u16 | created f64
+    record  ts f64 | err u8 | qty x u16        (31 bytes for the 11-register block)
+
+err is 0 for a good read, otherwise an ERR_CLASSES code (values are 0).
+A record cut short by a power loss is ignored by read_segment().
+
+A segment is finished once its "<name>.rlog.closed" marker exists: the
+recorder writes it atomically after the final fsync, and on start() it
+seals the segments a crash left open. Readers that summarize segments
+(RoastHistory.sync_dir) only take sealed ones.
+
+RoastRecorder.append() only queues the sample; a writer thread packs,
+writes through a buffered file and fsyncs every `fsync_s` seconds, so at
+most that much is lost and a slow disk never blocks the poll loop.
+"""
+
+import os
+import time
+import struct
+import threading
+from collections import deque
+
+from services.acquisition import Sample
+
+
+MAGIC = b"RLOG"
+VERSION = 1
+SUFFIX = ".rlog"
+CLOSED_SUFFIX = ".closed"
+
+_HEADER = struct.Struct("<4sBBHHd")
+
+# Sample.err öneki -> kod (1..); listede olmayan hatalar ERR_OTHER
+ERR_CLASSES = (
+    "short read", "crc error", "slave mismatch", "bad response", "exception",
+    "bytecount mismatch", "connect failed", "serial", "tcp", "qty out of range",
+    "bus error", "link down", "length mismatch",
+)
+ERR_OTHER = 255
+
+
+def err_code(err) -> int:
+    if err is None:
+        return 0
+    err = str(err)
+    for i, prefix in enumerate(ERR_CLASSES):
+        if err.startswith(prefix):
+            return i + 1
+    return ERR_OTHER
+
+
+def err_name(code: int):
+    if code == 0:
+        return None
+    if 1 <= code <= len(ERR_CLASSES):
+        return ERR_CLASSES[code - 1]
+    return "error"
+
+
+def record_struct(qty: int) -> struct.Struct:
+    return struct.Struct(f"<dB{qty}H")
+
+
+# ---------------- READER ----------------
+def read_header(path):
+    """-> {"version", "qty", "start_reg", "record_size", "created"}"""
+    with open(path, "rb") as f:
+        raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise ValueError(f"{path}: truncated header")
+    magic, version, qty, start_reg, record_size, created = _HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a roast log")
+    return {"version": version, "qty": qty, "start_reg": start_reg,
+            "record_size": record_size, "created": created}
+
+
+def iter_segment(path, chunk_rows=4096):
+    """Stream Sample(ts, values, err) from a segment, `chunk_rows` records per read."""
+    header = read_header(path)
+    rec = record_struct(header["qty"])
+    with open(path, "rb") as f:
+        f.seek(_HEADER.size)
+        while True:
+            data = f.read(rec.size * chunk_rows)
+            whole = len(data) - len(data) % rec.size     # yarım kalan son kayıt atılır
+            for r in rec.iter_unpack(memoryview(data)[:whole]):
+                code = r[1]
+                yield Sample(r[0], None if code else r[2:], err_name(code))
+            if len(data) < rec.size * chunk_rows:
+                return
+
+
+def read_segment(path):
+    """-> (header, [Sample(ts, values, err), ...]); err is the error class name."""
+    return read_header(path), list(iter_segment(path))
+
+
+def segment_rows(path):
+    """Record count from the file size (no read)."""
+    header = read_header(path)
+    return max(0, os.path.getsize(path) - _HEADER.size) // header["record_size"]
+
+
+def list_segments(directory):
+    """Roast log paths in `directory`, oldest first."""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(SUFFIX))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, n) for n in names]
+
+
+def closed_marker(path):
+    return path + CLOSED_SUFFIX
+
+
+def is_closed(path) -> bool:
+    return os.path.exists(closed_marker(path))
+
+
+def seal(path):
+    """Write the closed marker for `path` (tmp + rename: never half there)."""
+    marker = closed_marker(path)
+    tmp = marker + ".tmp"
+    with open(tmp, "wb"):
+        pass
+    os.replace(tmp, marker)
+
+
+# ---------------- RECORDER ----------------
+class RoastRecorder:
+    """
+    UI side: begin_segment() / append(sample) / end_segment(), all O(1);
+    start() / stop() around the app lifetime.
+
+    Samples appended while no segment is open are dropped. Write errors
+    (disk full, removed media) are kept in `.error` and the current
+    segment is abandoned; they never reach the caller.
+
+    on_close(path) runs on the writer thread after a segment is closed,
+    fsynced and sealed (e.g. RoastHistory.ingest). Segments left open by
+    a crash are sealed when the writer thread starts, without on_close.
+    """
+
+    def __init__(self, directory, start_reg=100, qty=11, flush_s=0.5, fsync_s=2.0,
+                 on_close=None):
+        self.directory = directory
+        self.on_close = on_close
+        self.start_reg = start_reg
+        self.qty = qty
+        self.flush_s = flush_s
+        self.fsync_s = fsync_s
+
+        self.active = False             # UI thread'in gördüğü segment durumu
+        self.path = None
+        self.error = None
+        self._stamp = None
+        self._seq = 0
+
+        self._rec = record_struct(qty)
+        self._queue = deque()           # ("open", path) | ("close", None) | Sample
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # writer thread state
+        self._file = None
+        self._last_sync = 0.0
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="roast-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=3.0):
+        self.end_segment()
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- UI side ----------
+    def begin_segment(self):
+        """Close the current segment (if any) and start a new file."""
+        if self.active:
+            self.end_segment()
+        self.path = self._new_path()
+        self.active = True
+        self._queue.append(("open", self.path))
+        self._wake.set()
+        return self.path
+
+    def end_segment(self):
+        if not self.active:
+            return
+        self.active = False
+        self._queue.append(("close", None))
+        self._wake.set()
+
+    def append(self, sample):
+        if self.active:
+            self._queue.append(sample)
+
+    def _new_path(self):
+        # dosya writer thread'de açılır: aynı saniyedeki segmentler sayaçla ayrılır
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._seq = self._seq + 1 if stamp == self._stamp else 1
+        self._stamp = stamp
+        while True:
+            suffix = f"_{self._seq:02d}" if self._seq > 1 else ""
+            path = os.path.join(self.directory, f"roast-{stamp}{suffix}{SUFFIX}")
+            if not os.path.exists(path):
+                return path
+            self._seq += 1
+
+    # ---------- writer thread ----------
+    def _run(self):
+        self._seal_orphans()
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            self._drain()
+            if self._file is not None and time.monotonic() - self._last_sync >= self.fsync_s:
+                self._sync()
+
+        self._drain()
+        self._close()
+
+    def _drain(self):
+        rec = self._rec
+        zeros = (0,) * self.qty
+        while self._queue:
+            item = self._queue.popleft()
+            try:
+                if isinstance(item, Sample):
+                    if self._file is None:
+                        continue
+                    code = err_code(item.err) if item.values is None else 0
+                    vals = zeros if code else item.values
+                    self._file.write(rec.pack(item.ts, code, *vals))
+                elif item[0] == "open":
+                    self._close()
+                    self._open(item[1])
+                else:
+                    self._close()
+            except (OSError, struct.error) as e:
+                self.error = f"{self._file.name if self._file else item}: {e}"
+                self._abandon()
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab", buffering=64 * 1024)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.qty, self.start_reg,
+                                      self._rec.size, time.time()))
+        self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def _close(self):
+        if self._file is None:
+            return
+        path = self._file.name
+        try:
+            self._sync()
+            self._file.close()
+            seal(path)
+        except OSError as e:
+            self.error = f"{path}: {e}"
+        self._file = None
+
+        if self.on_close is not None:
+            try:
+                self.on_close(path)
+            except Exception as e:
+                self.error = f"{path}: on_close: {e}"
+
+    def _abandon(self):
+        # yazılabilen kısım geçerli: segment yine de kapatılmış sayılır
+        try:
+            if self._file is not None:
+                self._file.close()
+                seal(self._file.name)
+        except OSError:
+            pass
+        self._file = None
+
+    def _seal_orphans(self):
+        # önceki çalışmadan (çökme / elektrik kesintisi) açık kalmış segmentler
+        for path in list_segments(self.directory):
+            if not is_closed(path):
+                try:
+                    seal(path)
+                except OSError as e:
+                    self.error = f"{path}: {e}"
@@ -0,0 +1,133 @@
+"""
+Host-side rate of rise (°C/min) over the BT stream.
+
+Methods (all O(1) amortized per sample, nothing re-scans the history):
+  "diff"  BT change across the window (oldest vs newest sample in it)
+  "lsq"   least-squares slope over the window (running sums, add/remove)
+  "ema"   exponentially smoothed point slope, time constant = window;
+          alpha is derived from the actual dt, so irregular polling is fine
+
+Timestamps are the read times (Sample.ts), not HR105: at 5 Hz several
+reads share one roast second.
+"""
+
+import math
+from collections import deque
+
+
+METHODS = ("diff", "lsq", "ema")
+
+
+def decode_bt(raw, prev=None):
+    """
+    HR104 -> °C. The controller sends BT x10 above 300 and plain °C at or
+    below it, so raw <= 300 is ambiguous (300 could be 300 °C or 30.0 °C).
+    With the previous BT known, the reading closer to it wins; without it
+    the plain value is used (the original rule).
+    """
+    raw = int(raw)
+    if raw > 300:
+        return raw / 10.0
+    if prev is not None and abs(raw / 10.0 - prev) < abs(raw - prev):
+        return raw / 10.0
+    return float(raw)
+
+
+class RorCalculator:
+    """
+    update(t, bt) -> RoR in °C/min, or None until the window has enough
+    data. A timestamp going backwards (new roast / rewind) resets the state;
+    repeated timestamps are ignored.
+    """
+
+    RESUM_EVERY = 4096      # kayan toplamları / zaman kökünü yenileme aralığı
+
+    def __init__(self, method="lsq", window_s=30.0, min_points=3):
+        if method not in METHODS:
+            raise ValueError(f"unknown RoR method: {method}")
+        self.method = method
+        self.window_s = float(window_s)
+        self.min_points = min_points
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self._win = deque()             # (t - t0, bt)
+        self._t0 = None
+        self._last = None               # (t, bt)
+        # lsq running sums
+        self._st = self._sb = self._stt = self._stb = 0.0
+        self._ops = 0
+
+    def update(self, t, bt):
+        if self._last is not None:
+            if t < self._last[0]:
+                self.reset()
+            elif t == self._last[0]:
+                return self.value
+        if self._t0 is None:
+            self._t0 = t
+
+        if self.method == "ema":
+            self.value = self._ema(t, bt)
+        else:
+            self._push(t - self._t0, bt)
+            self.value = self._diff() if self.method == "diff" else self._lsq()
+        self._last = (t, bt)
+        return self.value
+
+    # ---------- window ----------
+    def _push(self, x, bt):
+        win = self._win
+        win.append((x, bt))
+        self._add(x, bt, 1.0)
+        # pencere dışında kalanlar (en az iki nokta kalsın)
+        while len(win) > 2 and x - win[1][0] >= self.window_s:
+            ox, ob = win.popleft()
+            self._add(ox, ob, -1.0)
+
+        self._ops += 1
+        if self._ops >= self.RESUM_EVERY:
+            # x'leri pencere başına kaydır (büyük t^2 -> hassasiyet kaybı) ve toplamları baştan kur
+            self._ops = 0
+            shift = win[0][0]
+            self._t0 += shift
+            self._win = win = deque((px - shift, pb) for px, pb in win)
+            self._st = sum(p[0] for p in win)
+            self._sb = sum(p[1] for p in win)
+            self._stt = sum(p[0] * p[0] for p in win)
+            self._stb = sum(p[0] * p[1] for p in win)
+
+    def _add(self, x, bt, sign):
+        if self.method == "lsq":
+            self._st += sign * x
+            self._sb += sign * bt
+            self._stt += sign * x * x
+            self._stb += sign * x * bt
+
+    def _diff(self):
+        win = self._win
+        if len(win) < self.min_points:
+            return None
+        (x0, b0), (x1, b1) = win[0], win[-1]
+        return (b1 - b0) / (x1 - x0) * 60.0
+
+    def _lsq(self):
+        n = len(self._win)
+        if n < self.min_points:
+            return None
+        den = n * self._stt - self._st * self._st
+        if den <= 0:
+            return None
+        return (n * self._stb - self._st * self._sb) / den * 60.0
+
+    # ---------- ema ----------
+    def _ema(self, t, bt):
+        if self._last is None:
+            return None
+        dt = t - self._last[0]
+        inst = (bt - self._last[1]) / dt * 60.0
+        if self.value is None:
+            return inst
+        alpha = 1.0 - math.exp(-dt / self.window_s)
+        return self.value + alpha * (inst - self.value)
@@ -0,0 +1,438 @@
+"""
+Simulated roaster controller for running the app and benchmarks without
+hardware on COM5.
+
+    python -m services.simulator --tcp 5020                # Modbus TCP
+    python -m services.simulator --tcp 5020 --rtu          # RTU over TCP
+    python -m services.simulator --pty --baud 9600         # virtual serial port (Linux)
+    python -m services.simulator --tcp 5020 --replay roast.csv --speed 20
+
+then start the app with ROASTER_MODBUS=tcp://127.0.0.1:5020 (or the
+printed pty path).
+
+Register sources (anything with read(start, qty) / write(reg, value) /
+write_many(start, values), the last one all or nothing):
+RoastModel (live roast curve), ReplaySource (recorded session).
+"""
+
+import os
+import csv
+import time
+import struct
+import random
+import select
+import argparse
+import threading
+from bisect import bisect_right
+
+from services.modbus_server import ModbusTcpServer
+
+
+START_REG = 100
+QTY = 11                            # HR100..HR110
+
+REG_SET = 100
+REG_AIRFLOW = 101
+REG_BURNER = 102
+REG_DRUM = 103
+REG_BT = 104
+REG_TIME = 105
+REG_PROFILE = 106
+REG_DRYTIME = 107
+REG_MILTIME = 108
+REG_DEVTIME = 109
+REG_ROR = 110
+REG_BT_F32 = 111                    # HR111..HR112 (float BT'li firmware)
+_WRITABLE = (REG_SET, REG_AIRFLOW, REG_DRUM, REG_PROFILE)
+
+
+# ---------------- ROAST MODEL ----------------
+class RoastModel:
+    """
+    HR100..HR110 driven by a two-stage thermal model:
+    bean mass heats towards SET, the BT probe lags a bean/air mix. Charging
+    cold beans into a preheated drum gives the usual turning point (~100 °C
+    around 1 min), then a slowly declining RoR; first crack near 9-10 min.
+
+    HR100 SET (x10, writable), HR101 airflow (Pa, writable), HR102 burner
+    (%, follows SET - BT), HR103 drum speed (Hz x10, writable), HR104 BT
+    (x10), HR105 roast time (s), HR106 profile (writable: 1 start, 0 stop),
+    HR107..HR109 dry / maillard / development time (s), HR110 RoR (x10,
+    °C/min, clamped at 0 like the controller), HR111..HR112 BT as float32
+    (high word first).
+
+    speed > 1 runs the roast faster than wall clock.
+    """
+
+    DRY_END_C = 150.0
+    FIRST_CRACK_C = 196.0
+
+    def __init__(self, set_c=230.0, charge_c=200.0, bean_c=25.0,
+                 k_bean=1 / 400.0, k_probe=1 / 20.0, air_mix=0.25, speed=1.0, autostart=False):
+        self.set_c = set_c
+        self.charge_c = charge_c
+        self.bean_c = bean_c
+        self.k_bean = k_bean
+        self.k_probe = k_probe
+        self.air_mix = air_mix          # prob ne kadar sıcak havayı görüyor
+        self.speed = float(speed)
+
+        self.lock = threading.Lock()
+        self.airflow_pa = 168
+        self.drum_hz = 50.0
+        self._last = None
+        self._idle()
+        if autostart:
+            self._start()
+
+    # ---------- state ----------
+    def _idle(self):
+        self.running = False
+        self.t = 0.0
+        self.probe = self.charge_c
+        self.beans = self.charge_c
+        self.ror = 0.0
+        self.phase = 0                  # 0 dry, 1 maillard, 2 development
+        self.dry_s = 0.0
+        self.mil_s = 0.0
+        self.dev_s = 0.0
+
+    def _start(self):
+        self._idle()
+        self.running = True
+        self.beans = self.bean_c
+
+    def _advance(self, now):
+        if self._last is None:
+            self._last = now
+            return
+        left = (now - self._last) * self.speed
+        self._last = now
+
+        # 0.25 s alt adımlar: hızlandırılmış modda da kararlı
+        while left > 0:
+            dt = min(0.25, left)
+            left -= dt
+            if not self.running:
+                # kavurma yokken tambur ön ısıtmada
+                self.probe += (self.charge_c - self.probe) * self.k_probe * dt
+                continue
+
+            self.t += dt
+            self.beans += (self.set_c - self.beans) * self.k_bean * dt
+            prev = self.probe
+            seen = self.beans + self.air_mix * (self.set_c - self.beans)
+            self.probe += (seen - self.probe) * self.k_probe * dt
+
+            # RoR (°C/min), ~10 s EMA
+            inst = (self.probe - prev) / dt * 60.0
+            self.ror += (inst - self.ror) * min(1.0, dt / 10.0)
+
+            # faz geçişleri dönüm noktasından sonra (prob şarjda sıcak başlar)
+            if self.phase == 0 and self.ror > 0 and self.probe >= self.DRY_END_C:
+                self.phase = 1
+            elif self.phase == 1 and self.probe >= self.FIRST_CRACK_C:
+                self.phase = 2
+
+            if self.phase == 0:
+                self.dry_s += dt
+            elif self.phase == 1:
+                self.mil_s += dt
+            else:
+                self.dev_s += dt
+
+    def registers(self):
+        return {
+            REG_SET: int(round(self.set_c * 10)),
+            REG_AIRFLOW: int(self.airflow_pa),
+            REG_BURNER: int(max(0.0, min(100.0, 20.0 + (self.set_c - self.probe) * 1.5))),
+            REG_DRUM: int(round(self.drum_hz * 10)),
+            REG_BT: int(round(self.probe * 10)),
+            REG_TIME: int(self.t),
+            REG_PROFILE: 1 if self.running else 0,
+            REG_DRYTIME: int(self.dry_s),
+            REG_MILTIME: int(self.mil_s),
+            REG_DEVTIME: int(self.dev_s),
+            REG_ROR: max(0, int(round(self.ror * 10))),
+            **dict(zip((REG_BT_F32, REG_BT_F32 + 1), struct.unpack(">HH", struct.pack(">f", self.probe)))),
+        }
+
+    # ---------- register source API ----------
+    def read(self, start_reg, qty):
+        with self.lock:
+            self._advance(time.monotonic())
+            regs = self.registers()
+        try:
+            return [regs[start_reg + i] & 0xFFFF for i in range(qty)]
+        except KeyError:
+            return None
+
+    def write(self, reg, value) -> bool:
+        return self.write_many(reg, (value,))
+
+    def write_many(self, start_reg, values) -> bool:
+        regs = range(start_reg, start_reg + len(values))
+        if not all(r in _WRITABLE for r in regs):
+            return False
+        with self.lock:
+            self._advance(time.monotonic())
+            for reg, value in zip(regs, values):
+                self._apply(reg, value)
+        return True
+
+    def _apply(self, reg, value):
+        if reg == REG_SET:
+            self.set_c = value / 10.0
+        elif reg == REG_PROFILE:
+            if value == 1 and not self.running:
+                self._start()
+            elif value == 0 and self.running:
+                self._idle()
+        elif reg == REG_AIRFLOW:
+            self.airflow_pa = value
+        elif reg == REG_DRUM:
+            self.drum_hz = value / 10.0
+
+
+# ---------------- REPLAY ----------------
+def load_session(path):
+    """CSV written by record_session(): t,HR100..HR110 -> [(t, [values...]), ...]"""
+    out = []
+    with open(path, newline="") as f:
+        rows = csv.reader(f)
+        next(rows, None)                # header
+        for row in rows:
+            if not row:
+                continue
+            out.append((float(row[0]), [int(v) for v in row[1:]]))
+    return out
+
+
+def record_session(client, path, seconds, rate_hz=5.0, start_reg=START_REG, qty=QTY):
+    """Poll a live controller (or a simulator) and save a replayable CSV session."""
+    period = 1.0 / rate_hz
+    t0 = time.monotonic()
+    tick = 0
+    n = 0
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t"] + [f"HR{start_reg + i}" for i in range(qty)])
+        while time.monotonic() - t0 < seconds:
+            vals, _err = client.read_holding_n(start_reg, qty)
+            if vals is not None:
+                w.writerow([f"{time.monotonic() - t0:.3f}"] + vals)
+                n += 1
+            tick += 1
+            time.sleep(max(0.0, t0 + tick * period - time.monotonic()))
+    return n
+
+
+class ReplaySource:
+    """
+    Plays recorded (t, [HR100..HR110]) samples back as a register source at
+    `speed` x real time (1..100). Writes are kept as overrides on top of the
+    recording, so keypad / profile writes still round-trip.
+    """
+
+    def __init__(self, samples, speed=1.0, loop=True, start_reg=START_REG):
+        if not samples:
+            raise ValueError("empty session")
+        self.samples = list(samples)
+        self.times = [t for t, _ in self.samples]
+        self.speed = max(1.0, min(100.0, float(speed)))
+        self.loop = loop
+        self.start_reg = start_reg
+        self.lock = threading.Lock()
+        self._over = {}
+        self._t0 = time.monotonic()
+
+    def _current(self):
+        t = (time.monotonic() - self._t0) * self.speed + self.times[0]
+        span = self.times[-1] - self.times[0]
+        if self.loop and span > 0 and t > self.times[-1]:
+            t = self.times[0] + (t - self.times[0]) % span
+        i = max(0, bisect_right(self.times, t) - 1)
+        return self.samples[i][1]
+
+    def read(self, start_reg, qty):
+        with self.lock:
+            vals = self._current()
+            over = dict(self._over)
+        out = []
+        for reg in range(start_reg, start_reg + qty):
+            if reg in over:
+                out.append(over[reg])
+                continue
+            i = reg - self.start_reg
+            if not 0 <= i < len(vals):
+                return None
+            out.append(vals[i] & 0xFFFF)
+        return out
+
+    def write(self, reg, value) -> bool:
+        return self.write_many(reg, (value,))
+
+    def write_many(self, start_reg, values) -> bool:
+        n = len(self.samples[0][1])
+        if not (0 <= start_reg - self.start_reg and start_reg - self.start_reg + len(values) <= n):
+            return False
+        with self.lock:
+            for i, value in enumerate(values):
+                self._over[start_reg + i] = value & 0xFFFF
+        return True
+
+
+# ---------------- FAULTS ----------------
+class Faults:
+    """
+    latency / jitter: reply delay in seconds (uniform jitter on top)
+    crc_rate: flip the CRC of a reply (RTU framing only)
+    short_rate: truncate a reply
+    exception_rate: answer with exception `exception_code` (0x04 = slave device failure)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, crc_rate=0.0, short_rate=0.0,
+                 exception_rate=0.0, exception_code=0x04, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.crc_rate = crc_rate
+        self.short_rate = short_rate
+        self.exception_rate = exception_rate
+        self.exception_code = exception_code
+        self.rng = random.Random(seed)
+
+
+# ---------------- DEVICE ----------------
+class SimulatedRoaster(ModbusTcpServer):
+    """
+    Modbus slave backed by a register source, with fault injection.
+    start() serves TCP (Modbus TCP or, with rtu=True, RTU over TCP);
+    serve_pty() serves RTU on a pseudo-terminal usable as a serial port.
+    baud paces replies at wire speed (None = as fast as possible).
+    """
+
+    def __init__(self, source=None, faults=None, slave=2, host="127.0.0.1", port=0,
+                 rtu=False, baud=None):
+        super().__init__(source if source is not None else RoastModel(), host, port, slave, rtu)
+        self.faults = faults or Faults()
+        self.baud = baud
+        self._pty = None
+        self._pty_stop = threading.Event()
+        self._pty_thread = None
+
+    # ---------- faults ----------
+    def handle_pdu(self, slave, pdu):
+        f = self.faults
+        if f.exception_rate and f.rng.random() < f.exception_rate:
+            if self.slave is None or slave == self.slave:
+                return bytes((pdu[0] | 0x80, f.exception_code))
+        return super().handle_pdu(slave, pdu)
+
+    def reply_frame(self, frame, rtu):
+        f = self.faults
+        delay = f.latency + (f.rng.uniform(0.0, f.jitter) if f.jitter else 0.0)
+        if self.baud:
+            delay += len(frame) * 11.0 / self.baud
+        if delay > 0:
+            time.sleep(delay)
+
+        if f.short_rate and f.rng.random() < f.short_rate:
+            return frame[:f.rng.randrange(1, len(frame))]
+        if rtu and f.crc_rate and f.rng.random() < f.crc_rate:
+            return frame[:-1] + bytes((frame[-1] ^ 0xFF,))
+        return frame
+
+    # ---------- virtual serial ----------
+    def serve_pty(self) -> str:
+        """Serve RTU on a new pty; returns the device path to open with pyserial."""
+        import tty
+
+        master, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        self._pty = (master, slave_fd)
+        self._pty_stop.clear()
+
+        def recv(n):
+            buf = bytearray()
+            while len(buf) < n:
+                if self._pty_stop.is_set():
+                    return None
+                ready, _, _ = select.select([master], [], [], 0.2)
+                if ready:
+                    buf += os.read(master, n - len(buf))
+            return bytes(buf)
+
+        def send(data):
+            os.write(master, data)
+
+        def run():
+            try:
+                self._serve_rtu(recv, send)
+            except OSError:
+                pass
+
+        self._pty_thread = threading.Thread(target=run, name="modbus-sim-pty", daemon=True)
+        self._pty_thread.start()
+        return os.ttyname(slave_fd)
+
+    def stop(self):
+        super().stop()
+        if self._pty is not None:
+            self._pty_stop.set()
+            if self._pty_thread is not None:
+                self._pty_thread.join(1.0)
+            for fd in self._pty:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._pty = None
+        self._pty_thread = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulated roaster (Modbus slave)")
+    ap.add_argument("--tcp", type=int, metavar="PORT", help="serve on 127.0.0.1:PORT")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--rtu", action="store_true", help="RTU framing over TCP (gateway)")
+    ap.add_argument("--pty", action="store_true", help="serve RTU on a virtual serial port")
+    ap.add_argument("--slave", type=int, default=2)
+    ap.add_argument("--baud", type=int, default=None, help="pace replies at this wire speed")
+    ap.add_argument("--speed", type=float, default=1.0, help="roast / replay speed (1..100)")
+    ap.add_argument("--autostart", action="store_true", help="start a roast immediately")
+    ap.add_argument("--replay", metavar="CSV", help="replay a recorded session instead of the model")
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--crc", type=float, default=0.0, help="CRC corruption rate")
+    ap.add_argument("--short", type=float, default=0.0, help="short read rate")
+    ap.add_argument("--exc", type=float, default=0.0, help="exception reply rate")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    if args.replay:
+        source = ReplaySource(load_session(args.replay), speed=args.speed)
+    else:
+        source = RoastModel(speed=args.speed, autostart=args.autostart)
+
+    faults = Faults(args.latency, args.jitter, args.crc, args.short, args.exc, seed=args.seed)
+    sim = SimulatedRoaster(source, faults, slave=args.slave, host=args.host,
+                           port=args.tcp or 0, rtu=args.rtu, baud=args.baud)
+
+    if args.pty:
+        print(f"ROASTER_MODBUS={sim.serve_pty()}", flush=True)
+    if args.tcp is not None or not args.pty:
+        host, port = sim.start()
+        scheme = "rtu+tcp" if args.rtu else "tcp"
+        print(f"ROASTER_MODBUS={scheme}://{host}:{port}", flush=True)
+
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
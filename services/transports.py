@@ -0,0 +1,357 @@
+"""
+Transports move one request PDU to a slave and bring its reply PDU back.
+
+    exchange(slave, pdu, resp_len) -> (reply_pdu, None) | (None, err)
+    exchange_many([(slave, pdu, resp_len), ...]) -> [(reply_pdu, err), ...]
+
+resp_len is the expected reply PDU length (fc + data); framing errors
+("short read", "length mismatch", "crc error", "slave mismatch",
+"serial: ..." / "tcp: ...")
+are reported here, Modbus exceptions are left to ModbusClient.
+"""
+
+import time
+import socket
+import struct
+import threading
+
+import serial
+from serial.serialutil import SerialException
+
+from services.modbus_frames import EXC_FRAME_LEN, rtu_check, rtu_frame
+
+
+# ---------------- SERIAL RTU ----------------
+class SerialTransport:
+    """
+    Modbus RTU on a local serial port.
+
+    timeout: slave turnaround budget (request sent -> first bytes back).
+    rx_margin: slack on top of wire time for USB-RS485 adapter buffering
+    (FTDI latency timer defaults to 16 ms).
+    """
+
+    pipelined = False
+    # port timeout'u sabit: her okumada ser.timeout atamak tcsetattr demek.
+    # Süre sınırı _read_timed'ın deadline'ı, aşım en fazla bir dilim
+    READ_SLICE = 0.005
+
+    def __init__(self, port="COM5", baud=9600, timeout=1.5, rx_margin=0.02):
+        self.port = port
+        self.baud = baud
+        self.timeout = timeout
+        self.rx_margin = rx_margin
+        self.ser = None
+
+        self._last_io = 0.0         # monotonic, son frame'in bittiği an
+
+    @property
+    def is_open(self) -> bool:
+        return self.ser is not None and self.ser.is_open
+
+    def open(self) -> bool:
+        try:
+            self.ser = serial.Serial(
+                self.port, self.baud,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                bytesize=serial.EIGHTBITS,
+                timeout=self.READ_SLICE
+            )
+            time.sleep(0.08)
+            return True
+        except SerialException:
+            self.ser = None
+            return False
+
+    def close(self):
+        try:
+            if self.ser:
+                self.ser.close()
+        except Exception:
+            pass
+        self.ser = None
+
+    # ---------- RTU timing ----------
+    @property
+    def char_time(self) -> float:
+        # 11 bit/char (start + 8 data + parity/stop + stop) per RTU spec
+        return 11.0 / float(self.baud)
+
+    @property
+    def t35(self) -> float:
+        # spec: 19200 baud üstünde sabit 1.75 ms
+        if self.baud > 19200:
+            return 0.00175
+        return 3.5 * self.char_time
+
+    def wire_time(self, nbytes: int) -> float:
+        return nbytes * self.char_time
+
+    def _wait_silence(self):
+        """Keep the 3.5-char inter-frame gap before the next request."""
+        gap = self._last_io + self.t35 - time.monotonic()
+        if gap > 0:
+            time.sleep(gap)
+
+    # ---------- framing ----------
+    def _read_timed(self, n: int, budget: float) -> bytearray:
+        """Blocking read of n bytes within `budget` seconds (monotonic deadline)."""
+        ser = self.ser
+        buf = bytearray()
+        deadline = time.monotonic() + budget
+        while len(buf) < n and time.monotonic() < deadline:
+            buf += ser.read(n - len(buf))     # en fazla READ_SLICE bekler
+        return buf
+
+    def _read_frame(self, expected_len: int) -> bytes:
+        """
+        Read a reply sized from the request:
+        first the 5-byte header (waits for slave turnaround), which is
+        already a whole frame if it is an exception response; then the rest
+        with a budget of its wire time + 3.5 chars + rx_margin.
+        """
+        head_n = min(EXC_FRAME_LEN, expected_len)
+        buf = self._read_timed(head_n, self.timeout + self.wire_time(head_n))
+        if len(buf) < head_n or (buf[1] & 0x80) or expected_len <= head_n:
+            return bytes(buf)
+
+        rest = expected_len - head_n
+        buf += self._read_timed(rest, self.wire_time(rest) + self.t35 + self.rx_margin)
+        return bytes(buf)
+
+    def exchange(self, slave: int, pdu: bytes, resp_len: int):
+        expected_len = 1 + resp_len + 2     # addr + pdu + crc
+        try:
+            self._wait_silence()
+            self.ser.reset_input_buffer()
+            self.ser.write(rtu_frame(slave, pdu))
+            self.ser.flush()
+            resp = self._read_frame(expected_len)
+        except SerialException as e:
+            self.close()
+            return None, f"serial: {e}"
+        finally:
+            self._last_io = time.monotonic()
+
+        return rtu_check(resp, slave, expected_len)
+
+    def exchange_many(self, items):
+        # tek hat, half-duplex: sırayla
+        return [self.exchange(*it) for it in items]
+
+
+# ---------------- TCP CONNECTION POOL ----------------
+class _TcpConnection:
+    """
+    One persistent socket, shared by every transport pointed at the same
+    host:port. Timeouts belong to the transports: each passes its own to
+    open() and recv_timed().
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.refs = 0
+        self.lock = threading.Lock()
+        self._tid = 0
+
+    def open(self, timeout) -> bool:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock = sock
+            return True
+        except OSError:
+            self.sock = None
+            return False
+
+    def reset(self):
+        # kısmi okuma / hata sonrası akış senkronu kaybolur: bağlantıyı at, sonra yeniden aç
+        try:
+            if self.sock:
+                self.sock.close()
+        except Exception:
+            pass
+        self.sock = None
+
+    def next_tid(self) -> int:
+        self._tid = (self._tid + 1) & 0xFFFF
+        return self._tid
+
+    def recv_timed(self, n: int, budget: float) -> bytearray:
+        buf = bytearray()
+        deadline = time.monotonic() + budget
+        while len(buf) < n:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.sock.settimeout(remaining)
+            try:
+                chunk = self.sock.recv(n - len(buf))
+            except socket.timeout:
+                break
+            if not chunk:
+                raise ConnectionError("connection closed by peer")
+            buf += chunk
+        return buf
+
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+def _acquire(host, port) -> _TcpConnection:
+    with _pool_lock:
+        conn = _pool.get((host, port))
+        if conn is None:
+            conn = _pool[(host, port)] = _TcpConnection(host, port)
+        conn.refs += 1
+        return conn
+
+
+def _release(conn: _TcpConnection):
+    with _pool_lock:
+        conn.refs -= 1
+        if conn.refs <= 0:
+            conn.reset()
+            _pool.pop((conn.host, conn.port), None)
+
+
+class _TcpTransportBase:
+    def __init__(self, host, port, timeout=1.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.baud = None            # hat hızı sınırı yok
+        self._conn = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None and self._conn.sock is not None
+
+    def open(self) -> bool:
+        if self._conn is None:
+            self._conn = _acquire(self.host, self.port)
+        with self._conn.lock:
+            return self._conn.sock is not None or self._conn.open(self.timeout)
+
+    def close(self):
+        if self._conn is not None:
+            _release(self._conn)
+        self._conn = None
+
+
+# ---------------- RTU OVER TCP ----------------
+class RtuOverTcpTransport(_TcpTransportBase):
+    """RTU frames (with CRC) tunnelled through a transparent serial-to-Ethernet gateway."""
+
+    # gateway arkasında yine tek RS-485 hattı var, istekleri üst üste göndermek güvenli değil
+    pipelined = False
+
+    def exchange(self, slave: int, pdu: bytes, resp_len: int):
+        conn = self._conn
+        expected_len = 1 + resp_len + 2
+        with conn.lock:
+            if conn.sock is None and not conn.open(self.timeout):
+                return None, "connect failed"
+            try:
+                conn.sock.sendall(rtu_frame(slave, pdu))
+                head_n = min(EXC_FRAME_LEN, expected_len)
+                buf = conn.recv_timed(head_n, self.timeout)
+                if len(buf) == head_n and not (buf[1] & 0x80) and expected_len > head_n:
+                    buf += conn.recv_timed(expected_len - head_n, self.timeout)
+            except OSError as e:
+                conn.reset()
+                return None, f"tcp: {e}"
+
+            pdu_resp, err = rtu_check(bytes(buf), slave, expected_len)
+            if err:
+                conn.reset()
+            return pdu_resp, err
+
+    def exchange_many(self, items):
+        return [self.exchange(*it) for it in items]
+
+
+# ---------------- MODBUS TCP ----------------
+_MBAP = struct.Struct(">HHHB")      # tid, protocol id (0), length, unit id
+
+
+class TcpTransport(_TcpTransportBase):
+    """
+    Modbus TCP (MBAP header). Requests carry transaction ids, so
+    exchange_many() keeps up to `max_inflight` requests outstanding on one
+    connection and matches replies by tid.
+    """
+
+    pipelined = True
+
+    def __init__(self, host, port=502, timeout=1.0, max_inflight=8):
+        super().__init__(host, port, timeout)
+        self.max_inflight = max(1, int(max_inflight))
+
+    def exchange(self, slave: int, pdu: bytes, resp_len: int):
+        return self.exchange_many([(slave, pdu, resp_len)])[0]
+
+    def exchange_many(self, items):
+        results = [None] * len(items)
+        conn = self._conn
+        with conn.lock:
+            if conn.sock is None and not conn.open(self.timeout):
+                return [(None, "connect failed")] * len(items)
+            for i0 in range(0, len(items), self.max_inflight):
+                chunk = items[i0:i0 + self.max_inflight]
+                # önceki chunk'ta cevapsız istek kaldıysa bağlantı atıldı: yeniden aç
+                if conn.sock is None and not conn.open(self.timeout):
+                    for i in range(i0, len(items)):
+                        results[i] = (None, "connect failed")
+                    break
+                try:
+                    self._pipeline(conn, chunk, results, i0)
+                except OSError as e:
+                    conn.reset()
+                    for i in range(i0, len(items)):
+                        if results[i] is None:
+                            results[i] = (None, f"tcp: {e}")
+                    break
+        return results
+
+    def _pipeline(self, conn, chunk, results, base):
+        pending = {}                # tid -> (index, slave, resp_len)
+        out = bytearray()
+        for k, (slave, pdu, resp_len) in enumerate(chunk):
+            tid = conn.next_tid()
+            pending[tid] = (base + k, slave, resp_len)
+            out += _MBAP.pack(tid, 0, len(pdu) + 1, slave) + pdu
+        conn.sock.sendall(out)
+
+        while pending:
+            head = conn.recv_timed(_MBAP.size, self.timeout)
+            if len(head) < _MBAP.size:
+                break
+            tid, proto, length, unit = _MBAP.unpack(head)
+            body = conn.recv_timed(length - 1, self.timeout) if length > 1 else bytearray()
+            if len(body) < length - 1:
+                break
+
+            entry = pending.pop(tid, None)
+            if entry is None:
+                continue            # eski/yabancı cevap, at
+            idx, slave, resp_len = entry
+
+            if proto != 0:
+                results[idx] = (None, "bad response")
+            elif unit != slave:
+                results[idx] = (None, "slave mismatch")
+            elif len(body) != resp_len and not (len(body) == 2 and body[0] & 0x80):
+                results[idx] = (None, f"length mismatch {len(body)}/{resp_len}")
+            else:
+                results[idx] = (bytes(body), None)
+
+        if pending:
+            # cevabı gelmeyenler: akış artık güvenilmez
+            conn.reset()
+            for idx, _slave, resp_len in pending.values():
+                results[idx] = (None, f"short read 0/{resp_len}")
@@ -0,0 +1,57 @@
+import pytest
+
+from services.events import EventDetector
+
+
+def _curve():
+    """1 Hz sentetik kavurma: ön ısıtma, şarj düşüşü, 12 °C/dk yükseliş, FC'de RoR çukuru, boşaltma."""
+    for t in range(0, 10):
+        yield t, 200.0, 0.0
+    for t in range(10, 90):
+        yield t, 200.0 - 110.0 * (t - 10) / 79, -80.0
+    for t in range(90, 650):
+        bt = 90.0 + 0.2 * (t - 90)
+        if t < 570:
+            ror = 12.0
+        elif t < 590:
+            ror = 12.0 - 0.1 * (t - 569)        # çatlama başı: RoR düşer
+        else:
+            ror = 10.0 + 0.1 * (t - 589)        # ve geri döner
+        yield t, bt, ror
+    for t in range(650, 670):
+        yield t, 201.8 - (t - 649), -60.0
+
+
+def test_events_on_synthetic_roast():
+    det = EventDetector()
+    seen = [ev for t, bt, ror in _curve() for ev in [det.update(t, bt, ror)] if ev is not None]
+    assert [e.kind for e in seen] == ["charge", "tp", "dry_end", "first_crack", "drop"]
+    assert seen == det.events
+    charge, tp, dry, fc, drop = seen
+    # charge ve drop tepe noktasına, TP minimuma yerleşir
+    assert (charge.t, charge.bt) == (10, 200.0)
+    assert tp.t == 89 and tp.bt == pytest.approx(90.0)
+    assert dry.t in (390, 391) and dry.bt >= 150.0
+    # FC: RoR düşüşünün başladığı yer (fc_max_c yedeği değil)
+    assert 570 <= fc.t <= 575 and fc.bt < det.fc_max_c
+    assert drop.t == 649 and drop.bt == pytest.approx(201.8)
+    assert det.stop() is None
+
+
+def test_stop_places_drop_at_last_sample():
+    det = EventDetector()
+    for t, bt, ror in _curve():
+        if t > 500:
+            break
+        det.update(t, bt, ror)
+    ev = det.stop()
+    assert ev.kind == "drop" and ev.t == 500
+    assert det.stage == "done"
+
+
+def test_charge_without_drop_after_window():
+    # roast ortasında açılan panel: düşüş yok, ilk örnek charge
+    det = EventDetector()
+    evs = [det.update(t, 120.0 + 0.2 * t, 12.0) for t in range(0, 70)]
+    charge = [e for e in evs if e is not None][0]
+    assert charge.kind == "charge" and charge.t == 0
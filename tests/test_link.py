@@ -0,0 +1,103 @@
+import time
+
+from services.link import CONNECTED, CONNECTING, DEGRADED, DOWN, LinkSupervisor
+
+
+class _Client:
+    """ModbusClient yerine: connect() sonucu test'ten ayarlanır."""
+
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.connects = 0
+        self.closes = 0
+        self.supervisor = None
+
+    def connect(self):
+        self.connects += 1
+        return self.ok
+
+    def close(self):
+        self.closes += 1
+
+
+def _wait(link, state, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while link.state != state and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return link.state
+
+
+def test_starts_connecting_not_down():
+    client = _Client()
+    link = LinkSupervisor(client)
+    assert client.supervisor is link
+    # I/O başlamadan kırmızı "down" yok
+    assert link.state == CONNECTING and not link.up
+    link.start()
+    try:
+        assert _wait(link, CONNECTED) == CONNECTED
+        assert [ev.state for ev in link.events()] == [CONNECTED]
+    finally:
+        link.stop()
+
+
+def test_first_connect_failure_goes_down_then_recovers():
+    client = _Client(ok=False)
+    link = LinkSupervisor(client, base_s=0.01, max_s=0.02)
+    link.start()
+    try:
+        assert _wait(link, DOWN) == DOWN
+        assert link.detail.startswith("connect failed")
+        client.ok = True
+        assert _wait(link, CONNECTED) == CONNECTED
+        assert client.connects >= 2
+    finally:
+        link.stop()
+
+
+def test_transitions_from_reports():
+    client = _Client()
+    link = LinkSupervisor(client)
+    link.state = CONNECTED
+
+    link.report("exception 0x02")       # cihaz cevap verdi: hat hatası değil
+    link.report("short read 0/23")
+    assert link.state == CONNECTED
+    link.report("crc error")
+    assert link.state == DEGRADED and link.up
+
+    for _ in range(LinkSupervisor.RECOVER_AFTER):
+        link.report(None)
+    assert link.state == CONNECTED
+
+    for _ in range(LinkSupervisor.DOWN_AFTER):
+        link.report("short read 0/23")
+    assert link.state == DOWN and not link.up
+    assert client.closes == 1 and link.attempts == 1
+
+    # down iken client'ın kendi "link down" cevapları sayılmaz
+    link.report("link down")
+    assert client.closes == 1
+
+
+def test_connect_failed_goes_down_at_once():
+    link = LinkSupervisor(_Client())
+    link.state = CONNECTED
+    link.report("connect failed")
+    assert link.state == DOWN
+
+
+def test_backoff_doubles_with_jitter_and_cap():
+    link = LinkSupervisor(_Client(), base_s=0.25, max_s=2.0, seed=1)
+    for attempt in range(8):
+        now = time.monotonic()
+        link._schedule_retry()
+        delay = link.retry_at - now
+        cap = min(2.0, 0.25 * 2 ** attempt)
+        assert 0.5 * cap - 0.01 <= delay <= cap + 0.01
+    assert link.attempts == 8
+
+    # cihaz gerçekten cevap verince backoff sıfırlanır
+    for _ in range(LinkSupervisor.RECOVER_AFTER):
+        link.report(None)
+    assert link.attempts == 0
@@ -0,0 +1,86 @@
+import math
+from array import array
+
+import pytest
+
+from widgets.roast_plot import _SeriesLine, _fold_columns_np
+
+# (px, pw, W, py, ph, y_min, y_max): RoastPlot._window() ile aynı düzen
+WINDOW = (50.0, 700.0, 900.0, 40.0, 400.0, 0.0, 300.0)
+
+
+class _Line(_SeriesLine):
+    """GL context'siz: Line yerine kuyruk noktaları saklanır."""
+
+    def __init__(self):
+        super().__init__((1, 1, 1, 1), 1.0)
+
+    def _set_tail(self, pts):
+        self.tail = pts
+
+
+def _xf(sec):
+    px, pw, w = WINDOW[:3]
+    return px + pw * (max(0.0, min(w, float(sec))) / w)
+
+
+def _yf(v):
+    py, ph, y_min, y_max = WINDOW[3:]
+    v = max(y_min, min(y_max, float(v)))
+    return py + ph * ((v - y_min) / (y_max - y_min))
+
+
+def _roast(n, hz=5.0):
+    # 5 Hz BT: yükseliş + titreşim, sonu y ekseninde (300) kırpılır
+    xs = array("d", (i / hz for i in range(n)))
+    ys = array("d", (90.0 + 0.25 * x + 3.0 * math.sin(7.0 * x) for x in xs))
+    return xs, ys
+
+
+def test_vertices_bounded_by_plot_width():
+    xs, ys = _roast(4500)                       # 15 dk, piksel başına ~6 örnek
+    line = _Line()
+    line.update(xs, ys, _xf, _yf)
+    assert len(line.verts) // 2 <= 4 * (WINDOW[1] + 1)
+    # her sütunun min ve max'ı çizgide kalır
+    col = [y for x, y in zip(line.verts[0::2], line.verts[1::2]) if int(x) == 200]
+    raw = [_yf(y) for x, y in zip(xs, ys) if int(_xf(x)) == 200]
+    assert min(col) == min(raw) and max(col) == max(raw)
+
+
+def test_incremental_equals_one_shot():
+    xs, ys = _roast(3000)
+    one = _Line()
+    one.update(xs, ys, _xf, _yf)
+    step = _Line()
+    for n in range(1, len(xs) + 1, 37):
+        step.update(xs[:n], ys[:n], _xf, _yf)
+    step.update(xs, ys, _xf, _yf)
+    assert step.verts == one.verts and step.tail == one.tail
+
+
+# ---------- numpy toplu katlama ----------
+def test_numpy_fold_matches_python_loop():
+    pytest.importorskip("numpy")
+    for scale in (1.0, 10.0):
+        xs, ys = _roast(3000)
+        py_line, np_line = _Line(), _Line()
+        py_line.update(xs, ys, _xf, _yf, scale)
+        np_line.update(xs, ys, _xf, _yf, scale, window=WINDOW)
+        assert np_line.verts == py_line.verts
+        assert (np_line.col, np_line.first, np_line.lo, np_line.hi, np_line.last) == \
+               (py_line.col, py_line.first, py_line.lo, py_line.hi, py_line.last)
+        assert np_line.tail == py_line.tail
+
+        # sonraki canlı örnekler iki yolda da aynı devam eder
+        xs2, ys2 = _roast(3100)
+        py_line.update(xs2, ys2, _xf, _yf, scale)
+        np_line.update(xs2, ys2, _xf, _yf, scale, window=WINDOW)
+        assert np_line.verts == py_line.verts and np_line.tail == py_line.tail
+
+
+def test_numpy_fold_leaves_nan_to_python_loop():
+    pytest.importorskip("numpy")
+    xs, ys = _roast(500)
+    ys[100] = float("nan")
+    assert _fold_columns_np(xs, ys, len(xs) - 1, WINDOW, 1.0) is None
@@ -0,0 +1,74 @@
+import struct
+
+from services.register_map import (
+    LOG_FIELDS, LOG_SPAN, ROASTER_MAP, ReadPlan, decode_log_row, plan_blocks, register,
+)
+
+
+def test_plan_blocks_merges_small_holes():
+    regs = [register("a", 100), register("b", 105), register("c", 130), register("d", 131, "u32")]
+    assert plan_blocks(regs, max_gap=8) == [(100, 6), (130, 3)]
+    # max_gap=0: boşluk okunmaz
+    assert plan_blocks(regs, max_gap=0) == [(100, 1), (105, 1), (130, 3)]
+    # MAX_QTY sınırı bloğu böler
+    assert plan_blocks(regs, max_qty=4, max_gap=8) == [(100, 1), (105, 1), (130, 3)]
+
+
+def test_slow_registers_read_every_nth_pass():
+    plan = ReadPlan(ROASTER_MAP, span=LOG_SPAN, max_gap=0, slow_every=3)
+    full, fast, fast2, full2 = (plan.next_pass() for _ in range(4))
+    assert full is full2 and fast is fast2 and full is not fast
+    # log span her geçişte okunur: HR101..HR103 (slow) boşluk değil
+    assert [(b.start, b.qty) for b in fast.blocks] == [(100, 11)]
+    assert fast.span == ((0, 0, 11),)
+
+
+def test_span_values_across_blocks():
+    plan = ReadPlan([register("x", 10), register("y", 20)], span=(10, 3), max_gap=0)
+    p = plan.next_pass()
+    assert [(b.start, b.qty) for b in p.blocks] == [(10, 3), (20, 1)]
+    datas = [struct.pack(">3H", 1, 2, 3), struct.pack(">H", 9)]
+    assert ReadPlan.values(p, datas) == [1, 2, 3]
+    assert ReadPlan.values(p, [None, datas[1]]) is None
+
+
+def test_log_row_decodes_like_live_read():
+    assert LOG_FIELDS[0] == "set" and LOG_FIELDS[-1] == "ror" and len(LOG_FIELDS) == LOG_SPAN[1]
+    words = [1850, 120, 45, 550, 2015, 300, 1, 240, 180, 60, 95]
+    row = decode_log_row(words)
+    assert row["set"] == 185.0 and row["drum"] == 55.0 and row["time"] == 300
+    assert row["ror"] == 9.5
+
+
+# ---------- block codec'leri ----------
+def _block(registers, word_order="big"):
+    plan = ReadPlan(registers, word_order=word_order)
+    return plan.next_pass().blocks[0]
+
+
+def test_i16_sign():
+    block = _block([register("t", 0, "i16"), register("r", 1, scale=0.1, signed=True), register("u", 2)])
+    row = ReadPlan.decode(block, struct.pack(">3H", 0xFFFB, 0xFFFB, 0xFFFB))
+    assert row["t"] == -5 and row["u"] == 0xFFFB
+    assert abs(row["r"] + 0.5) < 1e-9
+
+
+def test_u32_f32_word_order():
+    regs = [register("n", 0, "u32"), register("x", 2, "f32"), register("s", 4)]
+    hi, lo = 0x0001, 0x86A0                       # 100000
+    fhi, flo = struct.unpack(">2H", struct.pack(">f", 212.5))
+
+    abcd = struct.pack(">5H", hi, lo, fhi, flo, 7)
+    assert ReadPlan.decode(_block(regs), abcd) == {"n": 100000, "x": 212.5, "s": 7}
+
+    # CDAB: düşük word önce; 16 bit register etkilenmez
+    cdab = struct.pack(">5H", lo, hi, flo, fhi, 7)
+    assert ReadPlan.decode(_block(regs, "little"), cdab) == {"n": 100000, "x": 212.5, "s": 7}
+    assert ReadPlan.decode(_block(regs), cdab)["n"] != 100000
+
+
+def test_codec_skips_holes():
+    block = _block([register("a", 0, "i32"), register("b", 5, "u16")])
+    assert (block.start, block.qty) == (0, 6)
+    row = ReadPlan.decode(block, struct.pack(">iHHHH", -2, 1, 2, 3, 42))
+    assert row == {"a": -2, "b": 42}
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from services.roast_columns import PREVIEW_ROWS, RoastColumns, convert_log, write_columns
+
+from test_roast_log import record
+
+
+def test_log_to_columns(tmp_path):
+    path = record(tmp_path)
+    out = convert_log(path)
+    assert out == os.path.splitext(path)[0] + ".rcol"
+    with RoastColumns(out) as cols:
+        # hatalı okuma (i=3) kolon dosyasına girmez
+        assert cols.rows == 9
+        assert [float(x) for x in cols.column("t")] == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+        assert list(cols.column("bt")) == pytest.approx([150.0, 150.1, 150.2, 150.4, 150.5,
+                                                         150.6, 150.7, 150.8, 150.9])
+        assert list(cols.column("ror")) == pytest.approx([9.0] * 9)
+        assert list(cols.column("ts"))[-1] == 1009.0
+
+
+def test_truncated_segment_converts_up_to_last_record(tmp_path):
+    path = record(tmp_path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 7)
+    with RoastColumns(convert_log(path)) as cols:
+        assert cols.rows == 8 and float(cols.column("t")[-1]) == 8.0
+
+
+def test_preview_keeps_last_row(tmp_path):
+    n = 3 * PREVIEW_ROWS + 5
+    data = {"ts": range(n), "t": range(n), "bt": range(n), "set": [0] * n, "ror": [0] * n}
+    with RoastColumns(write_columns(str(tmp_path / "x.rcol"), data)) as cols:
+        preview = [float(x) for x in cols.preview("t")]
+        assert len(preview) <= PREVIEW_ROWS + 1
+        assert preview[0] == 0 and preview[-1] == n - 1
+        assert preview == sorted(preview)
+
+
+def test_not_a_column_file(tmp_path):
+    bad = tmp_path / "bad.rcol"
+    bad.write_bytes(b"RLOG" + bytes(60))
+    with pytest.raises(ValueError):
+        RoastColumns(str(bad))
@@ -0,0 +1,48 @@
+import os
+
+from services.events import Event
+from services.roast_history import RoastHistory
+from services.roast_log import RoastRecorder, is_closed
+
+from test_roast_log import record
+
+
+def test_ingest_summary(tmp_path):
+    path = record(tmp_path)
+    history = RoastHistory(":memory:")
+    assert history.ingest(path) is not None
+    (row,) = history.page()
+    assert row["path"] == path and row["samples"] == 10 and row["errors"] == 1
+    # olay yoksa ilk / son iyi okuma: HR104 1500 -> 150,0 °C, 1509 -> 150,9 °C
+    assert row["charge_bt"] == 150.0 and row["drop_bt"] == 150.9
+    assert row["set_c"] == 200.0 and row["peak_ror"] == 9.0 and row["duration_s"] == 9
+
+
+def test_charge_drop_from_events(tmp_path):
+    path = record(tmp_path)
+    history = RoastHistory(":memory:")
+    history.ingest(path, profile="kenya", events=[Event("charge", 0, 205.5), Event("drop", 9, 211.0)])
+    (row,) = history.page(search="ken")
+    assert row["charge_bt"] == 205.5 and row["drop_bt"] == 211.0
+
+
+def test_sync_dir_takes_only_sealed_segments(tmp_path):
+    sealed = record(tmp_path)
+    open_one = str(tmp_path / "roast-open.rlog")
+    with open(sealed, "rb") as src, open(open_one, "wb") as dst:
+        dst.write(src.read())           # kaydı süren segment: .closed yok
+    history = RoastHistory(":memory:")
+    assert history.sync_dir(str(tmp_path)) == 1
+    assert history.paths() == [sealed]
+    assert history.sync_dir(str(tmp_path)) == 0
+
+
+def test_orphan_segment_sealed_on_start(tmp_path):
+    path = record(tmp_path)
+    os.remove(path + ".closed")         # çökme: kapanış işareti yok
+    history = RoastHistory(":memory:")
+    assert history.sync_dir(str(tmp_path)) == 0
+    rec = RoastRecorder(str(tmp_path))
+    rec.start()
+    rec.stop()
+    assert is_closed(path) and history.sync_dir(str(tmp_path)) == 1
@@ -0,0 +1,41 @@
+import os
+
+from services.acquisition import Sample
+from services.roast_log import RoastRecorder, read_segment, segment_rows
+
+
+def _row(i):
+    # HR100..HR110: set, airflow, burner, drum, bt, time, profile, dry, maillard, dev, ror
+    return [2000, 120, 45, 550, 1500 + i, i, 1, 0, 0, 0, 90]
+
+
+def record(directory, n=10, fail_at=(3,)):
+    rec = RoastRecorder(str(directory))
+    rec.start()
+    path = rec.begin_segment()
+    for i in range(n):
+        if i in fail_at:
+            rec.append(Sample(1000.0 + i, None, "crc error"))
+        else:
+            rec.append(Sample(1000.0 + i, _row(i), None))
+    rec.stop()                  # kuyruğu yazar, segmenti kapatır, thread'i bekler
+    return path
+
+
+def test_round_trip(tmp_path):
+    path = record(tmp_path)
+    header, samples = read_segment(path)
+    assert (header["start_reg"], header["qty"]) == (100, 11)
+    assert len(samples) == segment_rows(path) == 10
+    assert samples[3].values is None and samples[3].err == "crc error"
+    assert list(samples[5].values) == _row(5) and samples[5].ts == 1005.0
+
+
+def test_truncated_last_record_is_dropped(tmp_path):
+    path = record(tmp_path)
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 7)            # elektrik kesintisi: son kayıt yarım
+    _header, samples = read_segment(path)
+    assert len(samples) == 9 and list(samples[-1].values) == _row(8)
+
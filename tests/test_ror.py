@@ -0,0 +1,45 @@
+import pytest
+
+from services.ror import RorCalculator, decode_bt
+
+
+def _ramp(calc, per_min=12.0, hz=5, seconds=120, t0=1000.0):
+    # 5 Hz okuma, BT dakikada 12 °C artar
+    out = None
+    for i in range(seconds * hz):
+        t = t0 + i / hz
+        out = calc.update(t, 150.0 + per_min * (t - t0) / 60.0)
+    return out
+
+
+@pytest.mark.parametrize("method", ["diff", "lsq", "ema"])
+def test_ramp_slope(method):
+    assert _ramp(RorCalculator(method, window_s=20.0)) == pytest.approx(12.0, abs=1e-6)
+
+
+def test_lsq_smooths_sample_noise():
+    calc = RorCalculator("lsq", 20.0)
+    for i in range(600):
+        t = i / 5
+        value = calc.update(t, 150.0 + 0.2 * t + (0.5 if i % 2 else -0.5))   # ±0,5 °C titreşim
+    assert value == pytest.approx(12.0, abs=0.2)
+
+
+def test_warmup_repeat_and_rewind():
+    calc = RorCalculator("lsq", min_points=3)
+    assert calc.update(0.0, 100.0) is None
+    assert calc.update(1.0, 101.0) is None
+    v = calc.update(2.0, 102.0)
+    assert v == pytest.approx(60.0)
+    # aynı zaman damgası yok sayılır
+    assert calc.update(2.0, 500.0) == v
+    # zaman geri sardı: yeni kavurma, pencere sıfırdan
+    assert calc.update(0.5, 100.0) is None
+
+
+def test_decode_bt_ambiguous_range():
+    assert decode_bt(2015) == 201.5
+    assert decode_bt(250) == 250.0
+    # 250 önceki BT 24,8'e yakınsa x10 okunur
+    assert decode_bt(250, prev=24.8) == 25.0
+    assert decode_bt(250, prev=248.0) == 250.0
@@ -0,0 +1,21 @@
+from services.modbus_client import ModbusClient
+from services.modbus_server import ModbusTcpServer, RegisterBank
+from services.transports import TcpTransport
+
+
+def test_silent_slave_in_pipelined_batch():
+    # slave 3 hiç cevap vermez; batch max_inflight'tan büyük -> birden çok chunk
+    server = ModbusTcpServer(RegisterBank({100 + i: i for i in range(11)}), slave=2)
+    host, port = server.start()
+    client = ModbusClient(transport=TcpTransport(host, port, timeout=0.2, max_inflight=4), slave=2)
+    try:
+        out = client.read_holding_batch([(100, 11, 3)] + [(100, 11, 2)] * 9)
+        assert len(out) == 10
+        for values, err in out:
+            assert (values is None) != (err is None)
+        assert out[0][0] is None and out[0][1].startswith("short read")
+        # sonraki chunk'lar yeniden açılan bağlantıdan okunur
+        assert all(values == list(range(11)) for values, _err in out[4:])
+    finally:
+        client.close()
+        server.stop()
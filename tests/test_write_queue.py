@@ -0,0 +1,92 @@
+from services.acquisition import BusManager
+from services.modbus_client import ModbusClient
+from services.modbus_server import ModbusTcpServer, RegisterBank
+from services.transports import TcpTransport
+
+
+class _Recording(ModbusTcpServer):
+    """Gelen function code'ları kaydeder; fc23=False ise FC23'e illegal function döner."""
+
+    def __init__(self, bank, fc23=True):
+        super().__init__(bank, slave=1)
+        self.fc23 = fc23
+        self.fcs = []
+
+    def handle_pdu(self, slave, pdu):
+        self.fcs.append(pdu[0])
+        if pdu[0] == 0x17 and not self.fc23:
+            return bytes((0x97, 0x01))
+        return super().handle_pdu(slave, pdu)
+
+
+def _setup(fc23=True):
+    bank = RegisterBank({100 + i: 0 for i in range(11)})
+    server = _Recording(bank, fc23)
+    host, port = server.start()
+    client = ModbusClient(transport=TcpTransport(host, port, timeout=0.5), slave=1)
+    bus = BusManager(client)
+    stream = bus.add_device(1, 100, 11, rate_hz=0.1)
+    return server, bank, client, bus, stream
+
+
+def _queue(stream, results):
+    # aynı register'a iki yazma birleşir, son değer kazanır; 106 ayrı bir run
+    stream.write(100, 1850, results.append)
+    stream.write(101, 7)
+    stream.write(100, 1900, results.append)
+    stream.write(106, 1, results.append)
+
+
+def test_writes_coalesce_into_fc23():
+    server, bank, client, bus, stream = _setup()
+    results = []
+    try:
+        _queue(stream, results)
+        bus._step()                     # bus thread'in bir turu, test thread'inde
+        (sample,) = stream.drain()
+        assert server.fcs == [0x10, 0x17]
+        assert bank.read(100, 2) == [1900, 7] and bank.read(106, 1) == [1]
+        # FC23 okuması yazmadan sonra: yeni değerler aynı örnekte
+        assert sample.values[0] == 1900 and sample.values[6] == 1
+        assert results == [(True, None)] * 3
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_fallback_when_fc23_is_illegal():
+    server, bank, client, bus, stream = _setup(fc23=False)
+    results = []
+    try:
+        _queue(stream, results)
+        bus._step()
+        (sample,) = stream.drain()
+        # FC23 reddedildi -> FC06 + FC03, cihaz için kalıcı
+        assert server.fcs == [0x10, 0x17, 0x06, 0x03]
+        assert not stream.fc23
+        assert sample.err is None and sample.values[6] == 1
+        assert results == [(True, None)] * 3
+
+        server.fcs.clear()
+        stream.write(100, [1950, 8], results.append)
+        bus._step()
+        stream.drain()
+        assert server.fcs == [0x10, 0x03]
+        assert bank.read(100, 2) == [1950, 8]
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_rejected_write_reports_exception():
+    server, bank, client, bus, stream = _setup()
+    results = []
+    try:
+        stream.write(109, [1, 2, 3], results.append)    # 111 yok: FC23 exception 0x02
+        bus._step()
+        stream.drain()
+        assert results == [(False, "exception 0x02")]
+        assert bank.read(109, 2) == [0, 0]
+    finally:
+        client.close()
+        server.stop()
@@ -1,161 +1,596 @@
+import time
+from array import array
+
 from kivy.uix.widget import Widget
-from kivy.properties import ListProperty
+from kivy.clock import Clock
+from kivy.properties import BooleanProperty, ListProperty, NumericProperty
 from kivy.metrics import dp
-from kivy.graphics import Color, Line, Rectangle
-from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Line, Rectangle, InstructionGroup
+
+from services import metrics
+from widgets.text_cache import get_texture
+
+# numpy opsiyonel: yoksa saf Python yolu. Import'u ~100 ms, açılışta
+# gerekmez -> ilk toplu çizimde yüklenir (_numpy)
+np = None
+_np_tried = False
+
+
+def _numpy():
+    global np, _np_tried
+    if not _np_tried:
+        _np_tried = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+
+REDRAW_SECONDS = metrics.registry.histogram(
+    "plot_redraw_seconds", "RoastPlot redraw time (static: axes/grid on resize, data: curves per frame)",
+    ("part",), buckets=metrics.FRAME_BUCKETS)
+_REDRAW_STATIC = REDRAW_SECONDS.labels("static")
+_REDRAW_DATA = REDRAW_SECONDS.labels("data")
+
+
+class _SeriesLine:
+    """
+    One curve, decimated to at most 4 vertices per pixel column (first, min,
+    max, last of the samples in that column), drawn as persistent Line
+    chunks of up to CHUNK vertices.
+
+    Samples before the newest one are final (only the newest can be
+    overwritten, see RoastPlot.replace_last), so closed columns are
+    committed once and the open column keeps running min/max: per-sample
+    cost is O(1) and the vertex count is bounded by the plot width, not
+    by roast length. Only the tail Line is rewritten per update.
+    Full rebuild only after reset() (resize / window change / new series);
+    with numpy the rebuild folds the whole series in one vectorized pass
+    (_fold_columns_np), the per-sample loop below is the fallback.
+    """
+
+    CHUNK = 256
+    BULK_MIN = 64       # bundan kısa seride numpy'a geçmek kazandırmaz
+
+    def __init__(self, color, width):
+        self.color = color
+        self.width = width
+        self.group = InstructionGroup()
+        self.reset()
+
+    def reset(self):
+        self.group.clear()
+        self.group.add(Color(*self.color))
+        self.tail = None
+        self.tail_start = 0             # vertex index where the tail Line starts
+        self.verts = []                 # committed columns, flat [x0, y0, x1, y1, ...]
+        self.n_prev = 0
+        self.done = 0                   # raw samples [0, done) are folded into columns
+        self.col = None                 # open pixel column
+        self.first = self.lo = self.hi = self.last = 0
+
+    def update(self, xs, ys, xf, yf, scale=1.0, window=None):
+        n = min(len(xs), len(ys))
+        if n < self.n_prev:
+            # seri kısaldı (reset) -> baştan
+            self.reset()
+        self.n_prev = n
+        if n == 0:
+            return
+
+        if window is not None and self.done == 0 and n - 1 >= self.BULK_MIN and _numpy() is not None:
+            folded = _fold_columns_np(xs, ys, n - 1, window, scale)
+            if folded is not None:
+                verts, (self.col, self.first, self.lo, self.hi, self.last) = folded
+                self.verts.extend(verts)
+                self.done = n - 1
+
+        def pt(i):
+            return [xf(xs[i]), yf(ys[i] * scale)]
+
+        # final samples -> pixel columns
+        for i in range(self.done, n - 1):
+            c = int(xf(xs[i]))
+            if c != self.col:
+                if self.col is not None:
+                    for j in self._col_indices():
+                        self.verts.extend(pt(j))
+                self.col = c
+                self.first = self.lo = self.hi = self.last = i
+            else:
+                if ys[i] < ys[self.lo]:
+                    self.lo = i
+                if ys[i] > ys[self.hi]:
+                    self.hi = i
+                self.last = i
+        self.done = max(self.done, n - 1)
+
+        # newest sample (may still be overwritten): only in the live part
+        k = n - 1
+        live = []
+        if self.col is None:
+            live = pt(k)
+        elif int(xf(xs[k])) != self.col:
+            for j in self._col_indices():
+                live.extend(pt(j))
+            live.extend(pt(k))
+        else:
+            for j in self._col_indices(k, ys):
+                live.extend(pt(j))
+
+        self._emit(live)
+
+    def _col_indices(self, extra=None, ys=None):
+        lo, hi, last = self.lo, self.hi, self.last
+        if extra is not None:
+            if ys[extra] < ys[lo]:
+                lo = extra
+            if ys[extra] > ys[hi]:
+                hi = extra
+            last = extra
+        return sorted({self.first, lo, hi, last})
+
+    def _emit(self, live):
+        # dolu chunk'ları mühürle; yenisi son noktadan başlasın (çizgi kopmasın)
+        while len(self.verts) // 2 - self.tail_start >= self.CHUNK:
+            end = self.tail_start + self.CHUNK
+            self._set_tail(self.verts[2 * self.tail_start:2 * end])
+            self.tail = None
+            self.tail_start = end - 1
+
+        self._set_tail(self.verts[2 * self.tail_start:] + live)
+
+    def _set_tail(self, pts):
+        if self.tail is None:
+            self.tail = Line(points=pts, width=self.width)
+            self.group.add(self.tail)
+        else:
+            self.tail.points = pts
+
+
+def _fold_columns_np(xs, ys, n, window, scale):
+    """
+    Vectorized equivalent of the per-sample column loop in _SeriesLine.update
+    for samples [0, n): clip + affine transform, split into pixel columns,
+    first/min/max/last per column, interleave x/y.
+
+    window: (px, pw, W, py, ph, y_min, y_max)
+    Returns (flat vertex list of the closed columns, open column state
+    (col, first, lo, hi, last)), or None if the series has NaNs (the
+    Python loop handles those).
+    """
+    px, pw, w, py, ph, y_min, y_max = window
+    x = np.asarray(xs, dtype=np.float64)[:n]
+    y = np.asarray(ys, dtype=np.float64)[:n]
+    if np.isnan(y).any():
+        return None
+
+    # aynı işlem sırası (_xf ile) -> sütun sınırları Python yolu ile birebir
+    sx = px + pw * (np.clip(x, 0.0, w) / w)
+    col = sx.astype(np.int64)
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(col)) + 1))
+    ends = np.append(starts[1:], n)
+    seg = np.repeat(np.arange(len(starts)), ends - starts)
+
+    # sütundaki ilk min / ilk max indeksi
+    lo_hit = np.flatnonzero(y == np.minimum.reduceat(y, starts)[seg])
+    hi_hit = np.flatnonzero(y == np.maximum.reduceat(y, starts)[seg])
+    lo = lo_hit[np.unique(seg[lo_hit], return_index=True)[1]]
+    hi = hi_hit[np.unique(seg[hi_hit], return_index=True)[1]]
+
+    idx = np.stack((starts, lo, hi, ends - 1), axis=1)
+    idx.sort(axis=1)
+    keep = np.ones(idx.shape, dtype=bool)
+    keep[:, 1:] = idx[:, 1:] != idx[:, :-1]
+    closed = idx[:-1][keep[:-1]]
+
+    v = np.clip(y[closed] * scale, y_min, y_max)
+    out = np.empty(2 * len(closed))
+    out[0::2] = sx[closed]
+    out[1::2] = py + ph * ((v - y_min) / (y_max - y_min))
+
+    open_col = (int(col[-1]), int(starts[-1]), int(lo[-1]), int(hi[-1]), n - 1)
+    return out.tolist(), open_col
+
+
+def _as_buffer(seq):
+    """array('d') / numpy / memoryview are used as-is (no copy); anything else -> array('d')."""
+    if isinstance(seq, (array, memoryview)) or hasattr(seq, "__array_interface__"):
+        return seq
+    return array("d", seq)
 
 
 class RoastPlot(Widget):
+    """
+    Live roast chart.
+
+    Feeding data:
+      append_samples(t, bt, setv, ror)   scalars or equal-length sequences
+      replace_last(t, bt, setv, ror)     overwrite newest point (same second)
+      set_series_bulk(xs, bts, sets, rors)  whole series, buffers kept by reference
+      clear_series()
+      set_reference(xs, bts) / clear_reference()  past roast BT behind the live curves
+      set_target(xs, bts) / clear_target()        profile target BT
+      upsert_deviation(t, dbt)                    live ΔBT vs target (cleared with the series)
+      upsert_host_ror(t, ror)                     host-computed RoR (cleared with the series)
+      add_event(t, label) / clear_events()        roast event markers (cleared with the series)
+    show_ror / show_host_ror pick which RoR curves are drawn.
+    All of them only mark the plot dirty; the lines are updated once per
+    frame (Clock trigger). x_series/bt_series/set_series/ror_series still
+    work, but copy.
+    """
+
     x_series = ListProperty([])
     bt_series = ListProperty([])
     set_series = ListProperty([])
     ror_series = ListProperty([])   # <-- EKLENDI
 
-    W = 1200.0
-    y_min = 0
-    y_max = 300
+    # görünür pencere: değişince (zoom) çizgiler yeni ölçekte baştan kurulur
+    W = NumericProperty(1200.0)
+    y_min = NumericProperty(0)
+    y_max = NumericProperty(300)
+
+    show_ror = BooleanProperty(True)          # kontrolcü RoR (HR110)
+    show_host_ror = BooleanProperty(False)    # services.ror ile hesaplanan
 
     # RoR 0..40 gibi küçük kaldığı için grafikte görünür yapmak:
     # 1.0 yaparsan "ham" çizer (dipte kalır). 6.0 yaparsan 0..50 -> 0..300
     ROR_SCALE = 5.0
 
+    # ΔBT (profile sapması) DEV_BASE çizgisi etrafında, DEV_SCALE kat büyütülmüş
+    DEV_BASE = 50.0
+    DEV_SCALE = 2.0
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.bind(pos=self._redraw, size=self._redraw)
+
+        # static layer (bg, grid, labels, legend): sadece pos/size değişince
+        self._static = InstructionGroup()
+        # data layer: kalıcı Line'lar, yeni örnekte sadece kuyruk güncellenir
+        self._set_line = _SeriesLine((1.00, 0.38, 0.38, 0.95), 1.2)
+        self._bt_line = _SeriesLine((0.25, 0.70, 1.00, 1.0), 1.4)
+        self._ror_line = _SeriesLine((0.40, 0.95, 0.55, 0.95), 1.2)
+        # referans (geçmiş kavurma) BT: soluk, canlı çizgilerin arkasında
+        self._ref_line = _SeriesLine((0.70, 0.74, 0.82, 0.45), 1.2)
+        # profil hedef BT + canlı ΔBT
+        self._target_line = _SeriesLine((0.95, 0.80, 0.30, 0.60), 1.2)
+        self._dev_line = _SeriesLine((0.95, 0.80, 0.30, 0.95), 1.2)
+        self._host_ror_line = _SeriesLine((0.75, 0.55, 1.00, 0.95), 1.2)
+        # olay işaretleri (CHARGE / TP / DRY / FC / DROP): birkaç tane, olay gelince baştan çizilir
+        self._event_group = InstructionGroup()
+        self._events = []               # (t, label)
+
+        self.canvas.add(self._static)
+        self.canvas.add(self._ref_line.group)
+        self.canvas.add(self._target_line.group)
+        self.canvas.add(self._dev_line.group)
+        self.canvas.add(self._set_line.group)
+        self.canvas.add(self._bt_line.group)
+        self.canvas.add(self._ror_line.group)
+        self.canvas.add(self._host_ror_line.group)
+        self.canvas.add(self._event_group)
+
+        self._frame = (0, 0, 1, 1)      # px, py, pw, ph
+
+        # series buffers (array('d') veya dışarıdan verilen numpy/array tamponları)
+        self._xs = array("d")
+        self._bt = array("d")
+        self._set = array("d")
+        self._ror = array("d")
+        self._ref_x = array("d")
+        self._ref_bt = array("d")
+        self._target_x = array("d")
+        self._target_bt = array("d")
+        self._dev_x = array("d")
+        self._dev = array("d")           # DEV_BASE + dbt * DEV_SCALE
+        self._host_x = array("d")
+        self._host_ror = array("d")
+        self._full = False              # True -> sonraki karede çizgileri baştan kur
+
+        # aynı karedeki tüm değişiklikler -> tek güncelleme (bir sonraki frame'den önce)
+        self._trigger_data = Clock.create_trigger(self._update_data, -1)
+
+        self.bind(pos=self._redraw, size=self._redraw,
+                  W=self._redraw, y_min=self._redraw, y_max=self._redraw,
+                  show_ror=self._redraw, show_host_ror=self._redraw)
         self.bind(
-            x_series=self._redraw,
-            bt_series=self._redraw,
-            set_series=self._redraw,
-            ror_series=self._redraw,   # <-- EKLENDI
+            x_series=self._on_series_prop,
+            bt_series=self._on_series_prop,
+            set_series=self._on_series_prop,
+            ror_series=self._on_series_prop,   # <-- EKLENDI
         )
 
-    def _draw_text(self, text, x, y, font_size=12, color=(1, 1, 1, 0.9)):
-        lbl = CoreLabel(text=text, font_size=font_size, color=color)
-        lbl.refresh()
-        Rectangle(texture=lbl.texture, pos=(x, y), size=lbl.texture.size)
+    # ---------- data API ----------
+    def append_samples(self, t, bt, setv, ror):
+        self._own_buffers()
+        if hasattr(t, "__len__"):
+            self._xs.extend(t)
+            self._bt.extend(bt)
+            self._set.extend(setv)
+            self._ror.extend(ror)
+        else:
+            self._xs.append(t)
+            self._bt.append(bt)
+            self._set.append(setv)
+            self._ror.append(ror)
+        self._trigger_data()
+
+    def replace_last(self, t, bt, setv, ror):
+        if not len(self._xs):
+            self.append_samples(t, bt, setv, ror)
+            return
+        self._own_buffers()
+        self._xs[-1] = t
+        self._bt[-1] = bt
+        self._set[-1] = setv
+        self._ror[-1] = ror
+        self._trigger_data()
+
+    def set_series_bulk(self, xs, bts, sets, rors):
+        self._set_buffers(xs, bts, sets, rors)
+        self._full = True
+        self._trigger_data()
+
+    def _set_buffers(self, xs, bts, sets, rors):
+        self._xs = _as_buffer(xs)
+        self._bt = _as_buffer(bts)
+        self._set = _as_buffer(sets)
+        self._ror = _as_buffer(rors)
+
+    def clear_series(self):
+        self._dev_x = array("d")
+        self._dev = array("d")
+        self._host_x = array("d")
+        self._host_ror = array("d")
+        self.clear_events()
+        self.set_series_bulk(array("d"), array("d"), array("d"), array("d"))
+
+    def set_reference(self, xs, bts):
+        """Background BT curve (e.g. a past roast); buffers kept by reference."""
+        self._ref_x = _as_buffer(xs)
+        self._ref_bt = _as_buffer(bts)
+        self._ref_line.reset()
+        self._trigger_data()
+
+    def clear_reference(self):
+        self.set_reference(array("d"), array("d"))
+
+    def set_target(self, xs, bts):
+        """Profile target BT (resampled once by the caller); also shows the ΔBT legend."""
+        had = len(self._target_x) > 0
+        self._target_x = _as_buffer(xs)
+        self._target_bt = _as_buffer(bts)
+        self._target_line.reset()
+        if had != (len(self._target_x) > 0):
+            self._draw_static()
+        self._trigger_data()
+
+    def clear_target(self):
+        self._dev_x = array("d")
+        self._dev = array("d")
+        self.set_target(array("d"), array("d"))
+
+    def upsert_deviation(self, t, dbt):
+        self._upsert(self._dev_x, self._dev, t, self.DEV_BASE + dbt * self.DEV_SCALE)
+
+    def upsert_host_ror(self, t, ror):
+        self._upsert(self._host_x, self._host_ror, t, ror)
 
+    def _upsert(self, xs, ys, t, v):
+        # aynı saniye -> son noktayı ez (replace_last ile aynı kural)
+        if len(xs) and int(xs[-1]) == int(t):
+            ys[-1] = v
+        else:
+            xs.append(float(t))
+            ys.append(v)
+        self._trigger_data()
+
+    def add_event(self, t, label):
+        """Vertical marker at roast second t, labelled at the top of the plot."""
+        self._events.append((float(t), label))
+        self._draw_events()
+
+    def clear_events(self):
+        if self._events:
+            self._events = []
+            self._draw_events()
+
+    def _own_buffers(self):
+        # dışarıdan gelen (numpy / memoryview) tampona append edilemez: bir kez kopyala
+        for name in ("_xs", "_bt", "_set", "_ror"):
+            buf = getattr(self, name)
+            if not isinstance(buf, array):
+                setattr(self, name, array("d", buf))
+
+    def _on_series_prop(self, *_):
+        # eski API: ListProperty atamaları (her atamada kopya). Büyüyen seride
+        # kuyruk güncellemesi yeter, kısalırsa _SeriesLine kendisi sıfırlar.
+        self._set_buffers(self.x_series, self.bt_series, self.set_series, self.ror_series)
+        self._trigger_data()
+
+    def _draw_text(self, group, text, x, y, font_size=12, color=(1, 1, 1, 0.9)):
+        tex = get_texture(text, font_size, color)
+        group.add(Rectangle(texture=tex, pos=(x, y), size=tex.size))
+
+    # ---------- coordinate transform ----------
+    def _xf(self, sec):
+        px, _py, pw, _ph = self._frame
+        sec = max(0.0, min(self.W, float(sec)))
+        return px + pw * (sec / self.W)
+
+    def _yf(self, v):
+        _px, py, _pw, ph = self._frame
+        v = max(self.y_min, min(self.y_max, float(v)))
+        return py + ph * ((v - self.y_min) / (self.y_max - self.y_min))
+
+    def _window(self):
+        # _xf/_yf parametreleri, vektörel yol için
+        px, py, pw, ph = self._frame
+        return (px, pw, float(self.W), py, ph, float(self.y_min), float(self.y_max))
+
+    # ---------- full redraw (resize) ----------
     def _redraw(self, *args):
-        self.canvas.clear()
-        with self.canvas:
-            # Background
-            Color(0.07, 0.08, 0.10, 1)
-            Rectangle(pos=self.pos, size=self.size)
-
-            pad_l = dp(48)
-            pad_r = dp(10)
-            pad_t = dp(10)
-            pad_b = dp(44)
-
-            px = self.x + pad_l
-            py = self.y + pad_b
-            pw = self.width - (pad_l + pad_r)
-            ph = self.height - (pad_b + pad_t)
-
-            Color(0.06, 0.07, 0.09, 1)
-            Rectangle(pos=(px, py), size=(pw, ph))
-
-            Color(0.24, 0.28, 0.36, 1)
-            Line(rectangle=(px, py, pw, ph), width=1)
-
-            minor = (0.25, 0.28, 0.36, 0.20)
-            major = (0.50, 0.58, 0.74, 0.55)
-
-            y_major_lbl = (0.92, 0.94, 0.98, 0.95)
-            y_minor_lbl = (0.78, 0.82, 0.88, 0.85)
-            x_minor_lbl = (0.78, 0.82, 0.88, 0.90)
-            x_major_lbl = (0.94, 0.96, 0.99, 0.95)
-
-            def xf(sec):
-                sec = max(0.0, min(self.W, float(sec)))
-                return px + pw * (sec / self.W)
-
-            def yf(v):
-                v = max(self.y_min, min(self.y_max, float(v)))
-                return py + ph * ((v - self.y_min) / (self.y_max - self.y_min))
-
-            # X grid
-            Color(*minor)
-            for sec in range(0, int(self.W) + 1, 60):
-                xg = xf(sec)
-                Line(points=[xg, py, xg, py + ph], width=1)
-
-            Color(*major)
-            for sec in range(0, int(self.W) + 1, 300):
-                xg = xf(sec)
-                Line(points=[xg, py, xg, py + ph], width=1.2)
-
-            # Y grid
-            Color(*minor)
-            for t in range(0, 301, 50):
-                yg = yf(t)
-                Line(points=[px, yg, px + pw, yg], width=1)
-
-            Color(*major)
-            for t in range(0, 301, 100):
-                yg = yf(t)
-                Line(points=[px, yg, px + pw, yg], width=1.2)
-
-            # Y labels
-            for t in range(0, 301, 50):
-                yg = yf(t)
-                col = y_major_lbl if (t % 100 == 0) else y_minor_lbl
-                self._draw_text(f"{t}°C", self.x + dp(6), yg - dp(8), font_size=12, color=col)
-
-            # X labels
-            x_label_y = self.y + dp(8)
-            for sec in range(0, int(self.W) + 1, 60):
-                xg = xf(sec)
-                col = x_major_lbl if (sec % 300 == 0) else x_minor_lbl
-                self._draw_text(f"{sec//60}m", xg - dp(10), x_label_y, font_size=12, color=col)
-
-            # Legend (SET / BT / ROR)
-            legend_y = self.y + dp(26)
-            legend_x = px + pw / 2 - dp(110)
-
-            # SET
-            Color(1.00, 0.38, 0.38, 0.95)
-            Rectangle(pos=(legend_x, legend_y), size=(dp(10), dp(10)))
-            self._draw_text("SET", legend_x + dp(14), legend_y - dp(2), font_size=12,
-                            color=(0.9, 0.92, 0.95, 0.95))
+        t0 = time.perf_counter()
+        self._draw_static()
+        self._draw_events()
+        _REDRAW_STATIC.observe(time.perf_counter() - t0)
+        self._full = True
+        self._update_data()
 
-            # BT
-            Color(0.25, 0.70, 1.00, 1.0)
-            Rectangle(pos=(legend_x + dp(56), legend_y), size=(dp(10), dp(10)))
-            self._draw_text("BT", legend_x + dp(70), legend_y - dp(2), font_size=12,
-                            color=(0.9, 0.92, 0.95, 0.95))
+    def _draw_static(self):
+        g = self._static
+        g.clear()
+
+        # Background
+        g.add(Color(0.07, 0.08, 0.10, 1))
+        g.add(Rectangle(pos=self.pos, size=self.size))
+
+        pad_l = dp(48)
+        pad_r = dp(10)
+        pad_t = dp(10)
+        pad_b = dp(44)
+
+        px = self.x + pad_l
+        py = self.y + pad_b
+        pw = self.width - (pad_l + pad_r)
+        ph = self.height - (pad_b + pad_t)
+        self._frame = (px, py, pw, ph)
+
+        g.add(Color(0.06, 0.07, 0.09, 1))
+        g.add(Rectangle(pos=(px, py), size=(pw, ph)))
+
+        g.add(Color(0.24, 0.28, 0.36, 1))
+        g.add(Line(rectangle=(px, py, pw, ph), width=1))
+
+        minor = (0.25, 0.28, 0.36, 0.20)
+        major = (0.50, 0.58, 0.74, 0.55)
+
+        y_major_lbl = (0.92, 0.94, 0.98, 0.95)
+        y_minor_lbl = (0.78, 0.82, 0.88, 0.85)
+        x_minor_lbl = (0.78, 0.82, 0.88, 0.90)
+        x_major_lbl = (0.94, 0.96, 0.99, 0.95)
+
+        xf = self._xf
+        yf = self._yf
+
+        # X grid
+        g.add(Color(*minor))
+        for sec in range(0, int(self.W) + 1, 60):
+            xg = xf(sec)
+            g.add(Line(points=[xg, py, xg, py + ph], width=1))
+
+        g.add(Color(*major))
+        for sec in range(0, int(self.W) + 1, 300):
+            xg = xf(sec)
+            g.add(Line(points=[xg, py, xg, py + ph], width=1.2))
 
-            # ROR
-            Color(0.40, 0.95, 0.55, 0.95)
-            Rectangle(pos=(legend_x + dp(102), legend_y), size=(dp(10), dp(10)))
-            ror_lbl = "ROR" if self.ROR_SCALE == 1.0 else f"ROR x{self.ROR_SCALE:.0f}"
-            self._draw_text(ror_lbl, legend_x + dp(116), legend_y - dp(2), font_size=12,
+        # 50'nin katları, görünür y penceresi içinde
+        y_ticks = range(-(-int(self.y_min) // 50) * 50, int(self.y_max) + 1, 50)
+
+        # Y grid
+        g.add(Color(*minor))
+        for t in y_ticks:
+            yg = yf(t)
+            g.add(Line(points=[px, yg, px + pw, yg], width=1))
+
+        g.add(Color(*major))
+        for t in y_ticks:
+            if t % 100:
+                continue
+            yg = yf(t)
+            g.add(Line(points=[px, yg, px + pw, yg], width=1.2))
+
+        # Y labels
+        for t in y_ticks:
+            yg = yf(t)
+            col = y_major_lbl if (t % 100 == 0) else y_minor_lbl
+            self._draw_text(g, f"{t}°C", self.x + dp(6), yg - dp(8), font_size=12, color=col)
+
+        # X labels
+        x_label_y = self.y + dp(8)
+        for sec in range(0, int(self.W) + 1, 60):
+            xg = xf(sec)
+            col = x_major_lbl if (sec % 300 == 0) else x_minor_lbl
+            self._draw_text(g, f"{sec//60}m", xg - dp(10), x_label_y, font_size=12, color=col)
+
+        # PROFILE ΔBT sıfır çizgisi
+        if len(self._target_x):
+            g.add(Color(0.95, 0.80, 0.30, 0.35))
+            yb = yf(self.DEV_BASE)
+            g.add(Line(points=[px, yb, px + pw, yb], width=1))
+
+        # Legend (SET / BT / ROR [/ HOST ROR] [/ ΔBT]), ortalanmış
+        entries = [((1.00, 0.38, 0.38, 0.95), "SET"), ((0.25, 0.70, 1.00, 1.0), "BT")]
+        scale_sfx = "" if self.ROR_SCALE == 1.0 else f" x{self.ROR_SCALE:.0f}"
+        if self.show_ror:
+            entries.append(((0.40, 0.95, 0.55, 0.95), "ROR" + scale_sfx))
+        if self.show_host_ror:
+            entries.append(((0.75, 0.55, 1.00, 0.95), "HOST ROR" + scale_sfx))
+        if len(self._target_x):
+            entries.append(((0.95, 0.80, 0.30, 0.95), f"ΔBT x{self.DEV_SCALE:.0f}"))
+
+        widths = [dp(14) + dp(7) * len(label) + dp(18) for _c, label in entries]
+        legend_y = self.y + dp(26)
+        legend_x = px + pw / 2 - sum(widths) / 2
+        for (col, label), w in zip(entries, widths):
+            g.add(Color(*col))
+            g.add(Rectangle(pos=(legend_x, legend_y), size=(dp(10), dp(10))))
+            self._draw_text(g, label, legend_x + dp(14), legend_y - dp(2), font_size=12,
                             color=(0.9, 0.92, 0.95, 0.95))
+            legend_x += w
+
+    def _draw_events(self):
+        g = self._event_group
+        g.clear()
+        px, py, pw, ph = self._frame
+        for i, (t, label) in enumerate(self._events):
+            if t > self.W:
+                continue
+            xe = self._xf(t)
+            g.add(Color(0.94, 0.96, 0.99, 0.45))
+            g.add(Line(points=[xe, py, xe, py + ph], width=1, dash_length=4, dash_offset=4))
+            # yakın olaylarda etiketler üst üste binmesin: iki sıra
+            ye = py + ph - dp(16) * (1 + i % 2)
+            self._draw_text(g, label, min(xe + dp(3), px + pw - dp(7) * len(label)), ye,
+                            font_size=12, color=(0.94, 0.96, 0.99, 0.95))
 
-            # plots
-            if self.x_series and len(self.x_series) >= 2:
-
-                # SET
-                if self.set_series and len(self.set_series) == len(self.x_series):
-                    Color(1.00, 0.38, 0.38, 0.95)
-                    pts = []
-                    for sx, sy in zip(self.x_series, self.set_series):
-                        pts.extend([xf(sx), yf(sy)])
-                    Line(points=pts, width=1.2)
-
-                # BT
-                if self.bt_series and len(self.bt_series) == len(self.x_series):
-                    Color(0.25, 0.70, 1.00, 1.0)
-                    pts = []
-                    for bx, by in zip(self.x_series, self.bt_series):
-                        pts.extend([xf(bx), yf(by)])
-                    Line(points=pts, width=1.4)
-
-                # ROR
-                if self.ror_series and len(self.ror_series) == len(self.x_series):
-                    Color(0.40, 0.95, 0.55, 0.95)
-                    pts = []
-                    for rx, rv in zip(self.x_series, self.ror_series):
-                        # grafikte görünür kılmak için ölçek
-                        pts.extend([xf(rx), yf(rv * self.ROR_SCALE)])
-                    Line(points=pts, width=1.2)
+    # ---------- incremental data update ----------
+    def _update_data(self, *args):
+        self._trigger_data.cancel()
+        t0 = time.perf_counter()
+        xs = self._xs
+
+        lines = (
+            (self._ref_line, self._ref_x, self._ref_bt, 1.0),
+            (self._target_line, self._target_x, self._target_bt, 1.0),
+            (self._dev_line, self._dev_x, self._dev, 1.0),
+            (self._set_line, xs, self._set, 1.0),
+            (self._bt_line, xs, self._bt, 1.0),
+            # grafikte görünür kılmak için ölçek
+            (self._ror_line, xs, self._ror, self.ROR_SCALE),
+            (self._host_ror_line, self._host_x, self._host_ror, self.ROR_SCALE),
+        )
+        hidden = set()
+        if not self.show_ror:
+            hidden.add(self._ror_line)
+        if not self.show_host_ror:
+            hidden.add(self._host_ror_line)
+        if self._full:
+            self._full = False
+            for line, _xs, _ys, _scale in lines:
+                line.reset()
 
+        window = self._window()
+        for line, xs, ys, scale in lines:
+            n = len(xs)
+            if line in hidden:
+                n = 0
+            if n < 2 or len(ys) != n:
+                if n < 2 and line.tail is not None:
+                    line.reset()
+                continue
+            line.update(xs, ys, self._xf, self._yf, scale, window)
+        _REDRAW_DATA.observe(time.perf_counter() - t0)
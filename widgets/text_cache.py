@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+from kivy.core.text import Label as CoreLabel
+
+
+class TextureCache:
+    """
+    Rendered text textures keyed by (text, font_size, color, extra label kw),
+    LRU-evicted. Canvas widgets draw axis labels / legends from here instead
+    of building and refresh()-ing a CoreLabel on every redraw.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text, font_size=12, color=(1, 1, 1, 1), **label_kw):
+        key = (text, font_size, tuple(color), tuple(sorted(label_kw.items())))
+        tex = self._items.get(key)
+        if tex is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return tex
+
+        self.misses += 1
+        lbl = CoreLabel(text=text, font_size=font_size, color=color, **label_kw)
+        lbl.refresh()
+        tex = lbl.texture
+
+        self._items[key] = tex
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+        return tex
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# uygulama genelinde tek cache (RoastPlot, gauge'lar vb.)
+text_cache = TextureCache()
+
+
+def get_texture(text, font_size=12, color=(1, 1, 1, 1), **label_kw):
+    return text_cache.get(text, font_size, color, **label_kw)